@@ -0,0 +1,224 @@
+# app/admision.py
+#
+# Control de admisión de las rutas /clientes.
+#
+# Cuando MySQL se ralentiza, las peticiones se acumulan (en el threadpool o
+# esperando conexión del pool) hasta que todas caducan a la vez. Aquí cada
+# clase de ruta (lecturas y escrituras) tiene un máximo de peticiones en
+# curso y una cola acotada con plazo:
+#
+# - Con hueco, la petición entra directamente.
+# - Si no, espera en cola como mucho ADMISION_ESPERA_MS. Si la cola está
+#   llena, o la espera estimada (cola por duración media de las peticiones)
+#   ya supera ese plazo, se rechaza en el acto con 503 y Retry-After.
+#
+# Así las peticiones admitidas mantienen una latencia acotada y las demás
+# fallan rápido, en vez de fallar todas tarde. Los límites son por worker.
+
+import asyncio
+from collections import deque
+import json
+import math
+import time
+
+from app import config
+from app.metrics import Counter, Histogram, lineas, registro
+
+PREFIJO = "/clientes"
+
+# Rutas que no pasan por el control: duran lo que dura la transferencia
+# (la subida del CSV, la descarga del export o de los duplicados) o la
+# conexión (eventos SSE), no lo que tarda MySQL
+EXCLUIDAS = ("/clientes/export", "/clientes/import", "/clientes/events", "/clientes/duplicates")
+
+# POST que solo leen
+LECTURAS_POST = ("/clientes/batch-get",)
+
+adm_rechazadas = registro.registrar(Counter(
+    "admission_rejected_total", "Peticiones rechazadas con 503 por el control de admisión",
+    ("clase", "motivo")
+))
+adm_espera = registro.registrar(Histogram(
+    "admission_queue_wait_seconds", "Espera en cola de las peticiones admitidas", ("clase",)
+))
+
+
+class Limitador:
+    """Concurrencia máxima de una clase de rutas con cola FIFO acotada."""
+
+    def __init__(self, nombre: str, concurrencia: int, cola: int, espera: float):
+        self.nombre = nombre
+        self.concurrencia = concurrencia
+        self.max_cola = cola
+        self.espera = espera
+        self.en_curso = 0
+        self._cola = deque()
+        # Media móvil de la duración de las peticiones admitidas
+        self.duracion_media = 0.0
+        self.admitidas = 0
+        self.rechazadas = 0
+
+    @property
+    def activo(self) -> bool:
+        return self.concurrencia > 0
+
+    def espera_estimada(self) -> float:
+        """Espera aproximada de una petición que se pusiera ahora a la cola."""
+        return (len(self._cola) + 1) / self.concurrencia * self.duracion_media
+
+    def _rechazar(self, motivo: str):
+        self.rechazadas += 1
+        adm_rechazadas.inc(self.nombre, motivo)
+        return motivo
+
+    async def entrar(self) -> str:
+        """None si la petición puede seguir; si no, el motivo del rechazo."""
+        if self.en_curso < self.concurrencia and not self._cola:
+            self.en_curso += 1
+            self.admitidas += 1
+            return None
+
+        if len(self._cola) >= self.max_cola:
+            return self._rechazar("cola_llena")
+        if self.espera_estimada() > self.espera:
+            return self._rechazar("plazo")
+
+        inicio = time.perf_counter()
+        turno = asyncio.get_running_loop().create_future()
+        self._cola.append(turno)
+        try:
+            await asyncio.wait((turno,), timeout=self.espera)
+        except BaseException:
+            # Petición cancelada mientras esperaba
+            if turno.done():
+                self.salir(None)
+            else:
+                turno.cancel()
+                self._cola.remove(turno)
+            raise
+
+        if not turno.done():
+            turno.cancel()
+            self._cola.remove(turno)
+            return self._rechazar("plazo")
+        # `salir` le ha cedido su plaza: en_curso ya la cuenta
+        self.admitidas += 1
+        adm_espera.observe(self.nombre, valor=time.perf_counter() - inicio)
+        return None
+
+    def salir(self, duracion: float):
+        if duracion is not None:
+            self.duracion_media = 0.9 * self.duracion_media + 0.1 * duracion
+        while self._cola:
+            turno = self._cola.popleft()
+            if not turno.done():
+                turno.set_result(None)
+                return
+        self.en_curso -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limite": self.concurrencia,
+            "en_curso": self.en_curso,
+            "en_cola": len(self._cola),
+            "max_cola": self.max_cola,
+            "admitidas": self.admitidas,
+            "rechazadas": self.rechazadas,
+            "duracion_media_ms": round(self.duracion_media * 1000, 3),
+        }
+
+
+limitadores = {
+    "lectura": Limitador(
+        "lectura", config.ADMISION_LECTURAS, config.ADMISION_COLA,
+        config.ADMISION_ESPERA_MS / 1000
+    ),
+    "escritura": Limitador(
+        "escritura", config.ADMISION_ESCRITURAS, config.ADMISION_COLA,
+        config.ADMISION_ESPERA_MS / 1000
+    ),
+}
+
+
+def clase_de(metodo: str, ruta: str) -> str:
+    """"lectura", "escritura" o None si la ruta no pasa por el control."""
+    if not ruta.startswith(PREFIJO) or ruta.startswith(EXCLUIDAS):
+        return None
+    if metodo in ("GET", "HEAD") or ruta.rstrip("/") in LECTURAS_POST:
+        return "lectura"
+    if metodo == "OPTIONS":
+        return None
+    return "escritura"
+
+
+def stats() -> dict:
+    return {nombre: limitador.stats() for nombre, limitador in limitadores.items()}
+
+
+@registro.colector
+def _metricas_admision() -> list:
+    return (
+        lineas(
+            "admission_in_flight", "Peticiones admitidas en curso", "gauge", ("clase",),
+            [((nombre,), l.en_curso) for nombre, l in limitadores.items()]
+        )
+        + lineas(
+            "admission_queue_depth", "Peticiones esperando turno", "gauge", ("clase",),
+            [((nombre,), len(l._cola)) for nombre, l in limitadores.items()]
+        )
+    )
+
+
+def _sin_credenciales(scope) -> bool:
+    """
+    Con autenticación activa, petición sin cabecera Authorization: la ruta
+    la rechaza con 401 antes de tocar MySQL, así que no ocupa plaza ni cola.
+    Las que traen un token inválido sí pasan por el control (su rechazo
+    tampoco consulta MySQL y dura microsegundos).
+    """
+    return config.AUTH_ENABLED and not any(
+        nombre == b"authorization" for nombre, _ in scope["headers"]
+    )
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI: aplica el limitador de la clase de cada petición."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        clase = clase_de(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        limitador = limitadores.get(clase)
+        if limitador is None or not limitador.activo or _sin_credenciales(scope):
+            await self.app(scope, receive, send)
+            return
+
+        motivo = await limitador.entrar()
+        if motivo is not None:
+            await _servicio_no_disponible(send, limitador)
+            return
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limitador.salir(time.perf_counter() - inicio)
+
+
+async def _servicio_no_disponible(send, limitador: Limitador):
+    reintento = max(1, math.ceil(limitador.espera_estimada()))
+    cuerpo = json.dumps(
+        {"detail": "Servidor saturado, vuelve a intentarlo en unos segundos"},
+        ensure_ascii=False
+    ).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(cuerpo)).encode("latin-1")),
+            (b"retry-after", str(reintento).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
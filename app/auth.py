@@ -0,0 +1,285 @@
+# app/auth.py
+#
+# Autenticación con token y roles (tablas usuarios y roles de docs/init_db.sql).
+#
+# - POST /auth/token cambia usuario y contraseña por un token firmado con
+#   HMAC-SHA256 (id del usuario y caducidad). La contraseña se comprueba con
+#   PBKDF2, que cuesta a propósito centenares de ms de CPU: se calcula en un
+#   pool de hilos propio, nunca en el event loop ni en el threadpool de las
+#   peticiones. hashlib suelta el GIL mientras calcula.
+# - Cada petición a /clientes verifica el token y busca el usuario y su rol.
+#   Las dos cosas se guardan en caché AUTH_CACHE_TTL segundos, así que en
+#   las lecturas frecuentes la autenticación no añade consultas a MySQL. Un
+#   usuario desactivado o con otro rol tarda como mucho ese TTL en notarse.
+# - Roles: `lector` solo lee (GET y POST /clientes/batch-get); `admin`
+#   además crea, modifica, elimina e importa.
+
+import argparse
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import getpass
+import hashlib
+import hmac
+import secrets
+import sys
+import time
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+
+from app import config, repository
+from app.admision import LECTURAS_POST
+from app.cache import TTLCache
+from app.metrics import Counter, registro
+from app.single_flight import lecturas
+
+ALGORITMO = "pbkdf2_sha256"
+
+ROLES_LECTURA = ("lector", "admin")
+ROLES_ESCRITURA = ("admin",)
+
+RUTA_EVENTOS = "/clientes/events"
+
+auth_logins = registro.registrar(Counter(
+    "auth_logins_total", "Intentos de login por resultado", ("resultado",)
+))
+auth_rechazos = registro.registrar(Counter(
+    "auth_rejected_total", "Peticiones rechazadas por autenticación o rol", ("motivo",)
+))
+
+# Sin autenticación los tokens no protegen nada y basta una clave aleatoria
+_secreto = config.AUTH_SECRET.encode("utf-8") if config.AUTH_SECRET else secrets.token_bytes(32)
+
+
+def comprobar_config():
+    """
+    Con la autenticación activa, AUTH_SECRET es obligatoria: una clave
+    aleatoria por proceso haría que cada worker o servidor rechazara los
+    tokens de los demás, y todos caducarían al reiniciar.
+    """
+    if config.AUTH_ENABLED and not config.AUTH_SECRET:
+        raise RuntimeError(
+            "AUTH_SECRET no está definida. Defínela (la misma en todos los "
+            "servidores) o desactiva la autenticación con AUTH_ENABLED=false"
+        )
+
+
+# token -> (usuario_id, expira)
+tokens_cache = TTLCache(maxsize=config.AUTH_CACHE_MAXSIZE, ttl=config.AUTH_CACHE_TTL)
+# usuario_id -> usuario (sin el hash de la contraseña)
+usuarios_cache = TTLCache(maxsize=config.AUTH_CACHE_MAXSIZE, ttl=config.AUTH_CACHE_TTL)
+
+_hashes = ThreadPoolExecutor(max_workers=config.AUTH_HASH_WORKERS, thread_name_prefix="auth")
+
+# auto_error=False: el 401 lo da `usuario_actual`, que en GET /clientes/events
+# también acepta el token en la query string
+esquema = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+
+# =========================
+# Contraseñas
+# =========================
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode("ascii")
+
+
+def _de_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def hash_password(password: str, iteraciones: int = None) -> str:
+    """'pbkdf2_sha256$<iteraciones>$<sal>$<hash>', para la columna password_hash."""
+    iteraciones = iteraciones or config.AUTH_PBKDF2_ITERACIONES
+    sal = secrets.token_bytes(16)
+    clave = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), sal, iteraciones)
+    return f"{ALGORITMO}${iteraciones}${_b64(sal)}${_b64(clave)}"
+
+
+def comprobar_password(password: str, codificado: str) -> bool:
+    try:
+        algoritmo, iteraciones, sal, esperado = codificado.split("$")
+        iteraciones = int(iteraciones)
+        sal, esperado = _de_b64(sal), _de_b64(esperado)
+    except ValueError:
+        return False
+    if algoritmo != ALGORITMO:
+        return False
+    clave = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), sal, iteraciones)
+    return hmac.compare_digest(clave, esperado)
+
+
+@lru_cache(maxsize=1)
+def _hash_ficticio() -> str:
+    return hash_password(secrets.token_urlsafe(16))
+
+
+def _comprobar_login(password: str, codificado: str) -> bool:
+    # Con un usuario que no existe se calcula igualmente un hash: la
+    # respuesta tarda lo mismo y no revela qué usuarios existen
+    if codificado is None:
+        comprobar_password(password, _hash_ficticio())
+        return False
+    return comprobar_password(password, codificado)
+
+
+# =========================
+# Tokens
+# =========================
+def _firma(cuerpo: str) -> str:
+    return _b64(hmac.new(_secreto, cuerpo.encode("ascii"), hashlib.sha256).digest())
+
+
+def emitir_token(usuario_id: int) -> tuple:
+    """`(token, expira)`: el token es '<usuario_id>.<expira>.<firma>'."""
+    expira = int(time.time()) + config.AUTH_TOKEN_TTL
+    cuerpo = f"{usuario_id}.{expira}"
+    return f"{cuerpo}.{_firma(cuerpo)}", expira
+
+
+def verificar_token(token: str) -> int:
+    """Id del usuario del token, o None si no es válido o ha caducado."""
+    datos = tokens_cache.get(token)
+    if datos is None:
+        cuerpo, _, firma = token.rpartition(".")
+        usuario_id, _, expira = cuerpo.partition(".")
+        # isdigit() acepta dígitos Unicode ('١', '²') que no caben en ascii
+        if not (cuerpo.isascii() and usuario_id.isdigit() and expira.isdigit()):
+            return None
+        if not hmac.compare_digest(firma.encode("utf-8"), _firma(cuerpo).encode("ascii")):
+            return None
+        datos = (int(usuario_id), int(expira))
+        tokens_cache.set(token, datos)
+
+    usuario_id, expira = datos
+    if expira <= time.time():
+        return None
+    return usuario_id
+
+
+# =========================
+# Usuarios
+# =========================
+def _publico(usuario: dict) -> dict:
+    return {
+        "id": usuario["id"],
+        "username": usuario["username"],
+        "email": usuario["email"],
+        "rol": usuario["rol"],
+        "activo": bool(usuario["activo"]),
+    }
+
+
+async def _usuario(usuario_id: int) -> dict:
+    usuario = usuarios_cache.get(usuario_id)
+    if usuario is None:
+        # Al caducar la entrada de un usuario muy activo, sus peticiones
+        # simultáneas comparten una sola consulta
+        fila = await lecturas.hacer(
+            "get_usuario_by_id", usuario_id, lambda: repository.get_usuario_by_id(usuario_id)
+        )
+        if fila is None:
+            return None
+        usuario = _publico(fila)
+        usuarios_cache.set(usuario_id, usuario)
+    return usuario
+
+
+async def login(username: str, password: str) -> tuple:
+    """`(token, expira, usuario)`, o None si las credenciales no valen."""
+    fila = await repository.get_usuario_by_username(username)
+    valida = await asyncio.get_running_loop().run_in_executor(
+        _hashes, _comprobar_login, password, fila["password_hash"] if fila else None
+    )
+    if not valida or not fila["activo"]:
+        auth_logins.inc("fallido")
+        return None
+
+    auth_logins.inc("ok")
+    usuario = _publico(fila)
+    usuarios_cache.set(usuario["id"], usuario)
+    token, expira = emitir_token(usuario["id"])
+    return token, expira, usuario
+
+
+# =========================
+# Dependencias de FastAPI
+# =========================
+def _rechazar(motivo: str, status_code: int, detail: str):
+    auth_rechazos.inc(motivo)
+    headers = {"WWW-Authenticate": "Bearer"} if status_code == 401 else None
+    raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+
+
+async def usuario_actual(request: Request, token: str = Depends(esquema)) -> dict:
+    # EventSource no permite enviar cabeceras: solo en GET /clientes/events
+    # el token puede ir en ?access_token=. En el resto de rutas acabaría en
+    # logs de acceso e historiales, así que solo vale la cabecera
+    if not token and request.url.path.rstrip("/") == RUTA_EVENTOS:
+        token = request.query_params.get("access_token")
+    if not token:
+        _rechazar("sin_token", status.HTTP_401_UNAUTHORIZED, "No autenticado")
+
+    usuario_id = verificar_token(token)
+    if usuario_id is None:
+        _rechazar("token_invalido", status.HTTP_401_UNAUTHORIZED, "Token inválido o caducado")
+
+    usuario = await _usuario(usuario_id)
+    if usuario is None or not usuario["activo"]:
+        _rechazar("usuario", status.HTTP_401_UNAUTHORIZED, "Usuario inexistente o desactivado")
+    return usuario
+
+
+async def _autorizar(request: Request, usuario: dict = Depends(usuario_actual)) -> dict:
+    if request.method in ("GET", "HEAD") or request.url.path.rstrip("/") in LECTURAS_POST:
+        roles = ROLES_LECTURA
+    else:
+        roles = ROLES_ESCRITURA
+    if usuario["rol"] not in roles:
+        _rechazar("rol", status.HTTP_403_FORBIDDEN, "Tu rol no permite esta operación")
+    return usuario
+
+
+async def _sin_autenticacion():
+    return None
+
+
+# Dependencia de las rutas de /clientes (AUTH_ENABLED=false la desactiva)
+autorizar = _autorizar if config.AUTH_ENABLED else _sin_autenticacion
+
+
+def stats() -> dict:
+    return {
+        "activa": config.AUTH_ENABLED,
+        "tokens": tokens_cache.stats(),
+        "usuarios": usuarios_cache.stats(),
+    }
+
+
+# =========================
+# Alta de usuarios desde la línea de comandos
+# =========================
+#   python -m app.auth admin admin@example.com --rol admin
+def main():
+    from app import database
+
+    parser = argparse.ArgumentParser(description="Crear un usuario de la API")
+    parser.add_argument("username")
+    parser.add_argument("email")
+    parser.add_argument("--rol", default="lector", choices=ROLES_LECTURA)
+    args = parser.parse_args()
+
+    password = getpass.getpass("Contraseña: ")
+    if not password or password != getpass.getpass("Repite la contraseña: "):
+        sys.exit("Las contraseñas no coinciden")
+
+    usuario_id = database.create_usuario(args.username, args.email, hash_password(password), args.rol)
+    database.close_pool()
+    if usuario_id is None:
+        sys.exit(f"El rol '{args.rol}' no existe en la tabla roles")
+    print(f"Usuario {args.username} creado con id {usuario_id} (rol {args.rol})")
+
+
+if __name__ == "__main__":
+    main()
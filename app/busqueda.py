@@ -0,0 +1,194 @@
+# app/busqueda.py
+#
+# Búsqueda "typeahead" de GET /clientes/search.
+#
+# MySQL solo trae candidatos, siempre por índice y con LIMIT:
+#   - prefijo del campo (LIKE 'texto%') sobre los índices de nombre,
+#     apellido y email: recorrido por rango que se corta en el LIMIT;
+#   - FULLTEXT (nombre, apellido, email) en modo booleano con 'palabra*'
+#     para palabras que no están al principio del campo ("García López",
+#     "juan.perez@...") y para búsquedas de varias palabras.
+# La collation de la tabla (utf8mb4_general_ci) ya ignora mayúsculas y
+# acentos. El orden final se calcula aquí, con la misma normalización.
+
+import re
+import unicodedata
+
+from app.paginacion import escape_like
+from app.queries import COLUMNAS_CLIENTE
+
+CAMPOS_BUSQUEDA = ("nombre", "apellido", "email")
+
+# Un acierto en el email pesa menos que en nombre o apellido
+PESOS = {"nombre": 1.0, "apellido": 1.0, "email": 0.6}
+
+# Candidatos que se piden a cada subconsulta por cada resultado final
+CANDIDATOS_POR_RESULTADO = 2
+
+# innodb_ft_min_token_size (3 por defecto): palabras más cortas no están
+# en el índice FULLTEXT
+MIN_PALABRA_FULLTEXT = 3
+
+_RE_PALABRAS = re.compile(r"[^\w]+")
+
+_MATCH = f"MATCH({', '.join(CAMPOS_BUSQUEDA)}) AGAINST (%s IN BOOLEAN MODE)"
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin acentos: 'Pérez' -> 'perez'."""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def _palabras(texto: str) -> list:
+    return [p for p in _RE_PALABRAS.split(texto) if p]
+
+
+def tokens(q: str) -> list:
+    """Términos de la búsqueda, normalizados."""
+    return normalizar(q).split()
+
+
+# =========================
+# Consulta de candidatos
+# =========================
+def _expresion_fulltext(terminos: list) -> str:
+    """'juan pér' -> '+juan* +pér*' (solo palabras que están en el índice)."""
+    palabras = [
+        p for termino in terminos for p in _palabras(termino)
+        if len(p) >= MIN_PALABRA_FULLTEXT
+    ]
+    return " ".join(f"+{p}*" for p in palabras)
+
+
+def _condicion_termino(termino: str) -> tuple:
+    """
+    (sql, params) que exige `termino` en la fila: como prefijo del nombre,
+    del apellido o de alguna de sus palabras, o en cualquier parte del
+    email. Deja pasar todo lo que acepta `puntuar` (y algo más, que se
+    descarta al ordenar), así el LIMIT no se gasta en filas imposibles.
+    """
+    escapado = escape_like(termino)
+    partes = []
+    params = []
+    for campo in ("nombre", "apellido"):
+        partes.append(f"{campo} LIKE %s OR {campo} LIKE %s")
+        params.extend([escapado + "%", "% " + escapado + "%"])
+    partes.append("email LIKE %s")
+    params.append("%" + escapado + "%")
+    return "(" + " OR ".join(partes) + ")", params
+
+
+def _condiciones(terminos: list) -> tuple:
+    """AND de `_condicion_termino` para cada término ('' si no hay)."""
+    sql = ""
+    params = []
+    for termino in terminos:
+        condicion, valores = _condicion_termino(termino)
+        sql += f" AND {condicion}"
+        params.extend(valores)
+    return sql, params
+
+
+def build_search_query(q: str, limit: int) -> tuple:
+    """
+    Devuelve (sql, params) con los candidatos para `q`: un UNION ALL de
+    subconsultas, cada una resuelta por un índice y limitada. Puede haber
+    filas repetidas; `rank_resultados` las une y ordena.
+    """
+    terminos = tokens(q)
+    if not terminos:
+        raise ValueError("La búsqueda está vacía")
+
+    candidatos = limit * CANDIDATOS_POR_RESULTADO
+    subconsultas = []
+    params = []
+
+    # Prefijo del campo con el término más largo (el más selectivo), que
+    # recorre el índice; el resto de términos se exigen como filtro. Sin
+    # ellos, en "juan pe" las primeras filas "juan..." ocuparían el LIMIT
+    # aunque ninguna tuviera "pe" y "Juan Pérez" se quedaría fuera.
+    mas_largo = max(terminos, key=len)
+    resto = list(terminos)
+    resto.remove(mas_largo)
+    filtro, filtro_params = _condiciones(resto)
+
+    prefijo = escape_like(mas_largo) + "%"
+    for campo in CAMPOS_BUSQUEDA:
+        subconsultas.append(
+            f"(SELECT {COLUMNAS_CLIENTE} FROM clientes WHERE {campo} LIKE %s{filtro} "
+            f"ORDER BY {campo}, id LIMIT %s)"
+        )
+        params.extend([prefijo, *filtro_params, candidatos])
+
+    expresion = _expresion_fulltext(terminos)
+    if expresion:
+        # Las palabras cortas no están en el índice FULLTEXT: se exigen aparte
+        cortos = [
+            t for t in terminos
+            if any(len(p) < MIN_PALABRA_FULLTEXT for p in _palabras(t)) or not _palabras(t)
+        ]
+        filtro, filtro_params = _condiciones(cortos)
+        subconsultas.append(
+            f"(SELECT {COLUMNAS_CLIENTE} FROM clientes WHERE {_MATCH}{filtro} "
+            f"ORDER BY {_MATCH} DESC LIMIT %s)"
+        )
+        params.extend([expresion, *filtro_params, expresion, candidatos])
+
+    return " UNION ALL ".join(subconsultas), tuple(params)
+
+
+# =========================
+# Ordenación
+# =========================
+def _puntos(termino: str, valor: str) -> int:
+    if valor == termino:
+        return 4
+    if valor.startswith(termino):
+        return 3
+    if any(p.startswith(termino) for p in _palabras(valor)):
+        return 2
+    return 0
+
+
+def puntuar(fila: dict, terminos: list) -> float:
+    """
+    Puntuación de una fila; 0 si algún término no aparece como prefijo del
+    campo o de alguna de sus palabras.
+    """
+    valores = {
+        campo: normalizar(fila.get(campo) or "") for campo in CAMPOS_BUSQUEDA
+    }
+
+    total = 0.0
+    for termino in terminos:
+        mejor = max(
+            _puntos(termino, valor) * PESOS[campo]
+            for campo, valor in valores.items()
+        )
+        if not mejor:
+            return 0.0
+        total += mejor
+    return total
+
+
+def rank_resultados(filas: list, q: str, limit: int) -> list:
+    """Quita duplicados, descarta lo que no encaja y ordena por relevancia."""
+    terminos = tokens(q)
+    unicas = {fila["id"]: fila for fila in filas}
+
+    puntuadas = []
+    for fila in unicas.values():
+        puntos = puntuar(fila, terminos)
+        if puntos:
+            puntuadas.append((puntos, fila))
+
+    puntuadas.sort(
+        key=lambda par: (
+            -par[0],
+            normalizar(par[1]["apellido"]),
+            normalizar(par[1]["nombre"]),
+            par[1]["id"]
+        )
+    )
+    return [fila for _, fila in puntuadas[:limit]]
@@ -0,0 +1,228 @@
+# app/cache.py
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app import config
+
+
+class TTLCache:
+    """
+    Caché en memoria con expulsión LRU y caducidad por TTL.
+
+    Es thread-safe porque se usa tanto desde el event loop como desde
+    hilos (capa síncrona, altas masivas).
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        # Se incrementa con cada invalidación: permite descartar lecturas
+        # de la BD que empezaron antes de una escritura (ver `set`)
+        self._generacion = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._expirados = 0
+        self._expulsados = 0
+        self._invalidaciones = 0
+
+    @property
+    def activa(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def generacion(self) -> int:
+        return self._generacion
+
+    def get(self, clave):
+        if not self.activa:
+            return None
+
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self._misses += 1
+                return None
+
+            valor, caduca = entrada
+            if caduca < time.monotonic():
+                del self._datos[clave]
+                self._expirados += 1
+                self._misses += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self._hits += 1
+            return valor
+
+    def set(self, clave, valor, generacion: int = None):
+        """
+        Guarda `valor`. Si se pasa la `generacion` leída antes de ir a la BD
+        y desde entonces hubo alguna invalidación, no se guarda: el valor
+        podría ser anterior a esa escritura.
+        """
+        if not self.activa:
+            return
+
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return
+
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+                self._expulsados += 1
+
+    def invalidate(self, clave):
+        with self._lock:
+            self._generacion += 1
+            self._invalidaciones += 1
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            consultas = self._hits + self._misses
+            return {
+                "activa": self.activa,
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "entradas": len(self._datos),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / consultas, 4) if consultas else 0.0,
+                "expirados": self._expirados,
+                "expulsados": self._expulsados,
+                "invalidaciones": self._invalidaciones,
+            }
+
+
+# Caché de GET /clientes/{id}: clave = id, valor = (cliente, etag)
+clientes_cache = TTLCache(
+    maxsize=config.CACHE_CLIENTES_MAXSIZE,
+    ttl=config.CACHE_CLIENTES_TTL
+)
+
+
+class VersionColeccion:
+    """
+    Versión de una colección (el listado de clientes) para su ETag.
+
+    Se calcula con el estado de la tabla en MySQL (ver
+    queries.SELECT_ESTADO_CLIENTES), así que todos los workers y servidores
+    dan el mismo ETag para los mismos datos y el If-None-Match vale en
+    cualquiera de ellos. Cada proceso reutiliza el estado leído `ventana`
+    segundos: una escritura hecha en este proceso lo descarta al momento; la
+    de otro se nota, como mucho, al cabo de la ventana.
+    """
+
+    def __init__(self, ventana: float = 5.0):
+        self.ventana = ventana
+        self._estado = None
+        self._caduca = 0.0
+        # Igual que en TTLCache: descarta estados leídos antes de una escritura
+        self._generacion = 0
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._tras_fork)
+
+    def _tras_fork(self):
+        # Con `preload_app` los workers heredan el objeto del proceso maestro
+        self._lock = threading.Lock()
+
+    @property
+    def activa(self) -> bool:
+        return self.ventana > 0
+
+    def generacion(self) -> int:
+        return self._generacion
+
+    def invalidar(self):
+        with self._lock:
+            self._generacion += 1
+            self._estado = None
+
+    def vigente(self):
+        """Estado leído hace menos de `ventana` segundos, o None."""
+        with self._lock:
+            if self._estado is not None and time.monotonic() < self._caduca:
+                return self._estado
+            return None
+
+    def guardar(self, estado: tuple, generacion: int):
+        """Guarda `estado` salvo que haya habido escrituras desde `generacion`."""
+        with self._lock:
+            if generacion == self._generacion:
+                self._estado = estado
+                self._caduca = time.monotonic() + self.ventana
+
+    @staticmethod
+    def etag(estado: tuple, *partes) -> str:
+        """ETag débil para un estado de la tabla y una vista concreta (`partes`)."""
+        crudo = f"{estado!r}:{partes!r}"
+        return 'W/"' + hashlib.sha1(crudo.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+# Versión del listado de clientes: la invalidan todas las escrituras
+version_clientes = VersionColeccion(ventana=config.LISTADO_ETAG_VENTANA)
+
+
+# =========================
+# ETags
+# =========================
+def etag_de_version(version: int) -> str:
+    return f'"v{version}"'
+
+
+def calcular_etag(datos) -> str:
+    """
+    ETag de un cliente. Si la fila tiene `version` (cambia en cada escritura)
+    se usa como ETag fuerte, válido también para If-Match. Si no, ETag débil
+    a partir del contenido.
+    """
+    if isinstance(datos, dict) and datos.get("version") is not None:
+        return etag_de_version(datos["version"])
+
+    crudo = json.dumps(datos, sort_keys=True, default=str, ensure_ascii=False)
+    return 'W/"' + hashlib.sha1(crudo.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def version_de_if_match(if_match: str):
+    """
+    Versión esperada según la cabecera If-Match: int, o None para '*'
+    (cualquier versión). ValueError si no es un ETag de versión válido.
+    """
+    valor = if_match.strip()
+    if valor == "*":
+        return None
+    if valor.startswith("W/"):
+        valor = valor[2:]
+    if not (valor.startswith('"v') and valor.endswith('"')):
+        raise ValueError(f"ETag no válido: {if_match}")
+    return int(valor[2:-1])
+
+
+def etag_coincide(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (admite lista y '*')."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def _opaco(valor: str) -> str:
+        valor = valor.strip()
+        return valor[2:] if valor.startswith("W/") else valor
+
+    return _opaco(etag) in {_opaco(v) for v in if_none_match.split(",")}
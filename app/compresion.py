@@ -0,0 +1,97 @@
+# app/compresion.py
+#
+# Compresión de respuestas negociada con Accept-Encoding: brotli si el
+# cliente lo acepta y el paquete `brotli` está instalado (es opcional),
+# gzip si no. Las respuestas pequeñas se envían tal cual.
+#
+# Reutiliza los "responders" de GZipMiddleware de Starlette, que ya
+# resuelven cabeceras (Vary, Content-Length), streaming y tipos excluidos
+# (text/event-stream); aquí solo se elige el algoritmo.
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError:  # opcional: pip install brotli
+    brotli = None
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = 4):
+        super().__init__(app, minimum_size)
+        self.compresor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            return self.compresor.process(body) + self.compresor.flush()
+        return self.compresor.process(body) + self.compresor.finish()
+
+
+def parse_accept_encoding(valor: str) -> dict:
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    pesos = {}
+    for parte in valor.split(","):
+        codificacion, _, parametros = parte.strip().partition(";")
+        codificacion = codificacion.strip().lower()
+        if not codificacion:
+            continue
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        pesos[codificacion] = q
+    return pesos
+
+
+def elegir_codificacion(accept_encoding: str, disponibles: tuple) -> str:
+    """
+    Codificación preferida por el cliente entre las `disponibles` (en orden
+    de preferencia del servidor si empatan), o "identity".
+    """
+    pesos = parse_accept_encoding(accept_encoding)
+    comodin = pesos.get("*", 0.0)
+
+    mejor, mejor_q = "identity", 0.0
+    for codificacion in disponibles:
+        q = pesos.get(codificacion, comodin)
+        if q > mejor_q:
+            mejor, mejor_q = codificacion, q
+    return mejor
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.disponibles = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        codificacion = elegir_codificacion(accept_encoding, self.disponibles)
+
+        if codificacion == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif codificacion == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        await responder(scope, receive, send)
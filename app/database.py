@@ -1,130 +1,542 @@
 # app/database.py
 
+from contextlib import ExitStack, contextmanager
+from functools import partial
 import mysql.connector
 from mysql.connector import Error
-from dotenv import load_dotenv
-import os
+import logging
+import threading
 
-load_dotenv()
+from app import config
+from app.pool import ERRORES_DE_CONEXION, ConnectionPool, PoolTimeout
+from app.replicas import Replica, ReplicaSet, leer_de_primario
+from app.paginacion import build_page_query, split_page
+from app.busqueda import build_search_query, rank_resultados
+from app import queries
+from app.metrics import medir_conexion, medir_consulta
+from app.group_commit import aborta_lote
 
-def get_connection():
+logger = logging.getLogger(__name__)
+
+# Etiqueta de las métricas de esta capa
+CAPA = "sync"
+
+_pool = None
+_replicas = None
+_pool_lock = threading.Lock()
+
+
+def _connect(opciones: dict = None):
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-        )
-        return connection
+        with medir_conexion(CAPA):
+            return mysql.connector.connect(**(opciones or config.connect_options()))
     except Error as e:
-        print(f"Error al conectar a MySQL: {e}")
-        return None
+        logger.error("Error al conectar a MySQL: %s", e)
+        raise
+
+
+def get_pool() -> ConnectionPool:
+    # El pool se crea la primera vez que se usa (y no al importar el módulo)
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect, nombre="primary", **config.pool_options()
+                )
+    return _pool
+
+
+def get_replicas() -> ReplicaSet:
+    """Réplicas de DB_REPLICAS, cada una con su pool (None si no hay)."""
+    global _replicas
+    if _replicas is None and config.DB_REPLICAS:
+        with _pool_lock:
+            if _replicas is None:
+                replicas = []
+                for n, replica in enumerate(config.DB_REPLICAS, start=1):
+                    opciones = config.replica_options(replica)
+                    nombre = f"replica-{n}"
+                    pool = ConnectionPool(
+                        partial(_connect, opciones), nombre=nombre, **config.pool_options()
+                    )
+                    replicas.append(Replica(nombre, opciones, pool))
+                _replicas = ReplicaSet(replicas, config.DB_REPLICA_EJECT_SECONDS)
+    return _replicas
+
+
+def get_connection(lectura: bool = False):
+    """
+    Presta una conexión del pool. Se usa como context manager y la conexión
+    vuelve al pool automáticamente al salir del bloque `with`:
+
+        with get_connection() as conn:
+            ...
+
+    Con `lectura=True` la conexión es de una réplica, salvo que no haya
+    réplicas o que el cliente acabe de escribir (read-your-writes).
+    """
+    replicas = get_replicas() if lectura else None
+    if replicas is None or leer_de_primario():
+        return get_pool().connection()
+    return _conexion_replica(replicas)
+
+
+@contextmanager
+def _conexion_replica(replicas: ReplicaSet):
+    with ExitStack() as pila:
+        conn = elegida = None
+        for replica in replicas.candidatas():
+            try:
+                conn = pila.enter_context(replica.pool.connection())
+            except (Error, PoolTimeout) as e:
+                replicas.expulsar(replica, e)
+                continue
+            elegida = replica
+            break
+
+        if conn is None:
+            replicas.sin_replica()
+            conn = pila.enter_context(get_pool().connection())
+
+        try:
+            yield conn
+        except ERRORES_DE_CONEXION as e:
+            if elegida is not None:
+                replicas.expulsar(elegida, e)
+            raise
+
+
+def calentar_pool(n: int) -> int:
+    """
+    Abre `n` conexiones en el pool principal y en el de cada réplica antes
+    de la primera petición: se piden a la vez y, al devolverlas, el pool las
+    conserva (hasta DB_POOL_SIZE). Devuelve las abiertas en el principal.
+    """
+    with ExitStack() as pila:
+        for _ in range(n):
+            pila.enter_context(get_pool().connection())
+
+    replicas = get_replicas()
+    for replica in (replicas.replicas if replicas else ()):
+        try:
+            with ExitStack() as pila:
+                for _ in range(n):
+                    pila.enter_context(replica.pool.connection())
+        except (Error, PoolTimeout) as e:
+            replicas.expulsar(replica, e)
+
+    return get_pool().stats()["abiertas"]
+
+
+def ping():
+    """SELECT 1 en una conexión del pool principal (GET /health/ready)."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+def replicas_stats() -> dict:
+    replicas = get_replicas()
+    return replicas.stats() if replicas else None
+
+
+def close_pool():
+    global _pool, _replicas
+    with _pool_lock:
+        if _pool is not None:
+            _pool.dispose()
+            _pool = None
+        if _replicas is not None:
+            for replica in _replicas.replicas:
+                replica.pool.dispose()
+            _replicas = None
+
+
+def iter_clientes(chunk_size: int = 1000):
+    """
+    Recorre toda la tabla en lotes de `chunk_size` filas (tuplas).
+
+    Usa un cursor sin buffer: MySQL envía las filas a medida que se leen,
+    de modo que la memoria no depende del tamaño de la tabla. La conexión
+    queda prestada hasta que el generador termina o se cierra.
+    """
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor(buffered=False)
+        # Solo se mide el execute: la lectura dura lo que tarde el cliente
+        with medir_consulta(CAPA, "iter_clientes", queries.SELECT_EXPORT):
+            cursor.execute(queries.SELECT_EXPORT)
+
+        while True:
+            filas = cursor.fetchmany(chunk_size)
+            if not filas:
+                break
+            yield filas
+
+        cursor.close()
 
 
 def get_all_clientes():
-    conn = get_connection()
-    if not conn:
-        raise Exception("No se pudo conectar a la base de datos")
-    
-    cursor = conn.cursor(dictionary=True)
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT * FROM clientes")
-    resultados = cursor.fetchall()
+        with medir_consulta(CAPA, "get_all_clientes", queries.SELECT_ALL) as m:
+            cursor.execute(queries.SELECT_ALL)
+            resultados = cursor.fetchall()
+            m.filas = len(resultados)
 
-    cursor.close()
-    conn.close()
+        cursor.close()
     return resultados
 
 
+def get_estado_clientes() -> tuple:
+    """`(filas, id máximo, suma de versiones)` de la tabla clientes."""
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor()
+
+        with medir_consulta(CAPA, "get_estado_clientes", queries.SELECT_ESTADO_CLIENTES):
+            cursor.execute(queries.SELECT_ESTADO_CLIENTES)
+            fila = cursor.fetchone()
+
+        cursor.close()
+    # SUM devuelve DECIMAL: enteros, para que el ETag no dependa del conector
+    return tuple(int(valor) for valor in fila)
+
+
+def get_clientes_page(
+    limit: int,
+    sort: str = "id",
+    cursor: dict = None,
+    filtros: dict = None
+):
+    """Una página del listado (paginación keyset) y el cursor de la siguiente."""
+    query, values = build_page_query(limit, sort, cursor, filtros)
+
+    with get_connection(lectura=True) as conn:
+        cursor_db = conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_clientes_page", query) as m:
+            cursor_db.execute(query, values)
+            filas = cursor_db.fetchall()
+            m.filas = len(filas)
+
+        cursor_db.close()
+    return split_page(filas, limit, sort)
+
+
+def search_clientes(q: str, limit: int = 10):
+    """Clientes que encajan con `q`, ordenados por relevancia."""
+    query, values = build_search_query(q, limit)
+
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "search_clientes", query) as m:
+            cursor.execute(query, values)
+            candidatos = cursor.fetchall()
+            m.filas = len(candidatos)
+
+        cursor.close()
+    return rank_resultados(candidatos, q, limit)
+
+
 def get_cliente_by_id(cliente_id: int):
-    conn = get_connection()
-    if not conn:
-        raise Exception("No se pudo conectar a la base de datos")
-    
-    cursor = conn.cursor(dictionary=True)
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT * FROM clientes WHERE id = %s", (cliente_id,))
-    resultado = cursor.fetchone()
+        with medir_consulta(CAPA, "get_cliente_by_id", queries.SELECT_BY_ID) as m:
+            cursor.execute(queries.SELECT_BY_ID, (cliente_id,))
+            resultado = cursor.fetchone()
+            m.filas = 1 if resultado else 0
 
-    cursor.close()
-    conn.close()
+        cursor.close()
     return resultado
 
 
+def get_clientes_by_ids(ids: list, chunk_size: int = None) -> dict:
+    """
+    `{id: fila}` de los ids que existen, con un `IN (...)` por cada lote de
+    `chunk_size` ids y todos en la misma conexión.
+    """
+    chunk_size = chunk_size or config.DB_BATCH_GET_CHUNK_SIZE
+    encontrados = {}
+
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        for inicio in range(0, len(ids), chunk_size):
+            query, values = queries.select_by_ids(ids[inicio:inicio + chunk_size])
+            with medir_consulta(CAPA, "get_clientes_by_ids", query) as m:
+                cursor.execute(query, values)
+                filas = cursor.fetchall()
+                m.filas = len(filas)
+            for fila in filas:
+                encontrados[fila["id"]] = fila
+
+        cursor.close()
+    return encontrados
+
+
 def create_cliente(data: dict):
-    conn = get_connection()
-    if not conn:
-        raise Exception("No se pudo conectar a la base de datos")
-    
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        with medir_consulta(CAPA, "create_cliente", queries.INSERT_CLIENTE) as m:
+            cursor.execute(queries.INSERT_CLIENTE, queries.valores_insert(data))
+            conn.commit()
+            m.filas = cursor.rowcount
 
-    query = """
-        INSERT INTO clientes (nombre, apellido, email, telefono, direccion)
-        VALUES (%s, %s, %s, %s, %s)
+        new_id = cursor.lastrowid
+
+        cursor.close()
+    return new_id
+
+
+def _comprobar_version(cursor, cliente_id: int):
+    """Tras un UPDATE con versión que no afectó a nada: ¿no existe o conflicto?"""
+    cursor.execute(queries.SELECT_VERSION, (cliente_id,))
+    fila = cursor.fetchone()
+    if fila is not None:
+        raise queries.ConflictoDeVersion(fila[0])
+
+
+def update_cliente(cliente_id: int, data: dict, version: int = None):
     """
-    values = (
-        data["nombre"],
-        data["apellido"],
-        data["email"],
-        data.get("telefono"),
-        data.get("direccion")
-    )
+    Reemplaza los datos del cliente en una sola sentencia y devuelve la nueva
+    versión, o None si no existe. Con `version` solo actualiza si coincide
+    (si no, ConflictoDeVersion).
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(query, values)
-    conn.commit()
+        query, values = queries.build_update(cliente_id, data, version)
+        with medir_consulta(CAPA, "update_cliente", query) as m:
+            cursor.execute(query, values)
+            m.filas = cursor.rowcount
 
-    new_id = cursor.lastrowid
+        if cursor.rowcount > 0:
+            nueva_version = cursor.lastrowid
+            conn.commit()
+        else:
+            nueva_version = None
+            if version is not None:
+                _comprobar_version(cursor, cliente_id)
 
-    cursor.close()
-    conn.close()
-    return new_id
+        cursor.close()
 
+    return nueva_version
 
-def update_cliente(cliente_id: int, data: dict) -> bool:
-    conn = get_connection()
-    if not conn:
-        raise Exception("No se pudo conectar a la base de datos")
-    
-    cursor = conn.cursor()
 
-    query = """
-        UPDATE clientes
-        SET nombre=%s, apellido=%s, email=%s, telefono=%s, direccion=%s
-        WHERE id=%s
+def patch_cliente(cliente_id: int, campos: dict, version: int = None, releer: bool = True):
     """
+    Actualización parcial. Devuelve `(nueva_version, fila)` o `(None, None)`
+    si el cliente no existe. La fila completa solo se relee (en la misma
+    conexión) si `releer`; si no, es None y la construye quien llama.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        query, values = queries.build_patch(cliente_id, campos, version)
+        with medir_consulta(CAPA, "patch_cliente", query) as m:
+            cursor.execute(query, values)
+            m.filas = cursor.rowcount
+
+        if cursor.rowcount == 0:
+            if version is not None:
+                _comprobar_version(cursor, cliente_id)
+            cursor.close()
+            return None, None
+
+        nueva_version = cursor.lastrowid
+        conn.commit()
+        cursor.close()
 
-    values = (
-        data["nombre"],
-        data["apellido"],
-        data["email"],
-        data.get("telefono") if data.get("telefono") else None,
-        data.get("direccion") if data.get("direccion") else None,
-        cliente_id
-    )
+        fila = None
+        if releer:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(queries.SELECT_BY_ID, (cliente_id,))
+            fila = cursor.fetchone()
+            cursor.close()
 
+    return nueva_version, fila
+
+
+def _escritura_de_grupo(cursor, tipo: str, args: tuple):
+    if tipo == "create":
+        cursor.execute(queries.INSERT_CLIENTE, queries.valores_insert(*args))
+        return cursor.lastrowid
+
+    cliente_id, data, version = args
+    query, values = queries.build_update(cliente_id, data, version)
     cursor.execute(query, values)
-    conn.commit()
+    if cursor.rowcount > 0:
+        return cursor.lastrowid
+    if version is not None:
+        _comprobar_version(cursor, cliente_id)
+    return None
 
-    actualizado = cursor.rowcount > 0
 
-    cursor.close()
-    conn.close()
+def ejecutar_grupo(operaciones: list) -> list:
+    """
+    Group commit (app/group_commit.py): varias altas ("create", (data,)) y
+    reemplazos ("update", (cliente_id, data, version)) en una sola
+    transacción. Devuelve por operación lo que devolvería create_cliente o
+    update_cliente, o la excepción que lanzaría: un email duplicado (1062)
+    solo deshace su sentencia y el resto del lote sigue adelante.
+    """
+    resultados = []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        with medir_consulta(CAPA, "group_commit") as m:
+            for tipo, args in operaciones:
+                try:
+                    resultados.append(_escritura_de_grupo(cursor, tipo, args))
+                except (Error, queries.ConflictoDeVersion) as e:
+                    if aborta_lote(e):
+                        raise
+                    resultados.append(e)
+            conn.commit()
+            m.filas = len(operaciones)
 
-    return actualizado
+        cursor.close()
+    return resultados
 
 
 def delete_cliente(cliente_id: int):
-    conn = get_connection()
-    if not conn:
-        raise Exception("No se pudo conectar a la base de datos")
-    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        with medir_consulta(CAPA, "delete_cliente", queries.DELETE_CLIENTE) as m:
+            cursor.execute(queries.DELETE_CLIENTE, (cliente_id,))
+            conn.commit()
+            m.filas = cursor.rowcount
+
+        affected = cursor.rowcount
+
+        cursor.close()
+    return affected
+
+
+# =========================
+# Altas masivas
+# =========================
+def _ids_por_email(cursor, emails) -> dict:
+    """{email en minúsculas: (id, version)} de los emails que ya existen en la tabla."""
+    if not emails:
+        return {}
+
+    cursor.execute(*queries.select_ids_por_email(emails))
+    return {email.lower(): (id_, version) for id_, email, version in cursor.fetchall()}
+
+
+def _bulk_chunk(conn, lote: list, upsert: bool) -> dict:
+    """
+    Inserta (o actualiza) un lote de `(indice, data)` dentro de una única
+    transacción y devuelve `{indice: (estado, id)}`.
+    """
     cursor = conn.cursor()
 
-    cursor.execute("DELETE FROM clientes WHERE id=%s", (cliente_id,))
-    conn.commit()
+    existentes = _ids_por_email(cursor, {data["email"] for _, data in lote})
+    resultado, pendientes = queries.plan_bulk(lote, existentes, upsert)
+
+    if pendientes:
+        try:
+            cursor.execute(*queries.build_bulk_insert(pendientes, upsert))
+        except Error as e:
+            if e.errno != 1062:
+                raise
+            # Otra petición insertó alguno de estos emails entre la consulta
+            # de existentes y el INSERT. InnoDB solo deshace la sentencia
+            # fallida, así que se reintenta fila a fila en la misma transacción.
+            for indice, data in pendientes:
+                try:
+                    cursor.execute(queries.INSERT_CLIENTE, queries.valores_insert(data))
+                except Error as fila_error:
+                    if fila_error.errno != 1062:
+                        raise
+                    resultado[indice] = ("duplicado", None)
 
-    affected = cursor.rowcount
+        ids = _ids_por_email(cursor, {data["email"] for _, data in pendientes})
+        queries.asignar_ids(resultado, pendientes, ids, upsert)
 
+    conn.commit()
     cursor.close()
-    conn.close()
-    return affected
+    return resultado
+
+
+def bulk_create_clientes(filas: list, upsert: bool = False, chunk_size: int = None):
+    """
+    Alta masiva de `(indice, data)`: INSERT multi-fila, una transacción por
+    lote. Devuelve `{indice: (estado, id)}`; si un lote falla por otro motivo
+    sus filas quedan con estado "error" y se continúa con el siguiente.
+    """
+    chunk_size = chunk_size or config.DB_BULK_CHUNK_SIZE
+    resultado = {}
+
+    with get_connection() as conn:
+        for inicio in range(0, len(filas), chunk_size):
+            lote = filas[inicio:inicio + chunk_size]
+            try:
+                with medir_consulta(CAPA, "bulk_create_clientes") as m:
+                    resultado.update(_bulk_chunk(conn, lote, upsert))
+                    m.filas = len(lote)
+            except Error as e:
+                logger.error("Error en alta masiva (lote desde %s): %s", inicio, e)
+                conn.rollback()
+                for indice, _ in lote:
+                    resultado[indice] = ("error", None)
+
+    return resultado
+
+
+# =========================
+# Usuarios (autenticación)
+# =========================
+def get_usuario_by_id(usuario_id: int):
+    with get_connection(lectura=True) as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_usuario_by_id", queries.SELECT_USUARIO_BY_ID) as m:
+            cursor.execute(queries.SELECT_USUARIO_BY_ID, (usuario_id,))
+            resultado = cursor.fetchone()
+            m.filas = 1 if resultado else 0
+
+        cursor.close()
+    return resultado
+
+
+def get_usuario_by_username(username: str):
+    # Del primario: el login tiene que ver la contraseña recién cambiada
+    with get_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_usuario_by_username", queries.SELECT_USUARIO_BY_USERNAME) as m:
+            cursor.execute(queries.SELECT_USUARIO_BY_USERNAME, (username,))
+            resultado = cursor.fetchone()
+            m.filas = 1 if resultado else 0
+
+        cursor.close()
+    return resultado
+
+
+def create_usuario(username: str, email: str, password_hash: str, rol: str) -> int:
+    """Id del usuario creado, o None si el rol no existe."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        with medir_consulta(CAPA, "create_usuario", queries.INSERT_USUARIO) as m:
+            cursor.execute(queries.INSERT_USUARIO, (username, email, password_hash, rol))
+            conn.commit()
+            m.filas = cursor.rowcount
+
+        nuevo_id = cursor.lastrowid if cursor.rowcount else None
+
+        cursor.close()
+    return nuevo_id
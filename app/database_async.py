@@ -0,0 +1,471 @@
+# app/database_async.py
+#
+# Versión asyncio de app/database.py sobre mysql.connector.aio.
+# Mismas funciones y mismo SQL (app/queries.py), pero sin bloquear el
+# event loop: mientras MySQL responde, el worker atiende otras peticiones.
+
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
+import mysql.connector.aio
+from mysql.connector import Error
+import logging
+
+from app import config
+from app.pool import ERRORES_DE_CONEXION, AsyncConnectionPool, PoolTimeout
+from app.replicas import Replica, ReplicaSet, leer_de_primario
+from app.paginacion import build_page_query, split_page
+from app.busqueda import build_search_query, rank_resultados
+from app import queries
+from app.metrics import medir_conexion, medir_consulta
+from app.group_commit import aborta_lote
+
+logger = logging.getLogger(__name__)
+
+CAPA = "async"
+
+_pool = None
+_replicas = None
+
+
+async def _connect(opciones: dict = None):
+    try:
+        with medir_conexion(CAPA):
+            return await mysql.connector.aio.connect(**(opciones or config.connect_options()))
+    except (Error, OSError) as e:
+        # A diferencia del síncrono, el conector aio no envuelve los errores
+        # de red (conexión rechazada, host desconocido) en un Error
+        logger.error("Error al conectar a MySQL: %s", e)
+        raise
+
+
+def get_pool() -> AsyncConnectionPool:
+    # Sin lock: el event loop es de un solo hilo y aquí no hay ningún await
+    global _pool
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            _connect, nombre="primary", **config.pool_options()
+        )
+    return _pool
+
+
+def get_replicas() -> ReplicaSet:
+    global _replicas
+    if _replicas is None and config.DB_REPLICAS:
+        replicas = []
+        for n, replica in enumerate(config.DB_REPLICAS, start=1):
+            opciones = config.replica_options(replica)
+            nombre = f"replica-{n}"
+            pool = AsyncConnectionPool(
+                partial(_connect, opciones), nombre=nombre, **config.pool_options()
+            )
+            replicas.append(Replica(nombre, opciones, pool))
+        _replicas = ReplicaSet(replicas, config.DB_REPLICA_EJECT_SECONDS)
+    return _replicas
+
+
+def get_connection(lectura: bool = False):
+    """
+    Presta una conexión del pool asíncrono (de una réplica si `lectura`,
+    ver database.get_connection):
+
+        async with get_connection() as conn:
+            ...
+    """
+    replicas = get_replicas() if lectura else None
+    if replicas is None or leer_de_primario():
+        return get_pool().connection()
+    return _conexion_replica(replicas)
+
+
+@asynccontextmanager
+async def _conexion_replica(replicas: ReplicaSet):
+    async with AsyncExitStack() as pila:
+        conn = elegida = None
+        for replica in replicas.candidatas():
+            try:
+                conn = await pila.enter_async_context(replica.pool.connection())
+            except (Error, PoolTimeout) as e:
+                replicas.expulsar(replica, e)
+                continue
+            elegida = replica
+            break
+
+        if conn is None:
+            replicas.sin_replica()
+            conn = await pila.enter_async_context(get_pool().connection())
+
+        try:
+            yield conn
+        except ERRORES_DE_CONEXION as e:
+            if elegida is not None:
+                replicas.expulsar(elegida, e)
+            raise
+
+
+async def calentar_pool(n: int) -> int:
+    async with AsyncExitStack() as pila:
+        for _ in range(n):
+            await pila.enter_async_context(get_pool().connection())
+
+    replicas = get_replicas()
+    for replica in (replicas.replicas if replicas else ()):
+        try:
+            async with AsyncExitStack() as pila:
+                for _ in range(n):
+                    await pila.enter_async_context(replica.pool.connection())
+        except (Error, PoolTimeout) as e:
+            replicas.expulsar(replica, e)
+
+    return get_pool().stats()["abiertas"]
+
+
+async def ping():
+    async with get_connection() as conn:
+        cursor = await conn.cursor()
+        await cursor.execute("SELECT 1")
+        await cursor.fetchall()
+        await cursor.close()
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+def replicas_stats() -> dict:
+    replicas = get_replicas()
+    return replicas.stats() if replicas else None
+
+
+async def close_pool():
+    global _pool, _replicas
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.dispose()
+    if _replicas is not None:
+        replicas, _replicas = _replicas, None
+        for replica in replicas.replicas:
+            await replica.pool.dispose()
+
+
+async def iter_clientes(chunk_size: int = 1000):
+    """Igual que database.iter_clientes, como generador asíncrono."""
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor(buffered=False)
+        with medir_consulta(CAPA, "iter_clientes", queries.SELECT_EXPORT):
+            await cursor.execute(queries.SELECT_EXPORT)
+
+        while True:
+            filas = await cursor.fetchmany(chunk_size)
+            if not filas:
+                break
+            yield filas
+
+        await cursor.close()
+
+
+async def get_all_clientes():
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_all_clientes", queries.SELECT_ALL) as m:
+            await cursor.execute(queries.SELECT_ALL)
+            resultados = await cursor.fetchall()
+            m.filas = len(resultados)
+
+        await cursor.close()
+    return resultados
+
+
+async def get_estado_clientes() -> tuple:
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor()
+
+        with medir_consulta(CAPA, "get_estado_clientes", queries.SELECT_ESTADO_CLIENTES):
+            await cursor.execute(queries.SELECT_ESTADO_CLIENTES)
+            fila = await cursor.fetchone()
+
+        await cursor.close()
+    return tuple(int(valor) for valor in fila)
+
+
+async def get_clientes_page(
+    limit: int,
+    sort: str = "id",
+    cursor: dict = None,
+    filtros: dict = None
+):
+    query, values = build_page_query(limit, sort, cursor, filtros)
+
+    async with get_connection(lectura=True) as conn:
+        cursor_db = await conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_clientes_page", query) as m:
+            await cursor_db.execute(query, values)
+            filas = await cursor_db.fetchall()
+            m.filas = len(filas)
+
+        await cursor_db.close()
+    return split_page(filas, limit, sort)
+
+
+async def search_clientes(q: str, limit: int = 10):
+    query, values = build_search_query(q, limit)
+
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "search_clientes", query) as m:
+            await cursor.execute(query, values)
+            candidatos = await cursor.fetchall()
+            m.filas = len(candidatos)
+
+        await cursor.close()
+    return rank_resultados(candidatos, q, limit)
+
+
+async def get_cliente_by_id(cliente_id: int):
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_cliente_by_id", queries.SELECT_BY_ID) as m:
+            await cursor.execute(queries.SELECT_BY_ID, (cliente_id,))
+            resultado = await cursor.fetchone()
+            m.filas = 1 if resultado else 0
+
+        await cursor.close()
+    return resultado
+
+
+async def get_clientes_by_ids(ids: list, chunk_size: int = None) -> dict:
+    chunk_size = chunk_size or config.DB_BATCH_GET_CHUNK_SIZE
+    encontrados = {}
+
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor(dictionary=True)
+
+        for inicio in range(0, len(ids), chunk_size):
+            query, values = queries.select_by_ids(ids[inicio:inicio + chunk_size])
+            with medir_consulta(CAPA, "get_clientes_by_ids", query) as m:
+                await cursor.execute(query, values)
+                filas = await cursor.fetchall()
+                m.filas = len(filas)
+            for fila in filas:
+                encontrados[fila["id"]] = fila
+
+        await cursor.close()
+    return encontrados
+
+
+async def create_cliente(data: dict):
+    async with get_connection() as conn:
+        cursor = await conn.cursor()
+
+        with medir_consulta(CAPA, "create_cliente", queries.INSERT_CLIENTE) as m:
+            await cursor.execute(queries.INSERT_CLIENTE, queries.valores_insert(data))
+            await conn.commit()
+            m.filas = cursor.rowcount
+
+        new_id = cursor.lastrowid
+
+        await cursor.close()
+    return new_id
+
+
+async def _comprobar_version(cursor, cliente_id: int):
+    await cursor.execute(queries.SELECT_VERSION, (cliente_id,))
+    fila = await cursor.fetchone()
+    if fila is not None:
+        raise queries.ConflictoDeVersion(fila[0])
+
+
+async def update_cliente(cliente_id: int, data: dict, version: int = None):
+    async with get_connection() as conn:
+        cursor = await conn.cursor()
+
+        query, values = queries.build_update(cliente_id, data, version)
+        with medir_consulta(CAPA, "update_cliente", query) as m:
+            await cursor.execute(query, values)
+            m.filas = cursor.rowcount
+
+        if cursor.rowcount > 0:
+            nueva_version = cursor.lastrowid
+            await conn.commit()
+        else:
+            nueva_version = None
+            if version is not None:
+                await _comprobar_version(cursor, cliente_id)
+
+        await cursor.close()
+
+    return nueva_version
+
+
+async def patch_cliente(cliente_id: int, campos: dict, version: int = None, releer: bool = True):
+    async with get_connection() as conn:
+        cursor = await conn.cursor()
+
+        query, values = queries.build_patch(cliente_id, campos, version)
+        with medir_consulta(CAPA, "patch_cliente", query) as m:
+            await cursor.execute(query, values)
+            m.filas = cursor.rowcount
+
+        if cursor.rowcount == 0:
+            if version is not None:
+                await _comprobar_version(cursor, cliente_id)
+            await cursor.close()
+            return None, None
+
+        nueva_version = cursor.lastrowid
+        await conn.commit()
+        await cursor.close()
+
+        fila = None
+        if releer:
+            cursor = await conn.cursor(dictionary=True)
+            await cursor.execute(queries.SELECT_BY_ID, (cliente_id,))
+            fila = await cursor.fetchone()
+            await cursor.close()
+
+    return nueva_version, fila
+
+
+async def _escritura_de_grupo(cursor, tipo: str, args: tuple):
+    if tipo == "create":
+        await cursor.execute(queries.INSERT_CLIENTE, queries.valores_insert(*args))
+        return cursor.lastrowid
+
+    cliente_id, data, version = args
+    query, values = queries.build_update(cliente_id, data, version)
+    await cursor.execute(query, values)
+    if cursor.rowcount > 0:
+        return cursor.lastrowid
+    if version is not None:
+        await _comprobar_version(cursor, cliente_id)
+    return None
+
+
+async def ejecutar_grupo(operaciones: list) -> list:
+    resultados = []
+    async with get_connection() as conn:
+        cursor = await conn.cursor()
+
+        with medir_consulta(CAPA, "group_commit") as m:
+            for tipo, args in operaciones:
+                try:
+                    resultados.append(await _escritura_de_grupo(cursor, tipo, args))
+                except (Error, queries.ConflictoDeVersion) as e:
+                    if aborta_lote(e):
+                        raise
+                    resultados.append(e)
+            await conn.commit()
+            m.filas = len(operaciones)
+
+        await cursor.close()
+    return resultados
+
+
+async def delete_cliente(cliente_id: int):
+    async with get_connection() as conn:
+        cursor = await conn.cursor()
+
+        with medir_consulta(CAPA, "delete_cliente", queries.DELETE_CLIENTE) as m:
+            await cursor.execute(queries.DELETE_CLIENTE, (cliente_id,))
+            await conn.commit()
+            m.filas = cursor.rowcount
+
+        affected = cursor.rowcount
+
+        await cursor.close()
+    return affected
+
+
+# =========================
+# Altas masivas
+# =========================
+async def _ids_por_email(cursor, emails) -> dict:
+    if not emails:
+        return {}
+
+    await cursor.execute(*queries.select_ids_por_email(emails))
+    return {email.lower(): (id_, version) for id_, email, version in await cursor.fetchall()}
+
+
+async def _bulk_chunk(conn, lote: list, upsert: bool) -> dict:
+    cursor = await conn.cursor()
+
+    existentes = await _ids_por_email(cursor, {data["email"] for _, data in lote})
+    resultado, pendientes = queries.plan_bulk(lote, existentes, upsert)
+
+    if pendientes:
+        try:
+            await cursor.execute(*queries.build_bulk_insert(pendientes, upsert))
+        except Error as e:
+            if e.errno != 1062:
+                raise
+            # Ver database._bulk_chunk: reintento fila a fila
+            for indice, data in pendientes:
+                try:
+                    await cursor.execute(
+                        queries.INSERT_CLIENTE, queries.valores_insert(data)
+                    )
+                except Error as fila_error:
+                    if fila_error.errno != 1062:
+                        raise
+                    resultado[indice] = ("duplicado", None)
+
+        ids = await _ids_por_email(cursor, {data["email"] for _, data in pendientes})
+        queries.asignar_ids(resultado, pendientes, ids, upsert)
+
+    await conn.commit()
+    await cursor.close()
+    return resultado
+
+
+async def bulk_create_clientes(filas: list, upsert: bool = False, chunk_size: int = None):
+    chunk_size = chunk_size or config.DB_BULK_CHUNK_SIZE
+    resultado = {}
+
+    async with get_connection() as conn:
+        for inicio in range(0, len(filas), chunk_size):
+            lote = filas[inicio:inicio + chunk_size]
+            try:
+                with medir_consulta(CAPA, "bulk_create_clientes") as m:
+                    resultado.update(await _bulk_chunk(conn, lote, upsert))
+                    m.filas = len(lote)
+            except Error as e:
+                logger.error("Error en alta masiva (lote desde %s): %s", inicio, e)
+                await conn.rollback()
+                for indice, _ in lote:
+                    resultado[indice] = ("error", None)
+
+    return resultado
+
+
+# =========================
+# Usuarios (autenticación)
+# =========================
+async def get_usuario_by_id(usuario_id: int):
+    async with get_connection(lectura=True) as conn:
+        cursor = await conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_usuario_by_id", queries.SELECT_USUARIO_BY_ID) as m:
+            await cursor.execute(queries.SELECT_USUARIO_BY_ID, (usuario_id,))
+            resultado = await cursor.fetchone()
+            m.filas = 1 if resultado else 0
+
+        await cursor.close()
+    return resultado
+
+
+async def get_usuario_by_username(username: str):
+    # Del primario: el login tiene que ver la contraseña recién cambiada
+    async with get_connection() as conn:
+        cursor = await conn.cursor(dictionary=True)
+
+        with medir_consulta(CAPA, "get_usuario_by_username", queries.SELECT_USUARIO_BY_USERNAME) as m:
+            await cursor.execute(queries.SELECT_USUARIO_BY_USERNAME, (username,))
+            resultado = await cursor.fetchone()
+            m.filas = 1 if resultado else 0
+
+        await cursor.close()
+    return resultado
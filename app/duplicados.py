@@ -0,0 +1,426 @@
+# app/duplicados.py
+#
+# Detección de clientes duplicados (POST /clientes/duplicates).
+#
+# El email es UNIQUE, pero la misma persona aparece a menudo con varios
+# emails. Este trabajo busca grupos de clientes que probablemente son la
+# misma persona sin comparar todos con todos:
+#
+# 1. Normalización: las mismas reglas que los validadores de ClienteBase
+#    (app/schemas/validaciones.py) y después minúsculas y sin acentos.
+# 2. Bloques: cada cliente genera unas pocas claves (teléfono, nombre
+#    completo, parte local del email, dirección + apellido) y solo se
+#    comparan los clientes que comparten alguna. Una primera pasada por la
+#    tabla guarda los hashes de las claves en arrays compactos (8 bytes por
+#    clave, repartidos en CUBOS) y busca los repetidos cubo a cubo; la
+#    segunda conserva solo los clientes con alguna clave repetida. Aparte
+#    de esos 8 bytes por clave, la memoria depende de los candidatos.
+# 3. Puntuación por bloque: los rasgos de cada candidato (trigramas del
+#    nombre, la dirección y el email, teléfono) se calculan una sola vez y
+#    cada par se puntúa con operaciones de conjuntos. Los bloques de más de
+#    DUPLICADOS_MAX_BLOQUE clientes se descartan: una clave tan repetida (un
+#    teléfono de relleno) no discrimina y volvería cuadrático el trabajo.
+# 4. Los pares que superan el umbral se unen en grupos (union-find) que se
+#    escriben en NDJSON, de mayor a menor puntuación.
+#
+# El trabajo corre en un proceso aparte (es CPU pura: en un hilo frenaría
+# el event loop por el GIL) y deja estado y resultado en DUPLICADOS_DIR/<id>/.
+
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+
+from app import config, database
+from app.busqueda import normalizar
+from app.export import CAMPOS
+from app.importacion import TrabajoNoEncontrado
+from app.schemas import validaciones
+from app.trabajos import HOST, latidos, trabajo_vivo
+
+logger = logging.getLogger(__name__)
+
+ARCHIVO_ESTADO = "estado.json"
+ARCHIVO_GRUPOS = "grupos.ndjson"
+
+# Últimos dígitos del teléfono que se comparan: así se ignora el prefijo
+# internacional (+34 600 123 456 y 600-123-456 son el mismo teléfono)
+DIGITOS_TELEFONO = 9
+
+# Peso de cada campo en la puntuación de un par
+PESOS = {"nombre": 0.45, "telefono": 0.25, "direccion": 0.2, "email": 0.1}
+
+# Similitud que se asume cuando a uno de los dos le falta el campo: ni
+# acerca ni aleja (dos "María García" sin más datos no bastan)
+SIN_DATOS = 0.5
+
+# Cubos en que se reparten los hashes de la 1ª pasada: al buscar los
+# repetidos solo se convierte en lista de enteros un cubo cada vez
+CUBOS = 256
+
+# Cada cuántos segundos, como mucho, se guarda el progreso en estado.json
+INTERVALO_PROGRESO = 1.0
+
+_RE_NO_ALFANUMERICO = re.compile(r"[^\w]+")
+
+_procesos = None
+_lock = threading.Lock()
+
+
+# =========================
+# Normalización
+# =========================
+def normalizar_nombre(v) -> str:
+    if not v:
+        return ""
+    try:
+        v = validaciones.validar_nombre_apellido(v)
+    except ValueError:
+        # Datos históricos que no pasarían la validación actual
+        v = v.strip()
+    return " ".join(normalizar(v).split())
+
+
+def normalizar_telefono(v) -> str:
+    try:
+        v = validaciones.validar_telefono(v)
+    except ValueError:
+        v = v.strip()
+    if not v:
+        return ""
+    digitos = validaciones.limpiar_telefono(v).lstrip("+")
+    return digitos[-DIGITOS_TELEFONO:] if digitos.isdigit() else ""
+
+
+def normalizar_direccion(v) -> str:
+    try:
+        v = validaciones.validar_direccion(v)
+    except ValueError:
+        v = v.strip()
+    if not v:
+        return ""
+    return " ".join(_RE_NO_ALFANUMERICO.sub(" ", normalizar(v)).split())
+
+
+def normalizar_email(v) -> str:
+    """Parte local sin puntos ni '+etiqueta': 'Juan.Perez+web@x' -> 'juanperez'."""
+    local = (v or "").casefold().partition("@")[0]
+    return local.partition("+")[0].replace(".", "")
+
+
+def normalizar_fila(fila: tuple) -> tuple:
+    """`(nombre, apellido, email, telefono, direccion)` normalizados de una fila de CAMPOS."""
+    _, nombre, apellido, email, telefono, direccion, _ = fila
+    return (
+        normalizar_nombre(nombre),
+        normalizar_nombre(apellido),
+        normalizar_email(email),
+        normalizar_telefono(telefono),
+        normalizar_direccion(direccion),
+    )
+
+
+def claves(nombre: str, apellido: str, email: str, telefono: str, direccion: str) -> list:
+    """Claves de bloque: dos clientes solo se comparan si comparten alguna."""
+    resultado = []
+    if telefono:
+        resultado.append(f"t:{telefono}")
+    # Palabras ordenadas: "Pérez Juan" y "Juan Pérez" caen en el mismo bloque
+    completo = sorted(f"{nombre} {apellido}".split())
+    if completo:
+        resultado.append(f"n:{' '.join(completo)}")
+    if len(email) >= 3:
+        resultado.append(f"e:{email}")
+    if direccion and apellido:
+        resultado.append(f"d:{direccion}|{apellido[:3]}")
+    return resultado
+
+
+# =========================
+# Puntuación
+# =========================
+def _trigramas(texto: str) -> frozenset:
+    if not texto:
+        return frozenset()
+    texto = f" {texto} "
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+class Candidato:
+    """Cliente con alguna clave repetida y sus rasgos ya calculados."""
+    __slots__ = ("fila", "bloques", "nombre", "telefono", "direccion", "email")
+
+    def __init__(self, fila: tuple, normalizado: tuple, bloques: tuple):
+        nombre, apellido, email, telefono, direccion = normalizado
+        self.fila = fila
+        self.bloques = bloques
+        self.nombre = _trigramas(f"{nombre} {apellido}".strip())
+        self.telefono = telefono
+        self.direccion = _trigramas(direccion)
+        self.email = _trigramas(email)
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return SIN_DATOS
+    return len(a & b) / len(a | b)
+
+
+def puntuar(a: Candidato, b: Candidato) -> float:
+    """Similitud entre 0 y 1 de dos candidatos."""
+    if a.telefono and b.telefono:
+        telefono = float(a.telefono == b.telefono)
+    else:
+        telefono = SIN_DATOS
+    return (
+        PESOS["nombre"] * _jaccard(a.nombre, b.nombre)
+        + PESOS["telefono"] * telefono
+        + PESOS["direccion"] * _jaccard(a.direccion, b.direccion)
+        + PESOS["email"] * _jaccard(a.email, b.email)
+    )
+
+
+# =========================
+# Detección
+# =========================
+def _repetidos(cubos: list) -> set:
+    """Hashes que aparecen más de una vez. Vacía `cubos` a medida que avanza."""
+    repetidos = set()
+    while cubos:
+        ordenados = sorted(cubos.pop())
+        repetidos.update(
+            h for h, siguiente in zip(ordenados, islice(ordenados, 1, None)) if h == siguiente
+        )
+    return repetidos
+
+
+def _raiz(padres: dict, x: int) -> int:
+    while padres.get(x, x) != x:
+        padres[x] = padres.get(padres[x], padres[x])
+        x = padres[x]
+    return x
+
+
+def detectar(umbral: float, progreso=None):
+    """
+    Grupos de posibles duplicados, de mayor a menor puntuación. `progreso`,
+    si se indica, recibe un dict con los contadores de cada fase.
+    """
+    contadores = {
+        "fase": "claves", "filas": 0, "candidatos": 0, "bloques": 0,
+        "bloques_omitidos": 0, "comparaciones": 0, "grupos": 0,
+    }
+    avisar = progreso or (lambda _: None)
+
+    # 1ª pasada: hashes de todas las claves (8 bytes por clave)
+    cubos = [array("q") for _ in range(CUBOS)]
+    for filas in database.iter_clientes(config.DUPLICADOS_CHUNK_SIZE):
+        for fila in filas:
+            for h in map(hash, claves(*normalizar_fila(fila))):
+                cubos[h % CUBOS].append(h)
+        contadores["filas"] += len(filas)
+        avisar(contadores)
+    repetidos = _repetidos(cubos)
+
+    # 2ª pasada: solo los clientes que comparten alguna clave
+    contadores["fase"] = "candidatos"
+    avisar(contadores)
+    bloques = defaultdict(list)
+    for filas in database.iter_clientes(config.DUPLICADOS_CHUNK_SIZE):
+        for fila in filas:
+            normalizado = normalizar_fila(fila)
+            suyos = tuple(h for h in map(hash, claves(*normalizado)) if h in repetidos)
+            if suyos:
+                candidato = Candidato(fila, normalizado, suyos)
+                contadores["candidatos"] += 1
+                for h in suyos:
+                    bloques[h].append(candidato)
+    del repetidos
+
+    for h in [h for h, miembros in bloques.items() if len(miembros) > config.DUPLICADOS_MAX_BLOQUE]:
+        del bloques[h]
+        contadores["bloques_omitidos"] += 1
+    contadores["bloques"] = len(bloques)
+
+    # Puntuación: cada par se compara una sola vez, en el primero de los
+    # bloques que comparte
+    contadores["fase"] = "puntuacion"
+    avisar(contadores)
+    padres = {}
+    pares = defaultdict(list)
+    for h, miembros in bloques.items():
+        for i, a in enumerate(miembros):
+            for b in miembros[i + 1:]:
+                compartidos = [k for k in a.bloques if k in b.bloques and k in bloques]
+                if min(compartidos) != h:
+                    continue
+                contadores["comparaciones"] += 1
+                puntuacion = puntuar(a, b)
+                if puntuacion >= umbral:
+                    raiz_a, raiz_b = _raiz(padres, a.fila[0]), _raiz(padres, b.fila[0])
+                    if raiz_a != raiz_b:
+                        padres[raiz_b] = raiz_a
+                    pares[a.fila[0]].append((a, b, puntuacion))
+        avisar(contadores)
+    del bloques
+
+    grupos = defaultdict(lambda: {"clientes": {}, "pares": []})
+    for lista in pares.values():
+        for a, b, puntuacion in lista:
+            grupo = grupos[_raiz(padres, a.fila[0])]
+            grupo["clientes"][a.fila[0]] = a.fila
+            grupo["clientes"][b.fila[0]] = b.fila
+            grupo["pares"].append({"a": a.fila[0], "b": b.fila[0], "score": round(puntuacion, 4)})
+
+    resultado = []
+    for grupo in grupos.values():
+        resultado.append({
+            # La del par más parecido del grupo
+            "score": max(par["score"] for par in grupo["pares"]),
+            "ids": sorted(grupo["clientes"]),
+            "pares": grupo["pares"],
+            "clientes": [dict(zip(CAMPOS, fila)) for _, fila in sorted(grupo["clientes"].items())],
+        })
+    resultado.sort(key=lambda g: (-g["score"], g["ids"][0]))
+    contadores["grupos"] = len(resultado)
+    return resultado, contadores
+
+
+# =========================
+# Trabajos
+# =========================
+def _ejecutor() -> ProcessPoolExecutor:
+    global _procesos
+    if _procesos is None:
+        with _lock:
+            if _procesos is None:
+                # Un trabajo a la vez por worker; "spawn" por la misma razón
+                # que en app/importacion.py
+                _procesos = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _procesos
+
+
+def cerrar():
+    """Al apagar: un trabajo en cola ya no empieza (se verá como "interrumpido")."""
+    global _procesos
+    with _lock:
+        procesos, _procesos = _procesos, None
+    if procesos is not None:
+        procesos.shutdown(wait=False, cancel_futures=True)
+
+
+def _directorio(trabajo_id: str) -> str:
+    return os.path.join(config.DUPLICADOS_DIR, trabajo_id)
+
+
+def ruta_grupos(trabajo_id: str) -> str:
+    return os.path.join(_directorio(trabajo_id), ARCHIVO_GRUPOS)
+
+
+def _guardar_estado(estado: dict):
+    # Escritura atómica: quien lo lea nunca ve un JSON a medias
+    ruta = os.path.join(_directorio(estado["id"]), ARCHIVO_ESTADO)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def leer_estado(trabajo_id: str) -> dict:
+    # El id forma parte de una ruta: solo se aceptan ids generados aquí
+    try:
+        uuid.UUID(hex=trabajo_id)
+    except ValueError:
+        raise TrabajoNoEncontrado(trabajo_id)
+
+    ruta = os.path.join(_directorio(trabajo_id), ARCHIVO_ESTADO)
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            estado = json.load(f)
+    except FileNotFoundError:
+        raise TrabajoNoEncontrado(trabajo_id)
+
+    if estado["estado"] in ("pendiente", "procesando") and not trabajo_vivo(estado, ruta):
+        estado["estado"] = "interrumpido"
+    return estado
+
+
+def crear_trabajo(umbral: float = None) -> dict:
+    """Registra y encola una detección. Bloquea: se llama desde el threadpool."""
+    trabajo_id = uuid.uuid4().hex
+    os.makedirs(_directorio(trabajo_id))
+
+    estado = {
+        "id": trabajo_id,
+        "estado": "pendiente",
+        "umbral": config.DUPLICADOS_UMBRAL if umbral is None else umbral,
+        "host": HOST,
+        "pid": os.getpid(),
+        "creado": time.time(),
+        "iniciado": None,
+        "terminado": None,
+        "fase": None,
+        "filas": 0,
+        "candidatos": 0,
+        "bloques": 0,
+        "bloques_omitidos": 0,
+        "comparaciones": 0,
+        "grupos": 0,
+        "error": None,
+    }
+    _guardar_estado(estado)
+    # Late el proceso que lanzó el trabajo; mientras el del pool siga con
+    # él, el futuro no termina
+    futuro = _ejecutor().submit(ejecutar, estado)
+    latidos.registrar(os.path.join(_directorio(trabajo_id), ARCHIVO_ESTADO), futuro)
+    return dict(estado)
+
+
+def ejecutar(estado: dict):
+    """Cuerpo del trabajo, en el proceso del pool."""
+    estado["estado"] = "procesando"
+    estado["pid"] = os.getpid()
+    estado["iniciado"] = time.time()
+    _guardar_estado(estado)
+
+    guardado = [0.0]
+
+    def progreso(contadores: dict):
+        estado.update(contadores)
+        ahora = time.monotonic()
+        if ahora - guardado[0] >= INTERVALO_PROGRESO:
+            guardado[0] = ahora
+            _guardar_estado(estado)
+
+    try:
+        grupos, contadores = detectar(estado["umbral"], progreso)
+        estado.update(contadores)
+
+        ruta = ruta_grupos(estado["id"])
+        with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+            for grupo in grupos:
+                f.write(json.dumps(grupo, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+        os.replace(f"{ruta}.tmp", ruta)
+        estado["estado"] = "completado"
+    except Exception as e:
+        logger.exception("Detección de duplicados %s fallida", estado["id"])
+        estado["estado"] = "fallido"
+        estado["error"] = str(e)
+    finally:
+        # El proceso sigue vivo para el siguiente trabajo: no retiene conexiones
+        database.close_pool()
+
+    estado["fase"] = None
+    estado["terminado"] = time.time()
+    _guardar_estado(estado)
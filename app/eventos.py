@@ -0,0 +1,174 @@
+# app/eventos.py
+#
+# Cambios de clientes en tiempo real (GET /clientes/events, Server-Sent
+# Events) para que los dashboards no tengan que sondear el listado.
+#
+# - Las rutas de escritura publican en un broker en memoria del proceso.
+#   Cada evento se serializa una sola vez y se reparte tal cual a todos los
+#   suscriptores: un suscriptor inactivo es una corrutina dormida y una
+#   deque vacía, así que un worker aguanta miles.
+# - Cada suscriptor tiene un buffer acotado (EVENTOS_BUFFER). Si no lo
+#   vacía a tiempo se le cierra la conexión; el navegador reconecta solo
+#   con Last-Event-ID y recupera lo perdido de los últimos EVENTOS_HISTORIAL
+#   eventos.
+# - Los ids llevan un identificador del proceso. Si el Last-Event-ID es de
+#   otro worker (o ya salió del historial) se envía un evento `reset`: el
+#   cliente debe recargar el listado completo. Con varios workers, cada
+#   conexión solo ve las escrituras atendidas por su worker.
+
+import asyncio
+from collections import deque
+import json
+import os
+import secrets
+
+from app import config
+from app.metrics import lineas, registro
+
+PING = b": ping\n\n"
+
+
+class Suscripcion:
+    __slots__ = ("pendientes", "hay_datos", "desbordada")
+
+    def __init__(self):
+        self.pendientes = deque()
+        self.hay_datos = asyncio.Event()
+        self.desbordada = False
+
+
+class Broker:
+    """Pub/sub en memoria con historial circular. Se usa solo desde el event loop."""
+
+    def __init__(self, historial: int = 1000, buffer: int = 100):
+        self.buffer = buffer
+        self._historial = deque(maxlen=historial)  # (número, mensaje)
+        self._suscripciones = set()
+        self._nuevo_proceso()
+        self.publicados = 0
+        self.desbordados = 0
+        # Con preload_app los workers heredan este objeto del proceso maestro
+        os.register_at_fork(after_in_child=self._nuevo_proceso)
+
+    def _nuevo_proceso(self):
+        self.proceso = secrets.token_hex(4)
+        self._siguiente = 1
+        self._historial.clear()
+
+    def _mensaje(self, numero: int, tipo: str, datos: dict) -> bytes:
+        return (
+            f"id: {self.proceso}-{numero}\n"
+            f"event: {tipo}\n"
+            f"data: {json.dumps(datos, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        ).encode("utf-8")
+
+    def publicar(self, tipo: str, datos: dict):
+        numero = self._siguiente
+        self._siguiente += 1
+        mensaje = self._mensaje(numero, tipo, datos)
+        self._historial.append((numero, mensaje))
+        self.publicados += 1
+
+        for suscripcion in tuple(self._suscripciones):
+            if len(suscripcion.pendientes) >= self.buffer:
+                # Demasiado lento: se le desconecta y reanudará desde su último id
+                suscripcion.desbordada = True
+                self._suscripciones.discard(suscripcion)
+                self.desbordados += 1
+            else:
+                suscripcion.pendientes.append(mensaje)
+            suscripcion.hay_datos.set()
+
+    @property
+    def suscriptores(self) -> int:
+        return len(self._suscripciones)
+
+    def suscribir(self) -> Suscripcion:
+        suscripcion = Suscripcion()
+        self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion):
+        self._suscripciones.discard(suscripcion)
+
+    def desde(self, ultimo_id: str) -> list:
+        """
+        Mensajes posteriores a `ultimo_id`, o None si ya no se pueden
+        recuperar (id de otro proceso o más antiguo que el historial).
+        """
+        proceso, _, numero = ultimo_id.strip().partition("-")
+        if proceso != self.proceso or not numero.isdigit():
+            return None
+        numero = int(numero)
+        if numero >= self._siguiente:
+            return None
+        if self._historial and numero < self._historial[0][0] - 1:
+            return None
+        return [mensaje for n, mensaje in self._historial if n > numero]
+
+    def reset(self) -> bytes:
+        return self._mensaje(self._siguiente - 1, "reset", {})
+
+    def stats(self) -> dict:
+        return {
+            "suscriptores": self.suscriptores,
+            "publicados": self.publicados,
+            "desbordados": self.desbordados,
+            "historial": len(self._historial),
+        }
+
+
+broker = Broker(historial=config.EVENTOS_HISTORIAL, buffer=config.EVENTOS_BUFFER)
+
+
+def publicar(tipo: str, datos: dict):
+    broker.publicar(tipo, datos)
+
+
+async def flujo(ultimo_id: str = None):
+    """
+    Cuerpo de la respuesta SSE. Starlette cancela el generador cuando el
+    cliente se desconecta; el `finally` retira la suscripción.
+    """
+    # Suscripción e historial sin ningún await entre medias: cada evento
+    # llega una vez, por el historial o por la suscripción
+    suscripcion = broker.suscribir()
+    inicio = f"retry: {config.EVENTOS_RETRY_MS}\n\n".encode("utf-8")
+    if ultimo_id:
+        perdidos = broker.desde(ultimo_id)
+        inicio += broker.reset() if perdidos is None else b"".join(perdidos)
+
+    try:
+        yield inicio
+
+        while True:
+            try:
+                await asyncio.wait_for(suscripcion.hay_datos.wait(), config.EVENTOS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Mantiene viva la conexión a través de proxies y detecta
+                # los clientes que se fueron sin cerrarla
+                yield PING
+                continue
+
+            suscripcion.hay_datos.clear()
+            if suscripcion.pendientes:
+                bloque = b"".join(suscripcion.pendientes)
+                suscripcion.pendientes.clear()
+                yield bloque
+            if suscripcion.desbordada:
+                return
+    finally:
+        broker.cancelar(suscripcion)
+
+
+@registro.colector
+def _metricas_eventos() -> list:
+    return (
+        lineas("sse_subscribers", "Conexiones abiertas a GET /clientes/events", "gauge", (),
+               [((), broker.suscriptores)])
+        + lineas("sse_events_published_total", "Eventos publicados", "counter", (),
+                 [((), broker.publicados)])
+        + lineas("sse_subscribers_dropped_total",
+                 "Suscriptores desconectados por llenar su buffer", "counter", (),
+                 [((), broker.desbordados)])
+    )
@@ -0,0 +1,47 @@
+# app/export.py
+
+import csv
+import io
+import json
+
+# Orden de las columnas en la exportación (coincide con COLUMNAS_CLIENTE)
+CAMPOS = ("id", "nombre", "apellido", "email", "telefono", "direccion", "version")
+
+FORMATOS = {
+    "ndjson": ("application/x-ndjson", "clientes.ndjson"),
+    "csv": ("text/csv; charset=utf-8", "clientes.csv"),
+}
+
+
+# =========================
+# Generadores de salida
+# =========================
+# Reciben un iterador asíncrono de lotes de filas (tuplas) y producen un
+# bloque de bytes por lote. Las filas vienen directamente de la BD, por eso
+# no se validan con Pydantic.
+async def ndjson_chunks(lotes):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    async for filas in lotes:
+        lineas = [dumps(dict(zip(CAMPOS, fila))) for fila in filas]
+        lineas.append("")
+        yield "\n".join(lineas).encode("utf-8")
+
+
+async def csv_chunks(lotes):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    writer.writerow(CAMPOS)
+    yield buffer.getvalue().encode("utf-8")
+
+    async for filas in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(filas)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_chunks(formato: str, lotes):
+    if formato == "csv":
+        return csv_chunks(lotes)
+    return ndjson_chunks(lotes)
@@ -0,0 +1,164 @@
+# app/group_commit.py
+#
+# Group commit de escrituras sueltas (POST /clientes/ y PUT /clientes/{id}).
+#
+# Cada commit de InnoDB espera a que el redo log llegue a disco: con miles de
+# altas por segundo, cada una en su transacción, ese fsync es el límite. Con
+# DB_GROUP_COMMIT=true las escrituras concurrentes se encolan y se confirman
+# juntas en una transacción cuando la más antigua lleva
+# DB_GROUP_COMMIT_WINDOW_MS esperando o hay DB_GROUP_COMMIT_MAX_BATCH en cola.
+# Cada petición sigue recibiendo su propio id o su propio error (1062,
+# ConflictoDeVersion...).
+#
+# La cola vive en el event loop del worker, así que sirve igual con la capa
+# asíncrona que con la síncrona (el lote se ejecuta en el threadpool). Hay
+# un solo lote en vuelo por worker: mientras se confirma, se va llenando el
+# siguiente.
+
+import asyncio
+import contextvars
+import threading
+
+from app.metrics import Counter, Histogram, registro
+from app.pool import ERRORES_DE_CONEXION
+
+# Deshacen la transacción entera, no solo la sentencia (interbloqueo y
+# espera de lock agotada, que con innodb_rollback_on_timeout también lo hace)
+ERRORES_QUE_ABORTAN = (1205, 1213)
+
+BUCKETS_LOTE = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+gc_commits = registro.registrar(Counter(
+    "db_group_commit_commits_total", "Transacciones del group commit", ("resultado",)
+))
+gc_lote = registro.registrar(Histogram(
+    "db_group_commit_batch_size", "Escrituras por transacción del group commit",
+    (), buckets=BUCKETS_LOTE
+))
+gc_espera = registro.registrar(Histogram(
+    "db_group_commit_wait_seconds", "Tiempo desde que se encola una escritura hasta su commit", ()
+))
+
+
+def aborta_lote(error: Exception) -> bool:
+    """¿El error de una escritura invalida todo el lote (y no solo esa fila)?"""
+    return (
+        isinstance(error, ERRORES_DE_CONEXION)
+        or getattr(error, "errno", None) in ERRORES_QUE_ABORTAN
+    )
+
+
+class GroupCommit:
+    """
+    `ejecutar(operaciones)` es una corrutina que recibe `[(tipo, args), ...]`,
+    las ejecuta en una transacción y devuelve un resultado por operación (un
+    valor o la excepción de esa operación).
+    """
+
+    def __init__(self, ejecutar, ventana: float, max_lote: int):
+        self.ejecutar = ejecutar
+        self.ventana = ventana
+        self.max_lote = max(1, max_lote)
+        self._lock = threading.Lock()
+        self._loop = None
+        self.commits = 0
+        self.errores = 0
+        self.operaciones = 0
+        self.mayor_lote = 0
+
+    def _preparar(self, loop):
+        # Los objetos de asyncio pertenecen a un loop (un TestClient, por
+        # ejemplo, crea uno nuevo cada vez)
+        self._loop = loop
+        self._pendientes = []
+        self._hay_lote = asyncio.Event()
+        self._tarea = None
+        self._cerrando = False
+
+    async def enviar(self, tipo: str, *args):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._preparar(loop)
+
+        futuro = loop.create_future()
+        self._pendientes.append((tipo, args, futuro, loop.time()))
+        if len(self._pendientes) >= self.max_lote:
+            self._hay_lote.set()
+        if self._tarea is None or self._tarea.done():
+            # Contexto vacío: el lote no pertenece a ninguna petición
+            self._tarea = loop.create_task(self._vaciar(), context=contextvars.Context())
+        return await futuro
+
+    async def _vaciar(self):
+        while self._pendientes:
+            restante = self.ventana - (self._loop.time() - self._pendientes[0][3])
+            if restante > 0 and len(self._pendientes) < self.max_lote and not self._cerrando:
+                try:
+                    await asyncio.wait_for(self._hay_lote.wait(), restante)
+                except asyncio.TimeoutError:
+                    pass
+            self._hay_lote.clear()
+
+            lote = self._pendientes[:self.max_lote]
+            del self._pendientes[:self.max_lote]
+            if len(self._pendientes) >= self.max_lote:
+                self._hay_lote.set()
+
+            # Las peticiones canceladas antes de confirmar ya no se escriben
+            lote = [op for op in lote if not op[2].done()]
+            if lote:
+                await self._confirmar(lote)
+
+    async def _confirmar(self, lote: list):
+        try:
+            resultados = await self.ejecutar([(tipo, args) for tipo, args, _, _ in lote])
+        except Exception as e:
+            if getattr(e, "errno", None) in ERRORES_QUE_ABORTAN and len(lote) > 1:
+                # Se perdió todo el lote: cada escritura se reintenta en su
+                # propia transacción para no fallarlas todas por una
+                gc_commits.inc("reintento")
+                for operacion in lote:
+                    await self._confirmar([operacion])
+                return
+            gc_commits.inc("error")
+            with self._lock:
+                self.errores += 1
+            for _, _, futuro, _ in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        ahora = self._loop.time()
+        gc_commits.inc("ok")
+        gc_lote.observe(valor=len(lote))
+        with self._lock:
+            self.commits += 1
+            self.operaciones += len(lote)
+            self.mayor_lote = max(self.mayor_lote, len(lote))
+
+        for (_, _, futuro, encolada), resultado in zip(lote, resultados):
+            gc_espera.observe(valor=ahora - encolada)
+            if futuro.done():
+                continue
+            if isinstance(resultado, BaseException):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    async def cerrar(self):
+        """Al apagar: confirma lo que quede en cola sin esperar la ventana."""
+        if self._loop is asyncio.get_running_loop() and self._tarea is not None:
+            self._cerrando = True
+            self._hay_lote.set()
+            await self._tarea
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "commits": self.commits,
+                "errores": self.errores,
+                "operaciones": self.operaciones,
+                "media_lote": round(self.operaciones / self.commits, 2) if self.commits else 0,
+                "mayor_lote": self.mayor_lote,
+                "pendientes": len(self._pendientes) if self._loop is not None else 0,
+            }
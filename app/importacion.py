@@ -0,0 +1,287 @@
+# app/importacion.py
+#
+# Importaciones de CSV en segundo plano (POST /clientes/import).
+#
+# - La subida se guarda en disco y la petición responde enseguida con el id
+#   del trabajo; el trabajo corre en un hilo propio (IMPORT_MAX_JOBS a la
+#   vez por worker), nunca en el event loop ni en el threadpool de peticiones.
+# - El CSV se lee por lotes de IMPORT_CHUNK_SIZE filas. Cada lote se valida
+#   contra ClienteCreate en un pool de procesos (los validadores son CPU
+#   pura y en hilos los frenaría el GIL) y las filas válidas se insertan con
+#   el alta masiva de la capa síncrona, una transacción por lote.
+# - El estado del trabajo (estado.json) y el informe de filas rechazadas
+#   (rechazadas.csv) viven en IMPORT_DIR/<id>/: cualquier worker que vea ese
+#   directorio puede consultarlos.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from pydantic import ValidationError
+
+from app import config, database
+from app.cache import clientes_cache, version_clientes
+from app.schemas.cliente import ClienteCreate
+from app.trabajos import HOST, latidos, trabajo_vivo
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_OBLIGATORIAS = ("nombre", "apellido", "email")
+COLUMNAS = COLUMNAS_OBLIGATORIAS + ("telefono", "direccion")
+
+ARCHIVO_ENTRADA = "entrada.csv"
+ARCHIVO_ESTADO = "estado.json"
+ARCHIVO_RECHAZADAS = "rechazadas.csv"
+
+# Motivo en el informe de rechazadas según el estado del alta masiva
+_MOTIVOS = {
+    "duplicado": "Ya existe un cliente con ese email",
+    "error": "Error al crear el cliente",
+}
+
+_trabajos = None
+_validadores = None
+_lock = threading.Lock()
+
+
+class TrabajoNoEncontrado(Exception):
+    pass
+
+
+# =========================
+# Validación (en los procesos del pool)
+# =========================
+def validar_filas(filas: list) -> tuple:
+    """
+    Valida `[(linea, {columna: valor})]` contra ClienteCreate. Devuelve
+    `([(linea, data)], [(linea, fila, motivo)])`. Se ejecuta en otro proceso:
+    recibe y devuelve solo tipos simples.
+    """
+    validos = []
+    rechazados = []
+    for linea, fila in filas:
+        try:
+            cliente = ClienteCreate.model_validate(fila)
+        except ValidationError as e:
+            motivo = "; ".join(
+                f"{'.'.join(str(parte) for parte in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            )
+            rechazados.append((linea, fila, motivo))
+            continue
+        validos.append((linea, cliente.model_dump()))
+    return validos, rechazados
+
+
+# =========================
+# Ejecutores
+# =========================
+def _ejecutores() -> tuple:
+    global _trabajos, _validadores
+    if _trabajos is None:
+        with _lock:
+            if _trabajos is None:
+                # "spawn": hacer fork de un proceso con hilos y conexiones
+                # abiertas (pools, event loop) no es seguro
+                _validadores = ProcessPoolExecutor(
+                    max_workers=config.IMPORT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                _trabajos = ThreadPoolExecutor(
+                    max_workers=config.IMPORT_MAX_JOBS, thread_name_prefix="importacion"
+                )
+    return _trabajos, _validadores
+
+
+def cerrar():
+    """
+    Al apagar: los trabajos en cola ya no empiezan (se verán como
+    "interrumpido") y el que esté en curso termina como "fallido" al no
+    poder validar más lotes. Un CSV de millones de filas no cabe en el
+    tiempo de apagado de un worker.
+    """
+    global _trabajos, _validadores
+    with _lock:
+        trabajos, validadores = _trabajos, _validadores
+        _trabajos = _validadores = None
+    if trabajos is not None:
+        trabajos.shutdown(wait=False, cancel_futures=True)
+        validadores.shutdown(wait=False, cancel_futures=True)
+
+
+# =========================
+# Estado en disco
+# =========================
+def _directorio(trabajo_id: str) -> str:
+    return os.path.join(config.IMPORT_DIR, trabajo_id)
+
+
+def ruta_rechazadas(trabajo_id: str) -> str:
+    return os.path.join(_directorio(trabajo_id), ARCHIVO_RECHAZADAS)
+
+
+def _guardar_estado(estado: dict):
+    # Escritura atómica: quien lo lea nunca ve un JSON a medias
+    ruta = os.path.join(_directorio(estado["id"]), ARCHIVO_ESTADO)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def leer_estado(trabajo_id: str) -> dict:
+    # El id forma parte de una ruta: solo se aceptan ids generados aquí
+    try:
+        uuid.UUID(hex=trabajo_id)
+    except ValueError:
+        raise TrabajoNoEncontrado(trabajo_id)
+
+    ruta = os.path.join(_directorio(trabajo_id), ARCHIVO_ESTADO)
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            estado = json.load(f)
+    except FileNotFoundError:
+        raise TrabajoNoEncontrado(trabajo_id)
+
+    # Un trabajo sin terminar cuyo proceso ya no existe no va a avanzar
+    if estado["estado"] in ("pendiente", "procesando") and not trabajo_vivo(estado, ruta):
+        estado["estado"] = "interrumpido"
+    return estado
+
+
+# =========================
+# Trabajos
+# =========================
+def crear_trabajo(origen, nombre_archivo: str, upsert: bool = False) -> dict:
+    """
+    Copia el CSV subido (`origen`, un fichero binario abierto) al directorio
+    del trabajo y lo encola. Bloquea: se llama desde el threadpool.
+    """
+    trabajo_id = uuid.uuid4().hex
+    directorio = _directorio(trabajo_id)
+    os.makedirs(directorio)
+
+    with open(os.path.join(directorio, ARCHIVO_ENTRADA), "wb") as destino:
+        while bloque := origen.read(1024 * 1024):
+            destino.write(bloque)
+
+    estado = {
+        "id": trabajo_id,
+        "estado": "pendiente",
+        "archivo": nombre_archivo,
+        "upsert": upsert,
+        "host": HOST,
+        "pid": os.getpid(),
+        "creado": time.time(),
+        "iniciado": None,
+        "terminado": None,
+        "filas": 0,
+        "creados": 0,
+        "actualizados": 0,
+        "duplicados": 0,
+        "invalidos": 0,
+        "errores": 0,
+        "error": None,
+    }
+    _guardar_estado(estado)
+
+    trabajos, _ = _ejecutores()
+    futuro = trabajos.submit(_ejecutar, estado)
+    latidos.registrar(os.path.join(directorio, ARCHIVO_ESTADO), futuro)
+    return dict(estado)
+
+
+def _lotes(lector, chunk_size: int):
+    lote = []
+    for fila in lector:
+        datos = {
+            columna: (fila.get(columna) or "").strip() or None for columna in COLUMNAS
+        }
+        lote.append((lector.line_num, datos))
+        if len(lote) >= chunk_size:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _ejecutar(estado: dict):
+    estado["estado"] = "procesando"
+    estado["iniciado"] = time.time()
+    _guardar_estado(estado)
+
+    try:
+        _importar(estado)
+        estado["estado"] = "completado"
+    except Exception as e:
+        logger.exception("Importación %s fallida", estado["id"])
+        estado["estado"] = "fallido"
+        estado["error"] = str(e)
+
+    estado["terminado"] = time.time()
+    _guardar_estado(estado)
+
+
+def _importar(estado: dict):
+    _, validadores = _ejecutores()
+    directorio = _directorio(estado["id"])
+
+    with open(os.path.join(directorio, ARCHIVO_ENTRADA), newline="", encoding="utf-8-sig") as entrada, \
+            open(os.path.join(directorio, ARCHIVO_RECHAZADAS), "w", newline="", encoding="utf-8") as salida:
+        lector = csv.DictReader(entrada)
+        faltan = [c for c in COLUMNAS_OBLIGATORIAS if c not in (lector.fieldnames or ())]
+        if faltan:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltan)}")
+
+        rechazadas = csv.writer(salida)
+        rechazadas.writerow(("linea", "motivo") + COLUMNAS)
+
+        # Como mucho dos lotes por proceso en vuelo: el fichero no se carga
+        # entero en memoria y los procesos no se quedan sin trabajo mientras
+        # se inserta el lote anterior
+        en_vuelo = deque()
+        for lote in _lotes(lector, config.IMPORT_CHUNK_SIZE):
+            estado["filas"] += len(lote)
+            en_vuelo.append(validadores.submit(validar_filas, lote))
+            if len(en_vuelo) >= config.IMPORT_WORKERS * 2:
+                _insertar(estado, en_vuelo.popleft().result(), rechazadas)
+        while en_vuelo:
+            _insertar(estado, en_vuelo.popleft().result(), rechazadas)
+
+
+def _insertar(estado: dict, validacion: tuple, rechazadas):
+    validos, invalidos = validacion
+
+    for linea, fila, motivo in invalidos:
+        rechazadas.writerow([linea, motivo] + [fila[c] for c in COLUMNAS])
+    estado["invalidos"] += len(invalidos)
+
+    if validos:
+        por_linea = dict(validos)
+        escritos = 0
+        resultado = database.bulk_create_clientes(validos, estado["upsert"])
+
+        for linea, (resultado_fila, cliente_id) in sorted(resultado.items()):
+            if resultado_fila == "creado":
+                estado["creados"] += 1
+                escritos += 1
+            elif resultado_fila == "actualizado":
+                estado["actualizados"] += 1
+                escritos += 1
+                clientes_cache.invalidate(cliente_id)
+            else:
+                estado["duplicados" if resultado_fila == "duplicado" else "errores"] += 1
+                data = por_linea[linea]
+                rechazadas.writerow([linea, _MOTIVOS[resultado_fila]] + [data[c] for c in COLUMNAS])
+
+        if escritos:
+            version_clientes.invalidar()
+
+    _guardar_estado(estado)
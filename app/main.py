@@ -1,25 +1,91 @@
 # app/main.py
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+
+from app import admision, auth, config, duplicados, eventos, importacion, metrics
+from app.compresion import CompressionMiddleware
+from app.pool import PoolTimeout
+from app.routers import auth as auth_router, clientes
+from app.replicas import ReadYourWritesMiddleware
+from app.repository import (
+    cache_stats, calentar_pools, close_pools, comprobar_bd, group_commit_stats,
+    modo, pool_stats, replicas_stats, single_flight_stats
+)
+
+
+# Sin AUTH_SECRET la API no arranca (ni siquiera el master con preload_app)
+auth.comprobar_config()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Al arrancar cada worker: abrir ya las conexiones para que la primera
+    # petición no pague la conexión a MySQL
+    await calentar_pools()
+    yield
+    # Al apagar: cerrar las conexiones que quedan en los pools
+    await run_in_threadpool(importacion.cerrar)
+    await run_in_threadpool(duplicados.cerrar)
+    await close_pools()
 
-from app.routers import clientes
 
 app = FastAPI(
     title="API de Clientes",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Compresión gzip/brotli de las respuestas grandes (listados, export)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    gzip_level=config.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=config.COMPRESSION_BROTLI_QUALITY
 )
 
-# CORS (pensando en React)
+# Con réplicas: tras escribir, el cliente lee del primario durante un rato
+if config.DB_REPLICAS:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Límite de lecturas/escrituras simultáneas: con MySQL lento, 503 rápido
+# en lugar de acumular peticiones hasta que caduquen todas
+app.add_middleware(admision.AdmissionMiddleware)
+
+# CORS (pensando en React). Envuelve al control de admisión: sus 503 llevan
+# Access-Control-Allow-Origin y el frontend ve un 503 reintentable, no un
+# error de CORS opaco
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # en producción se ajusta
     allow_credentials=False,  # False para permitir * en origins
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
-app.include_router(clientes.router)
+# Tiempos y códigos de estado por ruta (GET /metrics). Se añade el último
+# para que sea el más externo y mida también al resto de middlewares.
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Token obligatorio en /clientes: lector solo lee, admin también escribe
+app.include_router(clientes.router, dependencies=[Depends(auth.autorizar)])
+app.include_router(auth_router.router)
+
+
+# Pool agotado (MySQL lento o demasiadas peticiones): 503 para que el
+# cliente reintente, no un 500
+@app.exception_handler(PoolTimeout)
+async def pool_agotado(request, exc: PoolTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Base de datos saturada, vuelve a intentarlo en unos segundos"},
+        headers={"Retry-After": "1"}
+    )
 
 
 @app.get("/")
@@ -27,3 +93,103 @@ def root():
     return {
         "mensaje": "API de Clientes activa 🚀"
     }
+
+
+@app.get("/stats", tags=["Sistema"])
+def stats():
+    return {
+        "modo": modo(),
+        "pool": pool_stats(),
+        "replicas": replicas_stats(),
+        "cache": cache_stats(),
+        "single_flight": single_flight_stats(),
+        "group_commit": group_commit_stats(),
+        "admision": admision.stats(),
+        "eventos": eventos.broker.stats(),
+        "auth": auth.stats()
+    }
+
+
+# =========================
+# Health checks (balanceador de carga)
+# =========================
+@app.get("/health/live", tags=["Sistema"])
+def health_live():
+    """El proceso responde. No mira MySQL: reiniciar el worker no lo arreglaría."""
+    return {"estado": "ok"}
+
+
+@app.get("/health/ready", tags=["Sistema"])
+async def health_ready():
+    """
+    El worker puede atender tráfico: ya arrancó (y precalentó el pool) y
+    MySQL responde. Si no, 503 y el balanceador deja de enviarle peticiones.
+    """
+    error = await comprobar_bd()
+    if error is not None:
+        return JSONResponse(
+            status_code=503,
+            content={"estado": "no_listo", "bd": error}
+        )
+    return {"estado": "listo", "bd": "ok"}
+
+
+# =========================
+# GET /metrics (Prometheus)
+# =========================
+_POOL_GAUGES = ("abiertas", "libres", "en_uso", "esperando")
+_POOL_COUNTERS = ("prestamos", "timeouts", "creadas", "recicladas", "descartadas")
+
+
+@metrics.registro.colector
+def _metricas_pool_y_cache():
+    pools = [pool_stats()]
+    replicas = replicas_stats()
+    if replicas:
+        pools += replicas["replicas"]
+    cache = cache_stats()
+
+    def series(clave):
+        return [((pool["nombre"], modo()), pool[clave]) for pool in pools]
+
+    lineas = []
+    for clave in _POOL_GAUGES:
+        lineas += metrics.lineas(
+            f"db_pool_{clave}", f"Conexiones del pool: {clave}", "gauge",
+            ("pool", "modo"), series(clave)
+        )
+    for clave in _POOL_COUNTERS:
+        lineas += metrics.lineas(
+            f"db_pool_{clave}_total", f"Conexiones del pool: {clave}", "counter",
+            ("pool", "modo"), series(clave)
+        )
+    lineas += metrics.lineas(
+        "db_pool_espera_seconds_total", "Tiempo total esperando una conexión libre",
+        "counter", ("pool", "modo"), series("espera_total_s")
+    )
+    if replicas:
+        lineas += metrics.lineas(
+            "db_replica_sana", "1 si la réplica recibe lecturas", "gauge",
+            ("pool", "modo"), [((r["nombre"], modo()), int(r["sana"])) for r in replicas["replicas"]]
+        )
+        lineas += metrics.lineas(
+            "db_replica_lecturas_en_primario_total",
+            "Lecturas enviadas al primario por no haber réplicas sanas", "counter",
+            ("modo",), [((modo(),), replicas["lecturas_en_primario"])]
+        )
+
+    lineas += metrics.lineas(
+        "cache_clientes_entradas", "Entradas en la caché de clientes", "gauge",
+        (), [((), cache["entradas"])]
+    )
+    for clave in ("hits", "misses", "expirados", "expulsados", "invalidaciones"):
+        lineas += metrics.lineas(
+            f"cache_clientes_{clave}_total", f"Caché de clientes: {clave}", "counter",
+            (), [((), cache[clave])]
+        )
+    return lineas
+
+
+@app.get("/metrics", tags=["Sistema"], include_in_schema=False)
+def metricas():
+    return Response(metrics.registro.exposicion(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,287 @@
+# app/metrics.py
+#
+# Métricas en formato de texto de Prometheus (GET /metrics), sin
+# dependencias externas.
+#
+# Pensadas para dejarlas siempre activas: cada observación es una búsqueda
+# en un dict y una suma bajo un lock; el trabajo de formatear se hace solo
+# cuando Prometheus pide /metrics.
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+from app import config
+
+logger = logging.getLogger("app.slow_queries")
+
+# Buckets (segundos) para latencias de peticiones y consultas
+BUCKETS_LATENCIA = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Buckets para número de filas devueltas
+BUCKETS_FILAS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: tuple, valores: tuple, extra: str = "") -> str:
+    partes = [
+        f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)
+    ]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def _cabecera(self) -> list:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Counter(_Metrica):
+    tipo = "counter"
+
+    def inc(self, *valores, cantidad: float = 1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self) -> list:
+        with self._lock:
+            valores = list(self._valores.items())
+        lineas = self._cabecera()
+        for etiquetas, valor in sorted(valores):
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {_numero(valor)}")
+        return lineas
+
+
+class Gauge(Counter):
+    tipo = "gauge"
+
+    def set(self, *valores, valor: float):
+        with self._lock:
+            self._valores[valores] = valor
+
+
+class Histogram(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *valores, valor: float):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(valores)
+            if serie is None:
+                # [conteos por bucket (+Inf al final), suma]
+                serie = self._valores[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exponer(self) -> list:
+        with self._lock:
+            valores = [(k, list(conteos), suma) for k, (conteos, suma) in self._valores.items()]
+        lineas = self._cabecera()
+        for etiquetas, conteos, suma in sorted(valores):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = _etiquetas(self.etiquetas, etiquetas, f'le="{_numero(float(limite))}"')
+                lineas.append(f"{self.nombre}_bucket{le} {acumulado}")
+            base = _etiquetas(self.etiquetas, etiquetas)
+            lineas.append(f"{self.nombre}_sum{base} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{base} {acumulado}")
+        return lineas
+
+
+class Registro:
+    def __init__(self):
+        self._metricas = []
+        self._colectores = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def colector(self, funcion):
+        """`funcion()` se llama en cada /metrics y devuelve líneas de texto."""
+        self._colectores.append(funcion)
+        return funcion
+
+    def exposicion(self) -> str:
+        lineas = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.exponer())
+        for colector in self._colectores:
+            try:
+                lineas.extend(colector())
+            except Exception:
+                logger.exception("Error en un colector de métricas")
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# =========================
+# HTTP
+# =========================
+http_peticiones = registro.registrar(Counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+))
+http_latencia = registro.registrar(Histogram(
+    "http_request_duration_seconds", "Duración de las peticiones HTTP", ("method", "route")
+))
+http_en_curso = registro.registrar(Gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso", ()
+))
+http_render = registro.registrar(Histogram(
+    "http_response_render_seconds", "Tiempo de serialización del cuerpo JSON", ()
+))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, que añade una tarea y copias
+    del cuerpo por petición) que mide cada petición HTTP.
+
+    La ruta se etiqueta con su plantilla (`/clientes/{cliente_id}`), no con
+    la URL real, para no crear una serie por cada id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = {"status": 500}
+
+        async def send_con_status(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+            await send(mensaje)
+
+        http_en_curso.inc(cantidad=1)
+        try:
+            await self.app(scope, receive, send_con_status)
+        finally:
+            http_en_curso.inc(cantidad=-1)
+            ruta = scope.get("route")
+            plantilla = getattr(ruta, "path", None) or "sin_ruta"
+            metodo = scope["method"]
+            http_latencia.observe(metodo, plantilla, valor=time.perf_counter() - inicio)
+            http_peticiones.inc(metodo, plantilla, estado["status"])
+
+
+# =========================
+# Base de datos
+# =========================
+db_conexion = registro.registrar(Histogram(
+    "db_connect_duration_seconds", "Tiempo de apertura de conexiones MySQL", ("capa",)
+))
+db_errores_conexion = registro.registrar(Counter(
+    "db_connect_errors_total", "Errores al abrir conexiones MySQL", ("capa",)
+))
+db_consulta = registro.registrar(Histogram(
+    "db_query_duration_seconds", "Duración de las consultas (execute + fetch)",
+    ("capa", "operacion")
+))
+db_filas = registro.registrar(Histogram(
+    "db_query_rows", "Filas devueltas o afectadas por consulta",
+    ("capa", "operacion"), buckets=BUCKETS_FILAS
+))
+db_lentas = registro.registrar(Counter(
+    "db_slow_queries_total", "Consultas por encima de DB_SLOW_QUERY_MS", ("capa", "operacion")
+))
+
+
+@contextmanager
+def medir_conexion(capa: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        db_errores_conexion.inc(capa)
+        raise
+    db_conexion.observe(capa, valor=time.perf_counter() - inicio)
+
+
+class _Consulta:
+    __slots__ = ("filas",)
+
+    def __init__(self):
+        self.filas = None
+
+
+@contextmanager
+def medir_consulta(capa: str, operacion: str, sql: str = None):
+    """
+    Mide una consulta (execute + fetch). Quien la usa puede indicar las
+    filas con `m.filas = ...`:
+
+        with medir_consulta("sync", "get_cliente_by_id", sql) as m:
+            cursor.execute(sql, params)
+            m.filas = len(cursor.fetchall())
+
+    Si tarda más de DB_SLOW_QUERY_MS se registra en el log de consultas
+    lentas (solo el SQL, nunca los parámetros: pueden llevar datos personales).
+    """
+    medida = _Consulta()
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        segundos = time.perf_counter() - inicio
+        if config.METRICS_ENABLED:
+            db_consulta.observe(capa, operacion, valor=segundos)
+            if medida.filas is not None:
+                db_filas.observe(capa, operacion, valor=medida.filas)
+
+        umbral = config.DB_SLOW_QUERY_MS
+        if umbral and segundos * 1000 >= umbral:
+            db_lentas.inc(capa, operacion)
+            logger.warning(
+                "Consulta lenta (%s/%s, %.1f ms, filas=%s): %s",
+                capa, operacion, segundos * 1000, medida.filas,
+                " ".join((sql or "").split())[:500]
+            )
+
+
+def lineas(nombre: str, ayuda: str, tipo: str, etiquetas: tuple, series: list) -> list:
+    """
+    Métrica calculada en el momento de la consulta (para colectores):
+    `series` es una lista de `(valores_de_etiquetas, valor)`.
+    """
+    resultado = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+    for valores, valor in series:
+        resultado.append(f"{nombre}{_etiquetas(etiquetas, valores)} {_numero(valor)}")
+    return resultado
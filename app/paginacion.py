@@ -0,0 +1,134 @@
+# app/paginacion.py
+
+import base64
+import json
+from typing import Optional
+
+from app.queries import COLUMNAS_CLIENTE
+
+# Columnas por las que se puede ordenar y filtrar el listado.
+# Cada una tiene un índice (columna, id) en docs/init_db.sql, de modo que
+# cada página es un recorrido por rango del índice y no un full scan.
+COLUMNAS_ORDEN = ("id", "nombre", "apellido", "email")
+COLUMNAS_FILTRO = ("nombre", "apellido", "email")
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no se puede decodificar o no encaja con el orden."""
+
+
+def parse_sort(sort: str) -> tuple:
+    """'apellido' -> ('apellido', False); '-apellido' -> ('apellido', True)"""
+    descendente = sort.startswith("-")
+    columna = sort[1:] if descendente else sort
+
+    if columna not in COLUMNAS_ORDEN:
+        raise ValueError(
+            f"Orden no válido. Opciones: {', '.join(COLUMNAS_ORDEN)} "
+            "(prefijo '-' para descendente)"
+        )
+
+    return columna, descendente
+
+
+# =========================
+# Cursor opaco
+# =========================
+def encode_cursor(sort: str, fila: dict) -> str:
+    columna, _ = parse_sort(sort)
+    datos = {"s": sort, "id": fila["id"]}
+    if columna != "id":
+        datos["v"] = fila[columna]
+
+    crudo = json.dumps(datos, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> dict:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(datos, dict) or not isinstance(datos.get("id"), int):
+            raise ValueError
+    except ValueError as e:
+        raise CursorInvalido("Cursor no válido") from e
+
+    if datos.get("s") != sort:
+        raise CursorInvalido("El cursor no corresponde al orden solicitado")
+
+    columna, _ = parse_sort(sort)
+    if columna != "id" and not isinstance(datos.get("v"), str):
+        raise CursorInvalido("Cursor no válido")
+
+    return datos
+
+
+# =========================
+# Construcción de la consulta
+# =========================
+def escape_like(valor: str) -> str:
+    return (
+        valor.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+def build_page_query(
+    limit: int,
+    sort: str = "id",
+    cursor: Optional[dict] = None,
+    filtros: Optional[dict] = None
+) -> tuple:
+    """
+    Devuelve (sql, params) para una página de clientes con paginación keyset.
+
+    Se pide `limit + 1` filas para saber si existe una página siguiente
+    sin necesidad de un COUNT(*).
+    """
+    columna, descendente = parse_sort(sort)
+    comparador = "<" if descendente else ">"
+    direccion = "DESC" if descendente else "ASC"
+
+    condiciones = []
+    params = []
+
+    # Filtros por prefijo: LIKE 'valor%' aprovecha el índice de la columna
+    for campo, valor in (filtros or {}).items():
+        if campo not in COLUMNAS_FILTRO:
+            raise ValueError(f"Filtro no válido: {campo}")
+        if valor:
+            condiciones.append(f"{campo} LIKE %s")
+            params.append(escape_like(valor) + "%")
+
+    if cursor is not None:
+        if columna == "id":
+            condiciones.append(f"id {comparador} %s")
+            params.append(cursor["id"])
+        else:
+            condiciones.append(
+                f"({columna} {comparador} %s OR ({columna} = %s AND id {comparador} %s))"
+            )
+            params.extend([cursor["v"], cursor["v"], cursor["id"]])
+
+    sql = f"SELECT {COLUMNAS_CLIENTE} FROM clientes"
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+
+    if columna == "id":
+        sql += f" ORDER BY id {direccion}"
+    else:
+        sql += f" ORDER BY {columna} {direccion}, id {direccion}"
+
+    sql += " LIMIT %s"
+    params.append(limit + 1)
+
+    return sql, tuple(params)
+
+
+def split_page(filas: list, limit: int, sort: str) -> tuple:
+    """Separa las filas de la página y calcula el `next_cursor`."""
+    if len(filas) > limit:
+        filas = filas[:limit]
+        return filas, encode_cursor(sort, filas[-1])
+    return filas, None
@@ -0,0 +1,383 @@
+# app/pool.py
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+import threading
+import time
+
+from mysql.connector import errors
+
+
+class PoolTimeout(Exception):
+    """No se obtuvo una conexión libre dentro del tiempo de espera."""
+
+
+# Errores que indican que la conexión quedó inservible y no debe reutilizarse
+ERRORES_DE_CONEXION = (errors.OperationalError, errors.InterfaceError)
+
+
+class _Entrada:
+    """Conexión abierta junto con sus marcas de tiempo."""
+
+    __slots__ = ("conn", "creada", "usada")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.creada = time.monotonic()
+        self.usada = self.creada
+
+
+class _BasePool:
+    """
+    Configuración y estadísticas comunes a los pools síncrono y asíncrono.
+
+    - `size` conexiones se mantienen abiertas y se reutilizan.
+    - Hasta `max_overflow` conexiones extra se abren en picos de carga
+      y se cierran al devolverse si ya hay `size` libres.
+    - Al prestar una conexión se recicla si superó `recycle` segundos
+      de vida y, si lleva tiempo parada, se comprueba con un ping.
+    """
+
+    def __init__(
+        self,
+        factory,
+        size: int = 5,
+        max_overflow: int = 10,
+        timeout: float = 30.0,
+        recycle: int = 1800,
+        pre_ping: bool = True,
+        ping_interval: float = 5.0,
+        nombre: str = "default",
+    ):
+        self.factory = factory
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.ping_interval = ping_interval
+        self.nombre = nombre
+
+        self._libres = deque()
+        self._abiertas = 0
+        self._en_uso = 0
+        self._esperando = 0
+
+        # Estadísticas acumuladas
+        self._prestamos = 0
+        self._timeouts = 0
+        self._creadas = 0
+        self._recicladas = 0
+        self._descartadas = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+
+    def _hay_hueco(self) -> bool:
+        return self._abiertas < self.size + self.max_overflow
+
+    def _timeout_error(self) -> PoolTimeout:
+        self._timeouts += 1
+        return PoolTimeout(
+            f"Pool '{self.nombre}' agotado: sin conexiones libres "
+            f"tras {self.timeout:.1f}s"
+        )
+
+    def _registrar_prestamo(self, inicio: float):
+        self._en_uso += 1
+        self._prestamos += 1
+        espera = time.perf_counter() - inicio
+        self._espera_total += espera
+        if espera > self._espera_max:
+            self._espera_max = espera
+
+    def _caducada(self, entrada: _Entrada) -> bool:
+        if self.recycle and time.monotonic() - entrada.creada > self.recycle:
+            self._recicladas += 1
+            return True
+        return False
+
+    def _necesita_ping(self, entrada: _Entrada) -> bool:
+        return self.pre_ping and time.monotonic() - entrada.usada >= self.ping_interval
+
+    def _devolver(self, entrada: _Entrada, rota: bool) -> bool:
+        """Contabiliza la devolución. Devuelve True si hay que cerrarla."""
+        self._en_uso -= 1
+        if rota or len(self._libres) >= self.size:
+            self._abiertas -= 1
+            if rota:
+                self._descartadas += 1
+            return True
+
+        entrada.usada = time.monotonic()
+        self._libres.append(entrada)
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "nombre": self.nombre,
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "abiertas": self._abiertas,
+            "libres": len(self._libres),
+            "en_uso": self._en_uso,
+            "esperando": self._esperando,
+            "prestamos": self._prestamos,
+            "timeouts": self._timeouts,
+            "creadas": self._creadas,
+            "recicladas": self._recicladas,
+            "descartadas": self._descartadas,
+            "espera_total_s": round(self._espera_total, 6),
+            "espera_media_ms": round(
+                self._espera_total / self._prestamos * 1000, 3
+            ) if self._prestamos else 0.0,
+            "espera_max_ms": round(self._espera_max * 1000, 3),
+        }
+
+
+# =========================
+# Pool síncrono (hilos)
+# =========================
+class ConnectionPool(_BasePool):
+    """Pool thread-safe para mysql.connector."""
+
+    def __init__(self, factory, **kwargs):
+        super().__init__(factory, **kwargs)
+        self._cond = threading.Condition()
+
+    # =========================
+    # Préstamo / devolución
+    # =========================
+    @contextmanager
+    def connection(self):
+        entrada = self._checkout()
+        try:
+            yield entrada.conn
+        except ERRORES_DE_CONEXION:
+            self._checkin(entrada, rota=True)
+            raise
+        except BaseException:
+            self._checkin(entrada)
+            raise
+        else:
+            self._checkin(entrada)
+
+    def _checkout(self) -> _Entrada:
+        inicio = time.perf_counter()
+        limite = inicio + self.timeout
+        entrada = None
+
+        with self._cond:
+            self._esperando += 1
+            try:
+                while True:
+                    if self._libres:
+                        entrada = self._libres.pop()
+                        break
+                    if self._hay_hueco():
+                        self._abiertas += 1
+                        break
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        raise self._timeout_error()
+                    self._cond.wait(restante)
+            finally:
+                self._esperando -= 1
+
+            self._registrar_prestamo(inicio)
+
+        # La red se toca fuera del lock
+        try:
+            if entrada is None:
+                entrada = self._crear()
+            elif not self._sana(entrada):
+                self._cerrar(entrada.conn)
+                entrada = self._crear()
+        except BaseException:
+            with self._cond:
+                self._abiertas -= 1
+                self._en_uso -= 1
+                self._cond.notify()
+            raise
+
+        entrada.usada = time.monotonic()
+        return entrada
+
+    def _checkin(self, entrada: _Entrada, rota: bool = False):
+        if not rota:
+            try:
+                # Nunca devolver al pool una transacción a medias: además de
+                # bloqueos, dejaría fija la instantánea de lecturas anteriores
+                if entrada.conn.in_transaction:
+                    entrada.conn.rollback()
+            except Exception:
+                # Incluye "Unread result found" cuando un cursor sin buffer
+                # se abandonó a medias: esa conexión ya no es reutilizable
+                rota = True
+
+        with self._cond:
+            cerrar = self._devolver(entrada, rota)
+            self._cond.notify()
+
+        if cerrar:
+            self._cerrar(entrada.conn)
+
+    # =========================
+    # Salud de las conexiones
+    # =========================
+    def _crear(self) -> _Entrada:
+        entrada = _Entrada(self.factory())
+        with self._cond:
+            self._creadas += 1
+        return entrada
+
+    def _sana(self, entrada: _Entrada) -> bool:
+        with self._cond:
+            if self._caducada(entrada):
+                return False
+        if self._necesita_ping(entrada):
+            try:
+                entrada.conn.ping(reconnect=False)
+            except ERRORES_DE_CONEXION:
+                with self._cond:
+                    self._descartadas += 1
+                return False
+        return True
+
+    @staticmethod
+    def _cerrar(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Cierra todas las conexiones libres (p. ej. al apagar la app)."""
+        with self._cond:
+            libres = list(self._libres)
+            self._libres.clear()
+            self._abiertas -= len(libres)
+        for entrada in libres:
+            self._cerrar(entrada.conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return super().stats()
+
+
+# =========================
+# Pool asíncrono (asyncio)
+# =========================
+class AsyncConnectionPool(_BasePool):
+    """
+    Mismo pool para mysql.connector.aio. Vive en un único event loop, por lo
+    que los contadores no necesitan lock: solo se esperan conexiones libres.
+    """
+
+    def __init__(self, factory, **kwargs):
+        super().__init__(factory, **kwargs)
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def connection(self):
+        entrada = await self._checkout()
+        try:
+            yield entrada.conn
+        except ERRORES_DE_CONEXION:
+            await self._checkin(entrada, rota=True)
+            raise
+        except BaseException:
+            await self._checkin(entrada)
+            raise
+        else:
+            await self._checkin(entrada)
+
+    async def _checkout(self) -> _Entrada:
+        inicio = time.perf_counter()
+        limite = inicio + self.timeout
+        entrada = None
+
+        self._esperando += 1
+        try:
+            async with self._cond:
+                while True:
+                    if self._libres:
+                        entrada = self._libres.pop()
+                        break
+                    if self._hay_hueco():
+                        self._abiertas += 1
+                        break
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        raise self._timeout_error()
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), restante)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self._esperando -= 1
+
+        self._registrar_prestamo(inicio)
+
+        try:
+            if entrada is None:
+                entrada = await self._crear()
+            elif not await self._sana(entrada):
+                await self._cerrar(entrada.conn)
+                entrada = await self._crear()
+        except BaseException:
+            self._abiertas -= 1
+            self._en_uso -= 1
+            await self._notificar()
+            raise
+
+        entrada.usada = time.monotonic()
+        return entrada
+
+    async def _checkin(self, entrada: _Entrada, rota: bool = False):
+        if not rota:
+            try:
+                if entrada.conn.in_transaction:
+                    await entrada.conn.rollback()
+            except Exception:
+                rota = True
+
+        cerrar = self._devolver(entrada, rota)
+        await self._notificar()
+
+        if cerrar:
+            await self._cerrar(entrada.conn)
+
+    async def _notificar(self):
+        async with self._cond:
+            self._cond.notify()
+
+    async def _crear(self) -> _Entrada:
+        entrada = _Entrada(await self.factory())
+        self._creadas += 1
+        return entrada
+
+    async def _sana(self, entrada: _Entrada) -> bool:
+        if self._caducada(entrada):
+            return False
+        if self._necesita_ping(entrada):
+            try:
+                await entrada.conn.ping(reconnect=False)
+            except ERRORES_DE_CONEXION:
+                self._descartadas += 1
+                return False
+        return True
+
+    @staticmethod
+    async def _cerrar(conn):
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    async def dispose(self):
+        libres = list(self._libres)
+        self._libres.clear()
+        self._abiertas -= len(libres)
+        for entrada in libres:
+            await self._cerrar(entrada.conn)
@@ -0,0 +1,217 @@
+# app/queries.py
+#
+# SQL compartido por la capa de datos síncrona (app/database.py) y la
+# asíncrona (app/database_async.py). Aquí solo se construyen sentencias y
+# parámetros; ejecutarlas es cosa de cada capa.
+
+from collections import Counter
+
+COLUMNAS_CLIENTE = "id, nombre, apellido, email, telefono, direccion, version"
+
+COLUMNAS_INSERT = ("nombre", "apellido", "email", "telefono", "direccion")
+
+SELECT_ALL = "SELECT * FROM clientes"
+
+SELECT_BY_ID = "SELECT * FROM clientes WHERE id = %s"
+
+SELECT_EXPORT = f"SELECT {COLUMNAS_CLIENTE} FROM clientes ORDER BY id"
+
+INSERT_CLIENTE = """
+    INSERT INTO clientes (nombre, apellido, email, telefono, direccion)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Cada escritura incrementa `version` (concurrencia optimista). Con
+# LAST_INSERT_ID(expr) MySQL devuelve la nueva versión en el propio OK del
+# UPDATE (cursor.lastrowid), sin necesidad de otro SELECT. Las conexiones se
+# abren con CLIENT_FOUND_ROWS, así que rowcount cuenta filas encontradas
+# aunque los valores no cambien: rowcount 0 significa "no existe" (o versión
+# distinta si se filtra por ella).
+_SET_VERSION = "version = LAST_INSERT_ID(version + 1)"
+
+UPDATE_CLIENTE = f"""
+    UPDATE clientes
+    SET nombre=%s, apellido=%s, email=%s, telefono=%s, direccion=%s,
+        {_SET_VERSION}
+    WHERE id=%s
+"""
+
+DELETE_CLIENTE = "DELETE FROM clientes WHERE id=%s"
+
+SELECT_VERSION = "SELECT version FROM clientes WHERE id = %s"
+
+# Estado del listado para su ETag (app/cache.py): cambia con cada alta (id
+# máximo), baja (número de filas) y modificación (suma de versiones). Como
+# los ids y las versiones solo crecen, dos estados iguales son los mismos datos
+SELECT_ESTADO_CLIENTES = (
+    "SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(version), 0) FROM clientes"
+)
+
+
+def select_by_ids(ids) -> tuple:
+    """Varios clientes por id en una sola consulta (IN por la clave primaria)."""
+    ids = list(ids)
+    marcadores = ", ".join(["%s"] * len(ids))
+    return f"SELECT {COLUMNAS_CLIENTE} FROM clientes WHERE id IN ({marcadores})", ids
+
+
+class ConflictoDeVersion(Exception):
+    """El cliente existe pero su versión no es la esperada (If-Match)."""
+
+    def __init__(self, version_actual: int):
+        super().__init__(f"Versión actual: {version_actual}")
+        self.version_actual = version_actual
+
+
+def valores_insert(data: dict) -> tuple:
+    return tuple(data.get(columna) for columna in COLUMNAS_INSERT)
+
+
+def valores_update(cliente_id: int, data: dict) -> tuple:
+    return (
+        data["nombre"],
+        data["apellido"],
+        data["email"],
+        data.get("telefono") if data.get("telefono") else None,
+        data.get("direccion") if data.get("direccion") else None,
+        cliente_id
+    )
+
+
+def build_update(cliente_id: int, data: dict, version: int = None) -> tuple:
+    """UPDATE completo (PUT); con `version` solo afecta a esa versión."""
+    query, values = UPDATE_CLIENTE, valores_update(cliente_id, data)
+    if version is not None:
+        query += " AND version=%s"
+        values += (version,)
+    return query, values
+
+
+def build_patch(cliente_id: int, campos: dict, version: int = None) -> tuple:
+    """UPDATE parcial (PATCH) de los campos recibidos."""
+    asignaciones = []
+    values = []
+    for columna in COLUMNAS_INSERT:
+        if columna in campos:
+            asignaciones.append(f"{columna}=%s")
+            values.append(campos[columna] if campos[columna] != "" else None)
+    asignaciones.append(_SET_VERSION)
+
+    query = f"UPDATE clientes SET {', '.join(asignaciones)} WHERE id=%s"
+    values.append(cliente_id)
+    if version is not None:
+        query += " AND version=%s"
+        values.append(version)
+    return query, tuple(values)
+
+
+def representacion(cliente_id: int, data: dict, version: int) -> dict:
+    """
+    Fila tal y como queda en la BD tras un INSERT/UPDATE completo, construida
+    con los datos ya validados: evita releerla con otro SELECT.
+    """
+    cliente = {"id": cliente_id}
+    for columna in COLUMNAS_INSERT:
+        valor = data.get(columna)
+        cliente[columna] = valor if valor != "" else None
+    cliente["version"] = version
+    return cliente
+
+
+# =========================
+# Altas masivas
+# =========================
+def select_ids_por_email(emails) -> tuple:
+    emails = list(emails)
+    marcadores = ", ".join(["%s"] * len(emails))
+    return f"SELECT id, email, version FROM clientes WHERE email IN ({marcadores})", emails
+
+
+def plan_bulk(lote: list, existentes: dict, upsert: bool) -> tuple:
+    """
+    Decide qué hacer con cada `(indice, data)` del lote a partir de los
+    emails que ya existen (`{email en minúsculas: (id, version)}`).
+
+    Un email ya existente (o repetido dentro del propio lote) es un
+    duplicado, salvo en modo upsert, donde se actualiza la fila.
+
+    Devuelve `({indice: (estado, id)}, pendientes)`, donde `pendientes`
+    son las filas que hay que escribir.
+    """
+    resultado = {}
+    vistos = set()
+    pendientes = []
+
+    for indice, data in lote:
+        clave = data["email"].lower()
+        if clave in existentes or clave in vistos:
+            if not upsert:
+                resultado[indice] = ("duplicado", existentes.get(clave, (None,))[0])
+                continue
+            resultado[indice] = ("actualizado", None)
+        else:
+            resultado[indice] = ("creado", None)
+        vistos.add(clave)
+        pendientes.append((indice, data))
+
+    return resultado, pendientes
+
+
+def build_bulk_insert(pendientes: list, upsert: bool) -> tuple:
+    valores = []
+    for _, data in pendientes:
+        valores.extend(valores_insert(data))
+    filas = ", ".join(["(%s, %s, %s, %s, %s)"] * len(pendientes))
+
+    query = f"INSERT INTO clientes ({', '.join(COLUMNAS_INSERT)}) VALUES {filas}"
+    if upsert:
+        query += " ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{columna}=VALUES({columna})" for columna in COLUMNAS_INSERT
+            if columna != "email"
+        ) + ", version = version + 1"
+
+    return query, valores
+
+
+def asignar_ids(resultado: dict, pendientes: list, filas: dict, upsert: bool):
+    """
+    Con INSERT multi-fila lastrowid solo da el primer id y los siguientes
+    no tienen por qué ser consecutivos: se asignan a partir de los emails
+    (`filas` = `{email en minúsculas: (id, version)}` tras el INSERT).
+
+    En modo upsert, "creado" o "actualizado" sale de la `version` final y no
+    de la consulta de existentes previa al INSERT: si otra petición insertó
+    el email entre medias, el ON DUPLICATE KEY lo ha actualizado. Un alta
+    deja version 1 y cada actualización suma uno, así que con el mismo email
+    n veces en el lote la primera aparición es un alta si la versión es n.
+    """
+    apariciones = Counter(data["email"].lower() for _, data in pendientes)
+    vistos = set()
+    for indice, data in pendientes:
+        clave = data["email"].lower()
+        estado, _ = resultado[indice]
+        id_, version = filas.get(clave, (None, None))
+        if upsert and id_ is not None:
+            creado = clave not in vistos and version == apariciones[clave]
+            estado = "creado" if creado else "actualizado"
+            vistos.add(clave)
+        resultado[indice] = (estado, id_)
+
+
+# =========================
+# Usuarios (autenticación)
+# =========================
+SELECT_USUARIO = """
+    SELECT u.id, u.username, u.email, u.password_hash, u.activo, r.nombre AS rol
+    FROM usuarios u JOIN roles r ON r.id = u.rol_id
+"""
+
+SELECT_USUARIO_BY_ID = SELECT_USUARIO + " WHERE u.id = %s"
+
+SELECT_USUARIO_BY_USERNAME = SELECT_USUARIO + " WHERE u.username = %s"
+
+# 0 filas si el rol no existe
+INSERT_USUARIO = """
+    INSERT INTO usuarios (username, email, password_hash, rol_id)
+    SELECT %s, %s, %s, id FROM roles WHERE nombre = %s
+"""
@@ -0,0 +1,162 @@
+# app/replicas.py
+#
+# Reparto de lecturas entre réplicas de MySQL (lógica común a la capa
+# síncrona y a la asíncrona; cada una crea sus propios pools).
+#
+# - Las lecturas van a una réplica sana (por turnos); las escrituras, al
+#   primario.
+# - Una réplica que falla al conectar se expulsa DB_REPLICA_EJECT_SECONDS
+#   y luego se vuelve a probar. Sin réplicas sanas se lee del primario.
+# - Read-your-writes: tras una escritura, las lecturas del mismo cliente
+#   van al primario durante DB_RYW_WINDOW segundos, para no leer de una
+#   réplica que aún no ha recibido el cambio. Dentro de la petición se usa
+#   una ContextVar; entre peticiones, una cookie (funciona aunque cada
+#   petición caiga en un worker distinto).
+
+from contextvars import ContextVar
+import itertools
+import logging
+import threading
+import time
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+COOKIE_PRIMARIO = "db_primario"
+
+# Estado de la petición en curso: {"hasta": epoch, "escrito": bool}. Es un
+# dict mutable para que lo que se marque en la ruta (o en el threadpool) lo
+# vea después el middleware al preparar la respuesta.
+_peticion: ContextVar = ContextVar("db_peticion", default=None)
+
+
+# =========================
+# Read-your-writes
+# =========================
+def marcar_escritura():
+    """Tras escribir: leer del primario durante la ventana configurada."""
+    estado = _peticion.get()
+    if estado is not None and config.DB_RYW_WINDOW > 0:
+        estado["hasta"] = time.time() + config.DB_RYW_WINDOW
+        estado["escrito"] = True
+
+
+def leer_de_primario() -> bool:
+    estado = _peticion.get()
+    return estado is not None and estado["hasta"] > time.time()
+
+
+def _cookie(cabeceras: list) -> str:
+    for nombre, valor in cabeceras:
+        if nombre == b"cookie":
+            for parte in valor.decode("latin-1").split(";"):
+                clave, _, dato = parte.strip().partition("=")
+                if clave == COOKIE_PRIMARIO:
+                    return dato
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """
+    Lee la cookie `db_primario` al entrar y, si la petición escribió,
+    la renueva en la respuesta (HttpOnly, expira con la ventana).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            hasta = float(_cookie(scope["headers"]) or 0)
+        except ValueError:
+            hasta = 0.0
+
+        estado = {"hasta": hasta, "escrito": False}
+        token = _peticion.set(estado)
+
+        async def send_con_cookie(mensaje):
+            if mensaje["type"] == "http.response.start" and estado["escrito"]:
+                cookie = (
+                    f"{COOKIE_PRIMARIO}={estado['hasta']:.3f}; "
+                    f"Max-Age={int(config.DB_RYW_WINDOW) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_cookie)
+        finally:
+            _peticion.reset(token)
+
+
+# =========================
+# Réplicas y expulsión
+# =========================
+class Replica:
+    def __init__(self, nombre: str, opciones: dict, pool):
+        self.nombre = nombre
+        self.opciones = opciones
+        self.pool = pool
+        self.expulsada_hasta = 0.0
+        self.expulsiones = 0
+        self.ultimo_error = None
+
+    def sana(self, ahora: float) -> bool:
+        return self.expulsada_hasta <= ahora
+
+
+class ReplicaSet:
+    """Réplicas de una capa de datos con su estado de salud."""
+
+    def __init__(self, replicas: list, expulsion: float):
+        self.replicas = replicas
+        self.expulsion = expulsion
+        self._turno = itertools.count()
+        self._lock = threading.Lock()
+        self.lecturas_en_primario = 0
+
+    def candidatas(self) -> list:
+        """Réplicas sanas, empezando por la siguiente en el turno."""
+        ahora = time.monotonic()
+        sanas = [r for r in self.replicas if r.sana(ahora)]
+        if not sanas:
+            return []
+        inicio = next(self._turno) % len(sanas)
+        return sanas[inicio:] + sanas[:inicio]
+
+    def expulsar(self, replica: Replica, error: Exception):
+        with self._lock:
+            replica.expulsada_hasta = time.monotonic() + self.expulsion
+            replica.expulsiones += 1
+            replica.ultimo_error = str(error)
+        logger.warning(
+            "Réplica %s expulsada %.0fs: %s", replica.nombre, self.expulsion, error
+        )
+
+    def sin_replica(self):
+        """Se leyó del primario porque ninguna réplica estaba disponible."""
+        with self._lock:
+            self.lecturas_en_primario += 1
+
+    def stats(self) -> dict:
+        ahora = time.monotonic()
+        return {
+            "lecturas_en_primario": self.lecturas_en_primario,
+            "replicas": [
+                {
+                    **replica.pool.stats(),
+                    "sana": replica.sana(ahora),
+                    "expulsada_s": round(max(0.0, replica.expulsada_hasta - ahora), 1),
+                    "expulsiones": replica.expulsiones,
+                    "ultimo_error": replica.ultimo_error,
+                }
+                for replica in self.replicas
+            ],
+        }
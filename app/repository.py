@@ -0,0 +1,349 @@
+# app/repository.py
+#
+# Punto de entrada único de las rutas a la capa de datos.
+# Según DB_ASYNC delega en la capa asíncrona (app/database_async.py) o en la
+# síncrona (app/database.py), que se ejecuta en el threadpool para no
+# bloquear el event loop. Así se pueden comparar ambas con el mismo código
+# de rutas.
+
+import asyncio
+import json
+import logging
+import time
+
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app import config, database, database_async, queries
+from app.replicas import leer_de_primario, marcar_escritura
+from app.cache import calcular_etag, clientes_cache, version_clientes
+from app.group_commit import GroupCommit
+from app.single_flight import lecturas
+
+logger = logging.getLogger(__name__)
+
+
+async def _llamar(funcion_sync, funcion_async, *args):
+    if config.DB_ASYNC:
+        return await funcion_async(*args)
+    return await run_in_threadpool(funcion_sync, *args)
+
+
+async def _leer(funcion_sync, funcion_async, *args):
+    """
+    Como `_llamar`, pero las lecturas idénticas simultáneas comparten una
+    sola consulta (app/single_flight.py). La clave incluye la generación de
+    la caché, que cambia con cada escritura: quien llega después de escribir
+    no se engancha a una consulta lanzada antes. También incluye si la
+    petición debe leer del primario (read-your-writes).
+    """
+    if not config.DB_SINGLE_FLIGHT:
+        return await _llamar(funcion_sync, funcion_async, *args)
+
+    clave = (
+        json.dumps(args, sort_keys=True, default=str),
+        leer_de_primario(),
+        clientes_cache.generacion(),
+    )
+    return await lecturas.hacer(
+        funcion_sync.__name__, clave,
+        lambda: _llamar(funcion_sync, funcion_async, *args)
+    )
+
+
+def modo() -> str:
+    return "async" if config.DB_ASYNC else "sync"
+
+
+def pool_stats() -> dict:
+    if config.DB_ASYNC:
+        return database_async.pool_stats()
+    return database.pool_stats()
+
+
+def replicas_stats() -> dict:
+    if config.DB_ASYNC:
+        return database_async.replicas_stats()
+    return database.replicas_stats()
+
+
+async def calentar_pools():
+    """Al arrancar el worker: conexiones abiertas antes de la primera petición."""
+    if config.DB_POOL_WARMUP <= 0:
+        return
+    try:
+        abiertas = await _llamar(
+            database.calentar_pool, database_async.calentar_pool, config.DB_POOL_WARMUP
+        )
+        logger.info("Pool precalentado: %s conexiones abiertas", abiertas)
+    except Exception as e:
+        # Sin MySQL el worker arranca igual; /health/ready lo indicará
+        logger.warning("No se pudo precalentar el pool: %s", e)
+
+
+_salud_bd = {"hasta": 0.0, "error": None}
+
+
+async def comprobar_bd() -> str:
+    """
+    None si MySQL responde en HEALTH_DB_TIMEOUT segundos; si no, el tipo de
+    error. El resultado se reutiliza HEALTH_DB_CACHE segundos.
+    """
+    if time.monotonic() < _salud_bd["hasta"]:
+        return _salud_bd["error"]
+
+    try:
+        await asyncio.wait_for(
+            _llamar(database.ping, database_async.ping), config.HEALTH_DB_TIMEOUT
+        )
+        error = None
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except Exception as e:
+        # El detalle (host, usuario...) solo va al log, no a la respuesta
+        logger.warning("Health check de MySQL fallido: %s", e)
+        error = type(e).__name__
+
+    _salud_bd["hasta"] = time.monotonic() + config.HEALTH_DB_CACHE
+    _salud_bd["error"] = error
+    return error
+
+
+async def close_pools():
+    await escrituras.cerrar()
+    await database_async.close_pool()
+    database.close_pool()
+
+
+def iter_clientes(chunk_size: int = 1000):
+    """Lotes de filas como iterador asíncrono en ambos modos."""
+    if config.DB_ASYNC:
+        return database_async.iter_clientes(chunk_size)
+    return iterate_in_threadpool(database.iter_clientes(chunk_size))
+
+
+async def get_all_clientes():
+    return await _leer(database.get_all_clientes, database_async.get_all_clientes)
+
+
+async def get_clientes_page(limit: int, sort: str, cursor: dict, filtros: dict):
+    return await _leer(
+        database.get_clientes_page, database_async.get_clientes_page,
+        limit, sort, cursor, filtros
+    )
+
+
+async def search_clientes(q: str, limit: int):
+    return await _leer(
+        database.search_clientes, database_async.search_clientes, q, limit
+    )
+
+
+async def get_cliente_con_etag(cliente_id: int):
+    """
+    Lectura a través de la caché: devuelve `(cliente, etag)` o None.
+    Solo se va a MySQL si el cliente no está en caché o ha caducado.
+    """
+    entrada = clientes_cache.get(cliente_id)
+    if entrada is not None:
+        return entrada
+
+    generacion = clientes_cache.generacion()
+    cliente = await _leer(
+        database.get_cliente_by_id, database_async.get_cliente_by_id, cliente_id
+    )
+    if cliente is None:
+        return None
+
+    entrada = (cliente, calcular_etag(cliente))
+    clientes_cache.set(cliente_id, entrada, generacion)
+    return entrada
+
+
+async def get_cliente_by_id(cliente_id: int):
+    entrada = await get_cliente_con_etag(cliente_id)
+    return entrada[0] if entrada else None
+
+
+async def get_clientes_by_ids(ids: list) -> tuple:
+    """
+    Varios clientes por id: `(clientes en el orden pedido, ids que no
+    existen)`. Los que están en caché no se consultan; el resto se lee con
+    una consulta IN por lote y se guarda en la caché.
+    """
+    ids = list(dict.fromkeys(ids))  # sin repetidos, manteniendo el orden
+    encontrados = {}
+    pendientes = []
+    for cliente_id in ids:
+        entrada = clientes_cache.get(cliente_id)
+        if entrada is not None:
+            encontrados[cliente_id] = entrada[0]
+        else:
+            pendientes.append(cliente_id)
+
+    if pendientes:
+        generacion = clientes_cache.generacion()
+        leidos = await _llamar(
+            database.get_clientes_by_ids, database_async.get_clientes_by_ids, pendientes
+        )
+        for cliente_id, cliente in leidos.items():
+            clientes_cache.set(cliente_id, (cliente, calcular_etag(cliente)), generacion)
+        encontrados.update(leidos)
+
+    clientes = [encontrados[i] for i in ids if i in encontrados]
+    no_encontrados = [i for i in ids if i not in encontrados]
+    return clientes, no_encontrados
+
+
+def _invalidar(cliente_id: int):
+    """
+    Tras una escritura: fuera de la caché, nueva versión del listado y
+    lecturas de este cliente al primario durante un rato (read-your-writes).
+    """
+    clientes_cache.invalidate(cliente_id)
+    version_clientes.invalidar()
+    marcar_escritura()
+
+
+async def etag_listado(*partes) -> str:
+    """
+    ETag del listado para una vista (`partes`), o None si está desactivado.
+    Sale del estado de la tabla, que se reutiliza LISTADO_ETAG_VENTANA
+    segundos: solo entonces hace falta consultarlo.
+    """
+    if not version_clientes.activa:
+        return None
+
+    estado = version_clientes.vigente()
+    if estado is None:
+        generacion = version_clientes.generacion()
+        estado = await _leer(database.get_estado_clientes, database_async.get_estado_clientes)
+        version_clientes.guardar(estado, generacion)
+    return version_clientes.etag(estado, *partes)
+
+
+async def _ejecutar_grupo(operaciones: list) -> list:
+    return await _llamar(
+        database.ejecutar_grupo, database_async.ejecutar_grupo, operaciones
+    )
+
+
+# Con DB_GROUP_COMMIT, altas y reemplazos se confirman en lotes
+escrituras = GroupCommit(
+    _ejecutar_grupo,
+    ventana=config.DB_GROUP_COMMIT_WINDOW_MS / 1000,
+    max_lote=config.DB_GROUP_COMMIT_MAX_BATCH
+)
+
+
+# Toda escritura invalida la entrada del cliente en caché y cambia la versión
+# del listado (`_invalidar`). Las escrituras
+# devuelven la representación final sin releer la fila: se construye con los
+# datos validados, el id y la versión que devuelve la propia sentencia.
+async def create_cliente(data: dict) -> dict:
+    if config.DB_GROUP_COMMIT:
+        nuevo_id = await escrituras.enviar("create", data)
+    else:
+        nuevo_id = await _llamar(
+            database.create_cliente, database_async.create_cliente, data
+        )
+    _invalidar(nuevo_id)
+    return queries.representacion(nuevo_id, data, 1)
+
+
+async def update_cliente(cliente_id: int, data: dict, version: int = None):
+    """Cliente actualizado, o None si no existe (ConflictoDeVersion si aplica)."""
+    try:
+        if config.DB_GROUP_COMMIT:
+            nueva_version = await escrituras.enviar("update", cliente_id, data, version)
+        else:
+            nueva_version = await _llamar(
+                database.update_cliente, database_async.update_cliente,
+                cliente_id, data, version
+            )
+    finally:
+        _invalidar(cliente_id)
+
+    if nueva_version is None:
+        return None
+    return queries.representacion(cliente_id, data, nueva_version)
+
+
+async def patch_cliente(cliente_id: int, campos: dict, version: int = None):
+    """
+    Actualización parcial. Si la caché tiene justo la versión sobre la que se
+    aplicó el cambio, la fila resultante es esa más los campos nuevos y no
+    hace falta releerla de MySQL.
+    """
+    previo = clientes_cache.get(cliente_id)
+    base = previo[0] if previo else None
+    releer = (
+        base is None
+        or base.get("version") is None
+        or (version is not None and base["version"] != version)
+    )
+
+    try:
+        nueva_version, fila = await _llamar(
+            database.patch_cliente, database_async.patch_cliente,
+            cliente_id, campos, version, releer
+        )
+    finally:
+        _invalidar(cliente_id)
+
+    if nueva_version is None:
+        return None
+
+    if fila is None:
+        if base["version"] == nueva_version - 1:
+            fila = {**base, **campos, "version": nueva_version}
+        else:
+            # Otra escritura se coló entre medias: se lee el estado actual
+            fila = await _llamar(
+                database.get_cliente_by_id, database_async.get_cliente_by_id,
+                cliente_id
+            )
+    return fila
+
+
+async def delete_cliente(cliente_id: int):
+    try:
+        return await _llamar(
+            database.delete_cliente, database_async.delete_cliente, cliente_id
+        )
+    finally:
+        _invalidar(cliente_id)
+
+
+async def bulk_create_clientes(filas: list, upsert: bool = False):
+    resultado = await _llamar(
+        database.bulk_create_clientes, database_async.bulk_create_clientes,
+        filas, upsert
+    )
+    for estado, cliente_id in resultado.values():
+        if cliente_id is not None and estado in ("creado", "actualizado"):
+            _invalidar(cliente_id)
+    return resultado
+
+
+async def get_usuario_by_id(usuario_id: int):
+    return await _llamar(
+        database.get_usuario_by_id, database_async.get_usuario_by_id, usuario_id
+    )
+
+
+async def get_usuario_by_username(username: str):
+    return await _llamar(
+        database.get_usuario_by_username, database_async.get_usuario_by_username, username
+    )
+
+
+def cache_stats() -> dict:
+    return clientes_cache.stats()
+
+
+def single_flight_stats() -> dict:
+    return {"activo": config.DB_SINGLE_FLIGHT, **lecturas.stats()}
+
+
+def group_commit_stats() -> dict:
+    return {"activo": config.DB_GROUP_COMMIT, **escrituras.stats()}
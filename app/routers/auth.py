@@ -0,0 +1,47 @@
+# app/routers/auth.py
+
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.auth import login, usuario_actual
+from app.schemas.usuario import TokenResponse, UsuarioResponse
+
+router = APIRouter(
+    prefix="/auth",
+    tags=["Autenticación"]
+)
+
+
+# =========================
+# POST /auth/token (login)
+# =========================
+@router.post("/token", response_model=TokenResponse)
+async def obtener_token(form: OAuth2PasswordRequestForm = Depends()):
+    """
+    Formulario `username` y `password` (OAuth2 password flow). El token se
+    envía después en la cabecera `Authorization: Bearer <token>`.
+    """
+    resultado = await login(form.username, form.password)
+    if resultado is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario o contraseña incorrectos",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    token, expira, _ = resultado
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": max(0, expira - int(time.time()))
+    }
+
+
+# =========================
+# GET /auth/me
+# =========================
+@router.get("/me", response_model=UsuarioResponse)
+async def usuario_autenticado(usuario: dict = Depends(usuario_actual)):
+    return usuario
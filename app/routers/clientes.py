@@ -1,20 +1,50 @@
 # app/routers/clientes.py
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+import os
+
+from fastapi import (
+    APIRouter, Body, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+)
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Union
 from mysql.connector import Error
+from pydantic import ValidationError
 
 from app.schemas.cliente import (
     ClienteResponse,
     ClienteCreate,
-    ClienteUpdate
+    ClienteUpdate,
+    ClientePatch,
+    ClientePage,
+    ClienteSearchResponse,
+    ClienteBatchGetResponse,
+    ImportacionEstado,
+    DuplicadosEstado,
+    ClienteBulkResponse
 )
-from app.database import (
+from app.paginacion import CursorInvalido, decode_cursor
+from app import config
+from app.eventos import broker, flujo, publicar
+from app.export import FORMATOS, export_chunks
+from app.importacion import TrabajoNoEncontrado, crear_trabajo, leer_estado, ruta_rechazadas
+from app import duplicados
+from app.serializacion import RawJSONResponse
+from app.cache import calcular_etag, etag_coincide, etag_de_version, version_de_if_match
+from app.queries import ConflictoDeVersion
+from app.repository import (
+    iter_clientes,
     get_all_clientes,
-    get_cliente_by_id,
+    get_clientes_page,
+    etag_listado,
+    search_clientes,
+    get_cliente_con_etag,
+    get_clientes_by_ids,
     create_cliente,
     update_cliente,
-    delete_cliente
+    patch_cliente,
+    delete_cliente,
+    bulk_create_clientes
 )
 
 router = APIRouter(
@@ -23,22 +53,163 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[ClienteResponse])
-def listar_clientes():
-    return get_all_clientes()
+# =========================
+# GET /clientes (paginado)
+# =========================
+# Sin ninguno de estos parámetros se responde como antes de la paginación:
+# la lista completa, sin envolver (lo que espera el frontend actual)
+PARAMETROS_LISTADO = {"limit", "cursor", "sort", "nombre", "apellido", "email"}
+
+
+@router.get("/", response_model=Union[ClientePage, List[ClienteResponse]])
+async def listar_clientes(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(
+        None, description="Valor `next_cursor` de la página anterior"
+    ),
+    sort: str = Query(
+        "id",
+        pattern=r"^-?(id|nombre|apellido|email)$",
+        description="Columna de orden; prefijo '-' para descendente"
+    ),
+    nombre: Optional[str] = Query(None, description="Filtra por prefijo"),
+    apellido: Optional[str] = Query(None, description="Filtra por prefijo"),
+    email: Optional[str] = Query(None, description="Filtra por prefijo"),
+    if_none_match: Optional[str] = Header(None)
+):
+    # Nada ha cambiado desde la última vez: 304 sin consultar ni serializar
+    etag = await etag_listado(request.url.query)
+    if etag and etag_coincide(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+    try:
+        posicion = decode_cursor(cursor, sort) if cursor else None
+    except CursorInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if not PARAMETROS_LISTADO & request.query_params.keys():
+        # Formato antiguo (obsoleto): los clientes nuevos deben pedir
+        # ?limit= y recorrer las páginas con next_cursor
+        cabeceras = {"Deprecation": "true", "Link": f'<{router.prefix}/?limit={limit}>; rel="next"'}
+        if etag:
+            cabeceras.update({"ETag": etag, "Cache-Control": "no-cache"})
+        return RawJSONResponse(await get_all_clientes(), headers=cabeceras)
+
+    filtros = {"nombre": nombre, "apellido": apellido, "email": email}
+    items, next_cursor = await get_clientes_page(limit, sort, posicion, filtros)
+
+    # Filas de la BD: salida directa, sin pasar por ClientePage
+    return RawJSONResponse(
+        {"items": items, "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "no-cache"} if etag else None
+    )
+
+
+# =========================
+# GET /clientes/export
+# =========================
+@router.get("/export")
+async def exportar_clientes(
+    formato: str = Query("ndjson", pattern=r"^(ndjson|csv)$"),
+    chunk_size: int = Query(1000, ge=100, le=10000)
+):
+    media_type, nombre_archivo = FORMATOS[formato]
+
+    return StreamingResponse(
+        export_chunks(formato, iter_clientes(chunk_size)),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{nombre_archivo}"'
+        }
+    )
+
+
+# =========================
+# GET /clientes/search
+# =========================
+@router.get("/search", response_model=ClienteSearchResponse)
+async def buscar_clientes(
+    q: str = Query(
+        ..., min_length=1, max_length=100,
+        description="Prefijo de nombre, apellido o email (sin distinguir acentos)"
+    ),
+    limit: int = Query(10, ge=1, le=50)
+):
+    if not q.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La búsqueda está vacía"
+        )
+
+    items = await search_clientes(q, limit)
+    return RawJSONResponse({"items": items})
+
+
+# =========================
+# GET /clientes/events (Server-Sent Events)
+# =========================
+@router.get("/events")
+async def eventos_clientes(
+    last_event_id: Optional[str] = Header(
+        None, description="Id del último evento recibido, para reanudar"
+    )
+):
+    """
+    Flujo SSE con los cambios de clientes: `creado` y `actualizado` llevan
+    el cliente completo, `eliminado` solo su `id`. `reset` indica que hubo
+    eventos que ya no se pueden recuperar y hay que recargar el listado.
+    """
+    if broker.suscriptores >= config.EVENTOS_MAX_SUSCRIPTORES:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiadas conexiones de eventos abiertas",
+            headers={"Retry-After": str(config.EVENTOS_RETRY_MS // 1000 or 1)}
+        )
 
+    return StreamingResponse(
+        flujo(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
+
+# =========================
+# GET /clientes/{id}
+# =========================
 @router.get("/{cliente_id}", response_model=ClienteResponse)
-def obtener_cliente(cliente_id: int):
-    cliente = get_cliente_by_id(cliente_id)
+async def obtener_cliente(
+    cliente_id: int,
+    if_none_match: Optional[str] = Header(None)
+):
+    entrada = await get_cliente_con_etag(cliente_id)
 
-    if not cliente:
+    if not entrada:
         raise HTTPException(
             status_code=404,
             detail="Cliente no encontrado"
         )
 
-    return cliente
+    cliente, etag = entrada
+
+    # El navegador ya tiene esta versión: 304 sin cuerpo
+    if etag_coincide(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+    # no-cache: se puede guardar, pero hay que revalidar con If-None-Match
+    return RawJSONResponse(
+        cliente,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
 
 # =========================
 # POST /clientes
@@ -48,11 +219,14 @@ def obtener_cliente(cliente_id: int):
     response_model=ClienteResponse,
     status_code=status.HTTP_201_CREATED
 )
-def crear_cliente(cliente: ClienteCreate):
+async def crear_cliente(cliente: ClienteCreate, response: Response):
     try:
-        nuevo_id = create_cliente(cliente.model_dump())
+        # Una sola sentencia: la respuesta se construye con el id generado,
+        # sin volver a leer el cliente
+        cliente_creado = await create_cliente(cliente.model_dump())
 
-        cliente_creado = get_cliente_by_id(nuevo_id)
+        publicar("creado", cliente_creado)
+        response.headers["ETag"] = calcular_etag(cliente_creado)
         return cliente_creado
 
     except Error as e:
@@ -67,7 +241,267 @@ def crear_cliente(cliente: ClienteCreate):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al crear el cliente"
         )
-    
+
+
+# =========================
+# POST /clientes/batch-get
+# =========================
+MAX_BATCH_GET = 1000
+
+
+@router.post("/batch-get", response_model=ClienteBatchGetResponse)
+async def obtener_clientes_por_ids(
+    ids: List[int] = Body(..., embed=True, min_length=1, max_length=MAX_BATCH_GET)
+):
+    """
+    Varios clientes en una sola petición (y una consulta `IN (...)` por
+    lote), en el mismo orden que `ids`. Los ids que no existen se devuelven
+    en `no_encontrados`.
+    """
+    items, no_encontrados = await get_clientes_by_ids(ids)
+    return RawJSONResponse({"items": items, "no_encontrados": no_encontrados})
+
+
+# =========================
+# POST /clientes/bulk
+# =========================
+MAX_BULK = 10000
+
+_ESTADOS_BULK = {
+    "creado": (status.HTTP_201_CREATED, None),
+    "actualizado": (status.HTTP_200_OK, None),
+    # Mismo mensaje que el 409 de POST /clientes
+    "duplicado": (status.HTTP_409_CONFLICT, "Ya existe un cliente con ese email"),
+    "error": (status.HTTP_500_INTERNAL_SERVER_ERROR, "Error al crear el cliente"),
+}
+
+
+def _validar_bulk(clientes: List[dict]) -> tuple:
+    """
+    Valida cada fila por separado contra ClienteCreate: una fila inválida no
+    tumba el lote. Devuelve (resultados de las inválidas, [(indice, data)]).
+    """
+    resultados = {}
+    validos = []
+
+    for indice, fila in enumerate(clientes):
+        try:
+            cliente = ClienteCreate.model_validate(fila)
+        except ValidationError as e:
+            resultados[indice] = {
+                "indice": indice,
+                "estado": "invalido",
+                "status_code": status.HTTP_422_UNPROCESSABLE_CONTENT,
+                "detalle": [
+                    {
+                        "campo": ".".join(str(parte) for parte in error["loc"]),
+                        "mensaje": error["msg"]
+                    }
+                    for error in e.errors()
+                ]
+            }
+            continue
+        validos.append((indice, cliente.model_dump()))
+
+    return resultados, validos
+
+
+@router.post("/bulk", response_model=ClienteBulkResponse)
+async def crear_clientes_bulk(
+    clientes: List[dict] = Body(..., max_length=MAX_BULK),
+    upsert: bool = Query(
+        False,
+        description="Si el email ya existe, actualiza el cliente en lugar de "
+                    "marcarlo como duplicado"
+    )
+):
+    # La validación es CPU pura: se hace fuera del event loop
+    resultados, validos = await run_in_threadpool(_validar_bulk, clientes)
+
+    escritos = await bulk_create_clientes(validos, upsert)
+    for indice, (estado, nuevo_id) in escritos.items():
+        status_code, detalle = _ESTADOS_BULK[estado]
+        resultados[indice] = {
+            "indice": indice,
+            "estado": estado,
+            "status_code": status_code,
+            "id": nuevo_id,
+            "detalle": detalle
+        }
+
+    ordenados = [resultados[indice] for indice in range(len(clientes))]
+    totales = {estado: 0 for estado in ("creado", "actualizado", "duplicado", "invalido", "error")}
+    for resultado in ordenados:
+        totales[resultado["estado"]] += 1
+
+    return {
+        "creados": totales["creado"],
+        "actualizados": totales["actualizado"],
+        "duplicados": totales["duplicado"],
+        "invalidos": totales["invalido"],
+        "errores": totales["error"],
+        "resultados": ordenados
+    }
+
+
+# =========================
+# POST /clientes/import (CSV en segundo plano)
+# =========================
+@router.post(
+    "/import",
+    response_model=ImportacionEstado,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def importar_clientes(
+    response: Response,
+    archivo: UploadFile = File(
+        ..., description="CSV con cabecera: nombre, apellido, email, telefono, direccion"
+    ),
+    upsert: bool = Query(
+        False,
+        description="Si el email ya existe, actualiza el cliente en lugar de "
+                    "marcarlo como duplicado"
+    )
+):
+    """
+    Guarda el CSV y responde enseguida con el trabajo (202). El progreso se
+    consulta en `GET /clientes/import/{id}`.
+    """
+    estado = await run_in_threadpool(crear_trabajo, archivo.file, archivo.filename, upsert)
+    response.headers["Location"] = f"{router.prefix}/import/{estado['id']}"
+    return estado
+
+
+async def _estado_importacion(trabajo_id: str) -> dict:
+    try:
+        return await run_in_threadpool(leer_estado, trabajo_id)
+    except TrabajoNoEncontrado:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Importación no encontrada"
+        )
+
+
+@router.get("/import/{trabajo_id}", response_model=ImportacionEstado)
+async def obtener_importacion(trabajo_id: str):
+    return await _estado_importacion(trabajo_id)
+
+
+@router.get("/import/{trabajo_id}/rechazadas")
+async def descargar_rechazadas(trabajo_id: str):
+    """Filas no importadas (inválidas, duplicadas o con error) con su motivo."""
+    estado = await _estado_importacion(trabajo_id)
+    if estado["estado"] in ("pendiente", "procesando"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La importación aún no ha terminado"
+        )
+    ruta = ruta_rechazadas(trabajo_id)
+    if not await run_in_threadpool(os.path.exists, ruta):
+        # Trabajo interrumpido antes de empezar
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="La importación no tiene informe de filas rechazadas"
+        )
+    return FileResponse(
+        ruta,
+        media_type="text/csv; charset=utf-8",
+        filename=f"rechazadas-{trabajo_id}.csv"
+    )
+
+
+# =========================
+# POST /clientes/duplicates (detección en segundo plano)
+# =========================
+@router.post(
+    "/duplicates",
+    response_model=DuplicadosEstado,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def detectar_duplicados(
+    response: Response,
+    umbral: Optional[float] = Query(
+        None, ge=0.5, le=1,
+        description="Puntuación mínima de un par (por defecto DUPLICADOS_UMBRAL)"
+    )
+):
+    """
+    Lanza la búsqueda de clientes duplicados y responde enseguida (202). El
+    progreso se consulta en `GET /clientes/duplicates/{id}` y los grupos
+    encontrados en `GET /clientes/duplicates/{id}/grupos`.
+    """
+    estado = await run_in_threadpool(duplicados.crear_trabajo, umbral)
+    response.headers["Location"] = f"{router.prefix}/duplicates/{estado['id']}"
+    return estado
+
+
+async def _estado_duplicados(trabajo_id: str) -> dict:
+    try:
+        return await run_in_threadpool(duplicados.leer_estado, trabajo_id)
+    except TrabajoNoEncontrado:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Detección de duplicados no encontrada"
+        )
+
+
+@router.get("/duplicates/{trabajo_id}", response_model=DuplicadosEstado)
+async def obtener_duplicados(trabajo_id: str):
+    return await _estado_duplicados(trabajo_id)
+
+
+@router.get("/duplicates/{trabajo_id}/grupos")
+async def descargar_grupos_duplicados(trabajo_id: str):
+    """
+    Grupos de posibles duplicados en NDJSON, uno por línea y de mayor a
+    menor puntuación: `score`, `ids`, `pares` (cada par con su puntuación)
+    y `clientes`.
+    """
+    estado = await _estado_duplicados(trabajo_id)
+    if estado["estado"] in ("pendiente", "procesando"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La detección de duplicados aún no ha terminado"
+        )
+    ruta = duplicados.ruta_grupos(trabajo_id)
+    if not await run_in_threadpool(os.path.exists, ruta):
+        # Trabajo fallido o interrumpido
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="La detección de duplicados no tiene resultado"
+        )
+    return FileResponse(
+        ruta,
+        media_type="application/x-ndjson",
+        filename=f"duplicados-{trabajo_id}.ndjson"
+    )
+
+
+# =========================
+# Concurrencia optimista (If-Match)
+# =========================
+def _version_esperada(if_match: Optional[str]):
+    """Versión exigida por If-Match (None = sin condición)."""
+    if if_match is None:
+        return None
+    try:
+        return version_de_if_match(if_match)
+    except ValueError:
+        # Un ETag que no es de versión nunca puede coincidir
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match no corresponde a ninguna versión del cliente"
+        )
+
+
+def _conflicto(e: ConflictoDeVersion) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="El cliente fue modificado por otra petición",
+        headers={"ETag": etag_de_version(e.version_actual)}
+    )
+
+
 # =========================
 # PUT /clientes/{id}
 # =========================
@@ -76,28 +510,84 @@ def crear_cliente(cliente: ClienteCreate):
     response_model=ClienteResponse,
     status_code=status.HTTP_200_OK
 )
-def actualizar_cliente(cliente_id: int, cliente: ClienteUpdate):
-    # 1️⃣ Verificamos que el cliente exista
-    existente = get_cliente_by_id(cliente_id)
-    if not existente:
+async def actualizar_cliente(
+    cliente_id: int,
+    cliente: ClienteUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    version = _version_esperada(if_match)
+
+    # El propio UPDATE indica si el cliente existe: no hace falta un SELECT
+    # previo ni otro posterior para devolverlo
+    try:
+        actualizado = await update_cliente(cliente_id, cliente.model_dump(), version)
+
+    except ConflictoDeVersion as e:
+        raise _conflicto(e)
+
+    except Error as e:
+        # Email duplicado
+        if e.errno == 1062:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ya existe otro cliente con ese email"
+            )
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al actualizar el cliente"
+        )
+
+    if not actualizado:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cliente no encontrado"
         )
 
-    try:
-        actualizado = update_cliente(cliente_id, cliente.model_dump())
+    publicar("actualizado", actualizado)
+    response.headers["ETag"] = calcular_etag(actualizado)
+    return actualizado
 
-        if not actualizado:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Cliente no encontrado"
-            )
 
-        return get_cliente_by_id(cliente_id)
+# =========================
+# PATCH /clientes/{id}
+# =========================
+@router.patch(
+    "/{cliente_id}",
+    response_model=ClienteResponse,
+    status_code=status.HTTP_200_OK
+)
+async def modificar_cliente(
+    cliente_id: int,
+    cliente: ClientePatch,
+    response: Response,
+    if_match: Optional[str] = Header(
+        None, description='ETag obtenido en la última lectura, p. ej. "v3"'
+    )
+):
+    # Sin If-Match dos editores podrían pisarse: se exige siempre
+    if if_match is None:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="Falta la cabecera If-Match con el ETag del cliente"
+        )
+    version = _version_esperada(if_match)
+
+    campos = cliente.model_dump(exclude_unset=True)
+    if not campos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se indicó ningún campo para modificar"
+        )
+
+    try:
+        modificado = await patch_cliente(cliente_id, campos, version)
+
+    except ConflictoDeVersion as e:
+        raise _conflicto(e)
 
     except Error as e:
-        # Email duplicado
         if e.errno == 1062:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -109,6 +599,16 @@ def actualizar_cliente(cliente_id: int, cliente: ClienteUpdate):
             detail="Error al actualizar el cliente"
         )
 
+    if not modificado:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cliente no encontrado"
+        )
+
+    publicar("actualizado", modificado)
+    response.headers["ETag"] = calcular_etag(modificado)
+    return modificado
+
 
 # =========================
 # DELETE /clientes/{id}
@@ -117,28 +617,22 @@ def actualizar_cliente(cliente_id: int, cliente: ClienteUpdate):
     "/{cliente_id}",
     status_code=status.HTTP_204_NO_CONTENT
 )
-def eliminar_cliente(cliente_id: int):
-    # Verificar que el cliente existe
-    existente = get_cliente_by_id(cliente_id)
-    if not existente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cliente no encontrado"
-        )
-
+async def eliminar_cliente(cliente_id: int):
+    # rowcount del DELETE indica si existía: una sola sentencia
     try:
-        eliminado = delete_cliente(cliente_id)
-        
-        if not eliminado:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Cliente no encontrado"
-            )
-        
-        return None
+        eliminado = await delete_cliente(cliente_id)
 
-    except Exception as e:
+    except Error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al eliminar el cliente"
         )
+
+    if not eliminado:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cliente no encontrado"
+        )
+
+    publicar("eliminado", {"id": cliente_id})
+    return None
@@ -1,12 +1,14 @@
 # app/schemas/cliente.py
 
-from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
-import re
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
+from typing import List, Optional, Union
+
+from app.schemas import validaciones
 
 
 # =========================
 # Modelo base con validaciones (idéntico al monolito)
+# 👉 las reglas están en app/schemas/validaciones.py
 # =========================
 class ClienteBase(BaseModel):
     nombre: str
@@ -18,52 +20,17 @@ class ClienteBase(BaseModel):
     @field_validator("nombre", "apellido")
     @classmethod
     def validar_nombre_apellido(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("El campo no puede estar vacío")
-
-        v = v.strip()
-
-        if len(v) < 2:
-            raise ValueError("Debe tener al menos 2 caracteres")
-
-        if len(v) > 50:
-            raise ValueError("No puede exceder 50 caracteres")
-
-        # Solo letras, espacios, tildes y caracteres del español
-        if not re.match(r"^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\s]+$", v):
-            raise ValueError("Solo se permiten letras y espacios")
-
-        return v.title()
+        return validaciones.validar_nombre_apellido(v)
 
     @field_validator("telefono")
     @classmethod
     def validar_telefono(cls, v: Optional[str]) -> Optional[str]:
-        if v is None or v.strip() == "":
-            return None
-
-        v = v.strip()
-
-        telefono_limpio = re.sub(r"[\s\-\(\)]", "", v)
-
-        if not re.match(r"^\+?\d{7,15}$", telefono_limpio):
-            raise ValueError(
-                "Formato de teléfono inválido. Debe contener entre 7 y 15 dígitos"
-            )
-
-        return v
+        return validaciones.validar_telefono(v)
 
     @field_validator("direccion")
     @classmethod
     def validar_direccion(cls, v: Optional[str]) -> Optional[str]:
-        if v is None or v.strip() == "":
-            return None
-
-        v = v.strip()
-
-        if len(v) > 200:
-            raise ValueError("La dirección no puede exceder 200 caracteres")
-
-        return v
+        return validaciones.validar_direccion(v)
 
 
 # =========================
@@ -77,6 +44,7 @@ class ClienteDB(BaseModel):
     email: str
     telefono: Optional[str] = None
     direccion: Optional[str] = None
+    version: Optional[int] = None
 
 
 # =========================
@@ -89,67 +57,116 @@ class ClienteCreate(ClienteBase):
 # =========================
 # Modelo para actualización (PUT)
 # =========================
-class ClienteUpdate(BaseModel):
-    nombre: str
-    apellido: str
-    email: EmailStr
-    telefono: Optional[str] = None
-    direccion: Optional[str] = None
-
-    @field_validator("nombre", "apellido")
-    @classmethod
-    def validar_nombre_apellido(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("El campo no puede estar vacío")
+class ClienteUpdate(ClienteBase):
+    pass
 
-        v = v.strip()
 
-        if len(v) < 2:
-            raise ValueError("Debe tener al menos 2 caracteres")
+# =========================
+# Modelo para actualización parcial (PATCH)
+# 👉 mismas validaciones, pero todos los campos son opcionales:
+#    solo se actualizan los que vienen en el body
+# =========================
+class ClientePatch(ClienteUpdate):
+    nombre: Optional[str] = None
+    apellido: Optional[str] = None
+    email: Optional[EmailStr] = None
 
-        if len(v) > 50:
-            raise ValueError("No puede exceder 50 caracteres")
+    @field_validator("email")
+    @classmethod
+    def validar_email_no_nulo(cls, v: Optional[str]) -> str:
+        # Se puede omitir, pero no enviar a null: la columna es NOT NULL
+        if v is None:
+            raise ValueError("El email no puede ser nulo")
+        return v
 
-        if not re.match(r"^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\s]+$", v):
-            raise ValueError("Solo se permiten letras y espacios")
 
-        return v.title()
+# =========================
+# Modelo de respuesta API
+# 👉 los datos salen de la BD y ya se validaron al escribirlos: la respuesta
+#    usa ClienteDB y no repite las validaciones de entrada en cada lectura
+# =========================
+class ClienteResponse(ClienteDB):
+    model_config = ConfigDict(from_attributes=True)
 
-    @field_validator("telefono")
-    @classmethod
-    def validar_telefono(cls, v: Optional[str]) -> Optional[str]:
-        if v is None or v == "" or (isinstance(v, str) and v.strip() == ""):
-            return None
 
-        v = v.strip()
-        telefono_limpio = re.sub(r"[\s\-\(\)]", "", v)
+# =========================
+# Página del listado (paginación keyset)
+# =========================
+class ClientePage(BaseModel):
+    items: List[ClienteResponse]
+    next_cursor: Optional[str] = None
 
-        if not re.match(r"^\+?\d{7,15}$", telefono_limpio):
-            raise ValueError(
-                "Formato de teléfono inválido. Debe contener entre 7 y 15 dígitos"
-            )
 
-        return v
+# =========================
+# Búsqueda (GET /clientes/search)
+# =========================
+class ClienteSearchResponse(BaseModel):
+    items: List[ClienteResponse]
 
-    @field_validator("direccion")
-    @classmethod
-    def validar_direccion(cls, v: Optional[str]) -> Optional[str]:
-        if v is None or v == "" or (isinstance(v, str) and v.strip() == ""):
-            return None
 
-        v = v.strip()
+# =========================
+# Consulta por lotes (POST /clientes/batch-get)
+# =========================
+class ClienteBatchGetResponse(BaseModel):
+    items: List[ClienteResponse]
+    no_encontrados: List[int]
 
-        if len(v) > 200:
-            raise ValueError("La dirección no puede exceder 200 caracteres")
 
-        return v
+# =========================
+# Importación de CSV (POST /clientes/import)
+# =========================
+class ImportacionEstado(BaseModel):
+    id: str
+    estado: str  # pendiente | procesando | completado | fallido | interrumpido
+    archivo: Optional[str] = None
+    upsert: bool
+    creado: float
+    iniciado: Optional[float] = None
+    terminado: Optional[float] = None
+    filas: int
+    creados: int
+    actualizados: int
+    duplicados: int
+    invalidos: int
+    errores: int
+    error: Optional[str] = None
 
 
 # =========================
-# Modelo de respuesta API
+# Detección de duplicados (POST /clientes/duplicates)
 # =========================
-class ClienteResponse(ClienteBase):
-    id: int
+class DuplicadosEstado(BaseModel):
+    id: str
+    estado: str  # pendiente | procesando | completado | fallido | interrumpido
+    umbral: float
+    creado: float
+    iniciado: Optional[float] = None
+    terminado: Optional[float] = None
+    fase: Optional[str] = None  # claves | candidatos | puntuacion
+    filas: int
+    candidatos: int
+    bloques: int
+    bloques_omitidos: int
+    comparaciones: int
+    grupos: int
+    error: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+
+# =========================
+# Alta masiva (POST /clientes/bulk)
+# =========================
+class ClienteBulkResultado(BaseModel):
+    indice: int
+    estado: str  # creado | actualizado | duplicado | invalido | error
+    status_code: int
+    id: Optional[int] = None
+    detalle: Optional[Union[str, List[dict]]] = None
+
+
+class ClienteBulkResponse(BaseModel):
+    creados: int
+    actualizados: int
+    duplicados: int
+    invalidos: int
+    errores: int
+    resultados: List[ClienteBulkResultado]
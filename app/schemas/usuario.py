@@ -0,0 +1,24 @@
+# app/schemas/usuario.py
+
+from pydantic import BaseModel
+
+
+# =========================
+# Token de acceso (POST /auth/token)
+# =========================
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int  # segundos
+
+
+# =========================
+# Usuario autenticado (GET /auth/me)
+# 👉 nunca incluye el hash de la contraseña
+# =========================
+class UsuarioResponse(BaseModel):
+    id: int
+    username: str
+    email: str
+    rol: str
+    activo: bool
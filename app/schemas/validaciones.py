@@ -0,0 +1,63 @@
+# app/schemas/validaciones.py
+#
+# Reglas de validación de los datos de entrada de un cliente, compartidas
+# por todos los modelos (POST, PUT, PATCH, altas masivas...).
+# Las expresiones regulares se compilan una sola vez al importar el módulo.
+
+import re
+from typing import Optional
+
+# Solo letras, espacios, tildes y caracteres del español
+RE_NOMBRE = re.compile(r"^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\s]+$")
+# Separadores permitidos al escribir un teléfono: espacios, guiones, paréntesis
+RE_SEPARADORES_TELEFONO = re.compile(r"[\s\-\(\)]")
+RE_TELEFONO = re.compile(r"^\+?\d{7,15}$")
+
+
+def validar_nombre_apellido(v: str) -> str:
+    if not v or not v.strip():
+        raise ValueError("El campo no puede estar vacío")
+
+    v = v.strip()
+
+    if len(v) < 2:
+        raise ValueError("Debe tener al menos 2 caracteres")
+
+    if len(v) > 50:
+        raise ValueError("No puede exceder 50 caracteres")
+
+    if not RE_NOMBRE.match(v):
+        raise ValueError("Solo se permiten letras y espacios")
+
+    return v.title()
+
+
+def limpiar_telefono(v: str) -> str:
+    """Teléfono sin separadores: '(555) 010-1' -> '5550101'."""
+    return RE_SEPARADORES_TELEFONO.sub("", v)
+
+
+def validar_telefono(v: Optional[str]) -> Optional[str]:
+    if v is None or v.strip() == "":
+        return None
+
+    v = v.strip()
+
+    if not RE_TELEFONO.match(limpiar_telefono(v)):
+        raise ValueError(
+            "Formato de teléfono inválido. Debe contener entre 7 y 15 dígitos"
+        )
+
+    return v
+
+
+def validar_direccion(v: Optional[str]) -> Optional[str]:
+    if v is None or v.strip() == "":
+        return None
+
+    v = v.strip()
+
+    if len(v) > 200:
+        raise ValueError("La dirección no puede exceder 200 caracteres")
+
+    return v
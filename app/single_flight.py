@@ -0,0 +1,86 @@
+# app/single_flight.py
+#
+# Single-flight: cuando llegan a la vez varias lecturas idénticas (muchos
+# usuarios abriendo la misma página), solo la primera va a MySQL; las demás
+# esperan esa misma consulta y reciben su resultado. No es una caché: en
+# cuanto la consulta termina se olvida, y la siguiente lectura vuelve a MySQL.
+#
+# La consulta corre en una tarea propia, así que si la petición que la
+# lanzó se cancela (el cliente cierra la conexión) las que esperan no se
+# quedan sin respuesta. El resultado es el mismo objeto para todas: se
+# trata como de solo lectura.
+
+import asyncio
+import threading
+
+from app.metrics import Counter, lineas, registro
+
+sf_llamadas = registro.registrar(Counter(
+    "db_singleflight_calls_total",
+    "Lecturas por operación: 'lider' lanza la consulta, 'compartida' reutiliza una en curso",
+    ("operacion", "rol")
+))
+
+
+class SingleFlight:
+    def __init__(self):
+        self._vuelos = {}
+        self._lock = threading.Lock()
+        self._contadores = {}  # operacion -> [lideres, compartidas]
+
+    def _contar(self, operacion: str, compartida: bool):
+        with self._lock:
+            contador = self._contadores.setdefault(operacion, [0, 0])
+            contador[compartida] += 1
+        sf_llamadas.inc(operacion, "compartida" if compartida else "lider")
+
+    async def hacer(self, operacion: str, clave, funcion):
+        """
+        Resultado de `funcion()` (una corrutina sin argumentos) para `clave`,
+        compartido con las llamadas simultáneas con la misma clave.
+        """
+        clave = (operacion, clave)
+        tarea = self._vuelos.get(clave)
+        if tarea is not None:
+            self._contar(operacion, compartida=True)
+        else:
+            self._contar(operacion, compartida=False)
+            tarea = asyncio.ensure_future(funcion())
+            self._vuelos[clave] = tarea
+            tarea.add_done_callback(lambda t: self._aterrizar(clave, t))
+        return await asyncio.shield(tarea)
+
+    def _aterrizar(self, clave, tarea):
+        self._vuelos.pop(clave, None)
+        # Si todas las peticiones se cancelaron nadie recoge el error: se
+        # marca como recogido para que asyncio no avise en el log
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def en_vuelo(self) -> int:
+        return len(self._vuelos)
+
+    def stats(self) -> dict:
+        with self._lock:
+            contadores = {op: list(c) for op, c in self._contadores.items()}
+        resultado = {}
+        for operacion, (lideres, compartidas) in sorted(contadores.items()):
+            total = lideres + compartidas
+            resultado[operacion] = {
+                "consultas": lideres,
+                "compartidas": compartidas,
+                # Fracción de lecturas que no llegaron a MySQL
+                "ratio": round(compartidas / total, 4) if total else 0.0,
+            }
+        return {"en_vuelo": self.en_vuelo(), "operaciones": resultado}
+
+
+lecturas = SingleFlight()
+
+
+@registro.colector
+def _metricas_single_flight() -> list:
+    return lineas(
+        "db_singleflight_in_flight", "Consultas compartibles en curso", "gauge", (),
+        [((), lecturas.en_vuelo())]
+    )
@@ -0,0 +1,78 @@
+# app/trabajos.py
+#
+# ¿Sigue vivo un trabajo en segundo plano (importación, duplicados)?
+#
+# Su estado vive en un directorio que pueden compartir varios servidores,
+# así que el pid guardado solo dice algo en el servidor que lo lanzó:
+#
+# - Mismo servidor: se mira si el proceso existe.
+# - Otro servidor: cada worker refresca cada TRABAJOS_LATIDO segundos la
+#   fecha de modificación del estado.json de sus trabajos pendientes o en
+#   curso (un latido). Si pasa TRABAJOS_LATIDO_MAX sin latido, el servidor
+#   o el worker ya no existe.
+
+import os
+import socket
+import threading
+import time
+
+from app import config
+
+HOST = socket.gethostname()
+
+
+def proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def trabajo_vivo(estado: dict, ruta_estado: str) -> bool:
+    # Los estados antiguos no guardaban el servidor: se asumen de este
+    if estado.get("host", HOST) == HOST:
+        return proceso_vivo(estado["pid"])
+    try:
+        edad = time.time() - os.path.getmtime(ruta_estado)
+    except FileNotFoundError:
+        return False
+    return edad < config.TRABAJOS_LATIDO_MAX
+
+
+class Latidos:
+    """Hilo que mantiene al día la fecha de los estado.json de este proceso."""
+
+    def __init__(self):
+        self._rutas = set()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def registrar(self, ruta_estado: str, futuro):
+        """Late por `ruta_estado` hasta que `futuro` (el trabajo) termine."""
+        with self._lock:
+            self._rutas.add(ruta_estado)
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._latir, name="latidos", daemon=True)
+                self._hilo.start()
+        futuro.add_done_callback(lambda _: self._quitar(ruta_estado))
+
+    def _quitar(self, ruta_estado: str):
+        with self._lock:
+            self._rutas.discard(ruta_estado)
+
+    def _latir(self):
+        while True:
+            time.sleep(config.TRABAJOS_LATIDO)
+            with self._lock:
+                rutas = list(self._rutas)
+            for ruta in rutas:
+                try:
+                    os.utime(ruta)
+                except FileNotFoundError:
+                    pass
+
+
+latidos = Latidos()
@@ -0,0 +1,114 @@
+# benchmarks/bench_database.py
+#
+# Latencia de las funciones de app/database.py (capa síncrona, sin HTTP)
+# contra la BD del .env, con varios hilos compartiendo el pool:
+#
+#   python -m benchmarks.bench_database --iteraciones 2000 --hilos 8
+#
+# Las escrituras trabajan sobre clientes creados por el propio benchmark y
+# que se borran al final.
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from app import database
+from benchmarks.datos import cliente_sintetico, prefijo_busqueda
+from benchmarks.informe import guardar, metadatos, resumen
+
+
+def _nuevo(rng: random.Random) -> dict:
+    data = cliente_sintetico(0, rng)
+    data["email"] = f"bench.{uuid.uuid4().hex}@example.com"
+    return data
+
+
+def _escenarios(ids: list):
+    """Nombre -> función(rng, propios). Cada una hace una llamada a database."""
+    return {
+        "get_cliente_by_id": lambda rng, propios: database.get_cliente_by_id(rng.choice(ids)),
+        "get_clientes_by_ids": lambda rng, propios: database.get_clientes_by_ids(
+            rng.sample(ids, min(50, len(ids)))
+        ),
+        "get_clientes_page": lambda rng, propios: database.get_clientes_page(50, "id"),
+        "get_clientes_page_apellido": lambda rng, propios: database.get_clientes_page(
+            50, "apellido", None, {"apellido": prefijo_busqueda(rng)}
+        ),
+        "search_clientes": lambda rng, propios: database.search_clientes(prefijo_busqueda(rng), 10),
+        "create_cliente": lambda rng, propios: propios.append(database.create_cliente(_nuevo(rng))),
+        "update_cliente": lambda rng, propios: database.update_cliente(
+            rng.choice(propios), _nuevo(rng)
+        ),
+        "patch_cliente": lambda rng, propios: database.patch_cliente(
+            rng.choice(propios), {"telefono": f"555-{rng.randrange(10000):04d}"}, None, False
+        ),
+    }
+
+
+def medir(funcion, iteraciones, hilos, semilla, propios):
+    latencias = []
+    errores = [0]
+    lock = threading.Lock()
+    por_hilo = max(1, iteraciones // hilos)
+
+    def trabajador(n):
+        rng = random.Random(semilla + n)
+        locales = []
+        for _ in range(por_hilo):
+            inicio = time.perf_counter()
+            try:
+                funcion(rng, propios)
+                ok = True
+            except Exception:
+                ok = False
+            locales.append(time.perf_counter() - inicio)
+            if not ok:
+                with lock:
+                    errores[0] += 1
+        with lock:
+            latencias.extend(locales)
+
+    inicio = time.perf_counter()
+    lista = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    for hilo in lista:
+        hilo.start()
+    for hilo in lista:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    return resumen(latencias, errores[0], duracion)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de app/database.py")
+    parser.add_argument("--iteraciones", type=int, default=2000, help="Llamadas por función")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Fichero JSON del informe")
+    args = parser.parse_args()
+
+    ids = [fila["id"] for fila in database.get_clientes_page(500, "id")[0]]
+    if not ids:
+        raise SystemExit("La tabla clientes está vacía: ejecuta antes benchmarks.poblar_bd")
+
+    # create_cliente va antes que update/patch: sus filas son las que se modifican
+    propios = []
+    funciones = {}
+    for nombre, funcion in _escenarios(ids).items():
+        funciones[nombre] = medir(funcion, args.iteraciones, args.hilos, args.semilla, propios)
+
+    for cliente_id in propios:
+        database.delete_cliente(cliente_id)
+
+    guardar({
+        "meta": metadatos("bench_database", {**vars(args), "pool": database.pool_stats()}),
+        "funciones": funciones,
+    }, args.salida)
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
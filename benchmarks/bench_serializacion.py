@@ -0,0 +1,138 @@
+# benchmarks/bench_serializacion.py
+#
+# Microbenchmark de la salida de GET /clientes: cuántas filas por segundo se
+# pueden convertir en el cuerpo JSON de la respuesta.
+#
+#   python -m benchmarks.bench_serializacion --filas 100000
+#
+# Compara:
+#   - anterior:      ClienteResponse heredaba de ClienteBase, así que cada fila
+#                    leída de la BD repasaba los validadores de entrada (re.match
+#                    con el patrón como texto, .title()...) antes de serializar.
+#   - response_model: ClienteResponse actual (basado en ClienteDB, sin
+#                    validadores) por el camino normal de FastAPI.
+#   - raw:           RawJSONResponse, que confía en las filas de la BD y las
+#                    codifica directamente.
+
+import argparse
+import re
+import time
+from typing import List, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, EmailStr, TypeAdapter, field_validator
+
+from app.schemas.cliente import ClienteResponse
+from app.serializacion import RawJSONResponse
+from benchmarks.datos import filas_sinteticas
+from benchmarks.informe import guardar, metadatos
+
+
+# Copia del modelo de respuesta anterior a la refactorización
+class ClienteResponseAnterior(BaseModel):
+    id: int
+    nombre: str
+    apellido: str
+    email: EmailStr
+    telefono: Optional[str] = None
+    direccion: Optional[str] = None
+    version: Optional[int] = None
+
+    @field_validator("nombre", "apellido")
+    @classmethod
+    def validar_nombre_apellido(cls, v: str) -> str:
+        if not v or not v.strip():
+            raise ValueError("El campo no puede estar vacío")
+        v = v.strip()
+        if len(v) < 2:
+            raise ValueError("Debe tener al menos 2 caracteres")
+        if len(v) > 50:
+            raise ValueError("No puede exceder 50 caracteres")
+        if not re.match(r"^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\s]+$", v):
+            raise ValueError("Solo se permiten letras y espacios")
+        return v.title()
+
+    @field_validator("telefono")
+    @classmethod
+    def validar_telefono(cls, v: Optional[str]) -> Optional[str]:
+        if v is None or v.strip() == "":
+            return None
+        v = v.strip()
+        telefono_limpio = re.sub(r"[\s\-\(\)]", "", v)
+        if not re.match(r"^\+?\d{7,15}$", telefono_limpio):
+            raise ValueError("Formato de teléfono inválido")
+        return v
+
+    @field_validator("direccion")
+    @classmethod
+    def validar_direccion(cls, v: Optional[str]) -> Optional[str]:
+        if v is None or v.strip() == "":
+            return None
+        v = v.strip()
+        if len(v) > 200:
+            raise ValueError("La dirección no puede exceder 200 caracteres")
+        return v
+
+
+def _camino_fastapi(modelo):
+    """Lo que hace FastAPI con response_model: validar, volcar y json.dumps."""
+    adapter = TypeAdapter(List[modelo])
+
+    def serializar(filas):
+        validadas = adapter.validate_python(filas)
+        contenido = adapter.dump_python(validadas, mode="json")
+        return JSONResponse({"items": contenido, "next_cursor": None}).body
+
+    return serializar
+
+
+def _camino_raw(filas):
+    return RawJSONResponse({"items": filas, "next_cursor": None}).body
+
+
+CAMINOS = {
+    "anterior": _camino_fastapi(ClienteResponseAnterior),
+    "response_model": _camino_fastapi(ClienteResponse),
+    "raw": _camino_raw,
+}
+
+
+def medir(funcion, filas: list, repeticiones: int) -> float:
+    """Mejor tiempo de `repeticiones` ejecuciones (segundos)."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(filas)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización de GET /clientes")
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="Fichero JSON del informe")
+    args = parser.parse_args()
+
+    filas = filas_sinteticas(args.filas)
+    resultados = {}
+
+    for nombre, funcion in CAMINOS.items():
+        segundos = medir(funcion, filas, args.repeticiones)
+        resultados[nombre] = {
+            "segundos": round(segundos, 4),
+            "filas_por_segundo": round(args.filas / segundos),
+        }
+
+    base = resultados["anterior"]["segundos"]
+    for datos in resultados.values():
+        datos["aceleracion"] = round(base / datos["segundos"], 2)
+
+    guardar({
+        "meta": metadatos("bench_serializacion", vars(args)),
+        "resultados": resultados,
+    }, args.salida)
+
+
+if __name__ == "__main__":
+    main()
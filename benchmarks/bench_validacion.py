@@ -0,0 +1,86 @@
+# benchmarks/bench_validacion.py
+#
+# Microbenchmark de los modelos Pydantic (sin BD ni HTTP):
+#
+#   python -m benchmarks.bench_validacion --filas 50000
+#
+#   - ClienteCreate:   validación de un body de entrada (validadores de
+#                      nombre, teléfono, dirección y EmailStr).
+#   - ClienteResponse: validación de una fila de la BD, como hace FastAPI
+#                      con response_model.
+#   - *_json:          lo mismo partiendo del JSON en bytes.
+
+import argparse
+import json
+import time
+
+from pydantic import TypeAdapter
+
+from app.schemas.cliente import ClienteCreate, ClienteResponse
+from benchmarks.datos import clientes_sinteticos, filas_sinteticas
+from benchmarks.informe import guardar, metadatos
+
+
+def _por_objeto(modelo, datos):
+    def validar():
+        for item in datos:
+            modelo.model_validate(item)
+    return validar
+
+
+def _por_json(modelo, datos):
+    crudos = [json.dumps(item).encode("utf-8") for item in datos]
+
+    def validar():
+        for crudo in crudos:
+            modelo.model_validate_json(crudo)
+    return validar
+
+
+def _lista(modelo, datos):
+    adapter = TypeAdapter(list[modelo])
+    return lambda: adapter.validate_python(datos)
+
+
+def medir(funcion, n: int, repeticiones: int) -> dict:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return {
+        "segundos": round(mejor, 4),
+        "por_segundo": round(n / mejor),
+        "us_por_objeto": round(mejor / n * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validación Pydantic de clientes")
+    parser.add_argument("--filas", type=int, default=50_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="Fichero JSON del informe")
+    args = parser.parse_args()
+
+    entradas = clientes_sinteticos(args.filas)
+    filas = filas_sinteticas(args.filas)
+
+    casos = {
+        "ClienteCreate": _por_objeto(ClienteCreate, entradas),
+        "ClienteCreate_json": _por_json(ClienteCreate, entradas),
+        "ClienteResponse": _por_objeto(ClienteResponse, filas),
+        "ClienteResponse_json": _por_json(ClienteResponse, filas),
+        "List[ClienteResponse]": _lista(ClienteResponse, filas),
+    }
+
+    guardar({
+        "meta": metadatos("bench_validacion", vars(args)),
+        "resultados": {
+            nombre: medir(funcion, args.filas, args.repeticiones)
+            for nombre, funcion in casos.items()
+        },
+    }, args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# benchmarks/carga.py
+#
+# Prueba de carga HTTP de los endpoints de /clientes contra un servidor ya
+# arrancado (uvicorn app.main:app). Solo usa la librería estándar.
+#
+#   python -m benchmarks.carga --url http://127.0.0.1:8000 \
+#       --concurrencia 32 --duracion 30 --token "$TOKEN" \
+#       --mezcla listar=30,obtener=35,buscar=15,crear=8,actualizar=5,modificar=4,eliminar=3 \
+#       --salida carga.json
+#
+# Cada hilo mantiene su propia conexión keep-alive y elige la operación al
+# azar según los pesos de --mezcla. Las escrituras se hacen sobre clientes
+# creados por el propio hilo, así que los datos sembrados no cambian y las
+# lecturas no reciben 404 por culpa del benchmark.
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from urllib.parse import quote, urlsplit
+
+from benchmarks.datos import cliente_sintetico, prefijo_busqueda
+from benchmarks.informe import guardar, metadatos, resumen
+
+MEZCLA_POR_DEFECTO = (
+    "listar=30,obtener=35,buscar=15,crear=8,actualizar=5,modificar=4,eliminar=3"
+)
+
+
+def parse_mezcla(texto: str) -> dict:
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        nombre = nombre.strip()
+        if nombre not in OPERACIONES:
+            raise ValueError(
+                f"Operación desconocida: {nombre}. Opciones: {', '.join(OPERACIONES)}"
+            )
+        mezcla[nombre] = float(peso)
+    if not any(mezcla.values()):
+        raise ValueError("La mezcla no tiene ninguna operación con peso")
+    return mezcla
+
+
+class Cliente:
+    """Conexión HTTP keep-alive de un hilo, con reconexión si se cae."""
+
+    def __init__(self, url: str, timeout: float, token: str = None):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.port = partes.port or 80
+        self.timeout = timeout
+        self.token = token
+        self.conn = None
+
+    def peticion(self, metodo: str, ruta: str, cuerpo=None, cabeceras=None):
+        """Devuelve (status, json o None). Lanza OSError/HTTPException si falla."""
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+        cabeceras = dict(cabeceras or {})
+        if self.token:
+            cabeceras["Authorization"] = f"Bearer {self.token}"
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode("utf-8")
+            cabeceras["Content-Type"] = "application/json"
+
+        try:
+            self.conn.request(metodo, ruta, body=datos, headers=cabeceras)
+            respuesta = self.conn.getresponse()
+            crudo = respuesta.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+
+        contenido = None
+        if crudo and respuesta.getheader("Content-Type", "").startswith("application/json"):
+            contenido = json.loads(crudo)
+        return respuesta.status, contenido
+
+    def cerrar(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+# =========================
+# Operaciones
+# =========================
+# Cada operación recibe el contexto del hilo y devuelve el status HTTP.
+# `None` significa que no se pudo hacer (p. ej. eliminar sin clientes
+# propios) y no se cuenta.
+class Contexto:
+    def __init__(self, cliente: Cliente, rng: random.Random, ids: list):
+        self.cliente = cliente
+        self.rng = rng
+        self.ids = ids          # ids sembrados, solo lectura
+        self.propios = []       # ids creados por este hilo
+
+
+def _nuevo_cliente(ctx: Contexto) -> dict:
+    data = cliente_sintetico(0, ctx.rng)
+    data["email"] = f"carga.{uuid.uuid4().hex}@example.com"
+    return data
+
+
+def op_listar(ctx):
+    status, _ = ctx.cliente.peticion("GET", "/clientes/?limit=50")
+    return status
+
+
+def op_obtener(ctx):
+    if not ctx.ids:
+        return None
+    status, _ = ctx.cliente.peticion("GET", f"/clientes/{ctx.rng.choice(ctx.ids)}")
+    return status
+
+
+def op_buscar(ctx):
+    q = quote(prefijo_busqueda(ctx.rng))
+    status, _ = ctx.cliente.peticion("GET", f"/clientes/search?q={q}&limit=10")
+    return status
+
+
+def op_crear(ctx):
+    status, cuerpo = ctx.cliente.peticion("POST", "/clientes/", _nuevo_cliente(ctx))
+    if status == 201 and cuerpo:
+        ctx.propios.append(cuerpo["id"])
+    return status
+
+
+def op_actualizar(ctx):
+    if not ctx.propios:
+        return None
+    status, _ = ctx.cliente.peticion(
+        "PUT", f"/clientes/{ctx.rng.choice(ctx.propios)}", _nuevo_cliente(ctx)
+    )
+    return status
+
+
+def op_modificar(ctx):
+    if not ctx.propios:
+        return None
+    status, _ = ctx.cliente.peticion(
+        "PATCH", f"/clientes/{ctx.rng.choice(ctx.propios)}",
+        {"direccion": f"Calle {ctx.rng.randrange(1, 1000)}, Ciudad"},
+        {"If-Match": "*"}
+    )
+    return status
+
+
+def op_eliminar(ctx):
+    if not ctx.propios:
+        return None
+    cliente_id = ctx.propios.pop(ctx.rng.randrange(len(ctx.propios)))
+    status, _ = ctx.cliente.peticion("DELETE", f"/clientes/{cliente_id}")
+    return status
+
+
+OPERACIONES = {
+    "listar": op_listar,
+    "obtener": op_obtener,
+    "buscar": op_buscar,
+    "crear": op_crear,
+    "actualizar": op_actualizar,
+    "modificar": op_modificar,
+    "eliminar": op_eliminar,
+}
+
+
+# =========================
+# Ejecución
+# =========================
+class Resultados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = Counter()
+        self.codigos = defaultdict(Counter)
+
+    def registrar(self, operacion: str, segundos: float, status):
+        with self._lock:
+            self.latencias[operacion].append(segundos)
+            self.codigos[operacion][status] += 1
+            if status == "excepcion" or status >= 400:
+                self.errores[operacion] += 1
+
+
+def descubrir_ids(url: str, maximo: int, timeout: float, token: str = None) -> list:
+    """Ids existentes, recorriendo el listado paginado."""
+    cliente = Cliente(url, timeout, token)
+    ids = []
+    cursor = None
+    while len(ids) < maximo:
+        ruta = "/clientes/?limit=500" + (f"&cursor={cursor}" if cursor else "")
+        status, pagina = cliente.peticion("GET", ruta)
+        if status != 200:
+            raise RuntimeError(f"GET {ruta} devolvió {status}")
+        ids.extend(item["id"] for item in pagina["items"])
+        cursor = pagina["next_cursor"]
+        if not cursor:
+            break
+    cliente.cerrar()
+    return ids[:maximo]
+
+
+def trabajador(args, mezcla, ids, resultados, fin, semilla):
+    rng = random.Random(semilla)
+    ctx = Contexto(Cliente(args.url, args.timeout, args.token), rng, ids)
+    nombres = list(mezcla)
+    pesos = list(mezcla.values())
+
+    while time.perf_counter() < fin:
+        operacion = rng.choices(nombres, pesos)[0]
+        inicio = time.perf_counter()
+        try:
+            status = OPERACIONES[operacion](ctx)
+        except (OSError, http.client.HTTPException, ValueError):
+            status = "excepcion"
+        if status is None:
+            continue
+        resultados.registrar(operacion, time.perf_counter() - inicio, status)
+
+    # Limpieza: lo que quede creado por el benchmark se borra fuera de la medición
+    for cliente_id in ctx.propios:
+        try:
+            ctx.cliente.peticion("DELETE", f"/clientes/{cliente_id}")
+        except (OSError, http.client.HTTPException):
+            pass
+    ctx.cliente.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de /clientes")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos")
+    parser.add_argument("--calentamiento", type=float, default=3, help="Segundos sin medir")
+    parser.add_argument("--mezcla", default=MEZCLA_POR_DEFECTO)
+    parser.add_argument("--ids", type=int, default=10_000, help="Ids sembrados a usar en obtener")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Fichero JSON del informe")
+    parser.add_argument("--token", help="Token de POST /auth/token (rol admin si hay escrituras)")
+    args = parser.parse_args()
+
+    mezcla = parse_mezcla(args.mezcla)
+    ids = descubrir_ids(args.url, args.ids, args.timeout, args.token)
+
+    def lanzar(duracion, resultados):
+        fin = time.perf_counter() + duracion
+        hilos = [
+            threading.Thread(
+                target=trabajador,
+                args=(args, mezcla, ids, resultados, fin, args.semilla + n)
+            )
+            for n in range(args.concurrencia)
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        # La limpieza final de cada hilo queda fuera de la ventana medida
+        return fin - inicio
+
+    if args.calentamiento > 0:
+        lanzar(args.calentamiento, Resultados())
+
+    resultados = Resultados()
+    duracion = lanzar(args.duracion, resultados)
+
+    operaciones = {
+        operacion: resumen(
+            resultados.latencias[operacion], resultados.errores[operacion],
+            duracion, resultados.codigos[operacion]
+        )
+        for operacion in mezcla if resultados.latencias[operacion]
+    }
+    todas = [s for lista in resultados.latencias.values() for s in lista]
+
+    guardar({
+        "meta": metadatos("carga", {**vars(args), "mezcla": mezcla, "ids_usados": len(ids)}),
+        "duracion_s": round(duracion, 2),
+        "total": resumen(todas, sum(resultados.errores.values()), duracion),
+        "operaciones": operaciones,
+    }, args.salida)
+
+
+if __name__ == "__main__":
+    main()
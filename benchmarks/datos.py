@@ -0,0 +1,62 @@
+# benchmarks/datos.py
+#
+# Clientes sintéticos para los benchmarks. Con la misma semilla se generan
+# siempre los mismos datos, de modo que las ejecuciones son comparables.
+
+import random
+import unicodedata
+
+NOMBRES = [
+    "Juan", "María", "Carlos", "Ana", "Luis", "Lucía", "José", "Sofía",
+    "Pedro", "Elena", "Miguel", "Carmen", "Javier", "Laura", "Andrés",
+    "Isabel", "Raúl", "Marta", "Sergio", "Paula", "Álvaro", "Nuria",
+]
+APELLIDOS = [
+    "Pérez", "García", "Rodríguez", "Martínez", "López", "Núñez", "Sánchez",
+    "Gómez", "Fernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero",
+    "Navarro", "Torres", "Domínguez", "Vázquez", "Ramos", "Gil", "Serrano",
+]
+VIAS = ["Calle", "Avenida", "Plaza", "Paseo", "Boulevard"]
+
+
+def _ascii(texto: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def cliente_sintetico(i: int, rng: random.Random) -> dict:
+    """Cliente válido para ClienteCreate; el email es único por `i`."""
+    nombre = rng.choice(NOMBRES)
+    apellido = rng.choice(APELLIDOS)
+    if rng.random() < 0.3:
+        apellido += " " + rng.choice(APELLIDOS)
+
+    return {
+        "nombre": nombre,
+        "apellido": apellido,
+        "email": f"{_ascii(nombre)}.{_ascii(apellido.split()[0])}.{i}@example.com",
+        "telefono": f"555-{rng.randrange(10000):04d}" if rng.random() < 0.8 else None,
+        "direccion": (
+            f"{rng.choice(VIAS)} {rng.randrange(1, 1000)}, Ciudad"
+            if rng.random() < 0.7 else None
+        ),
+    }
+
+
+def clientes_sinteticos(n: int, semilla: int = 42, desde: int = 1) -> list:
+    rng = random.Random(semilla)
+    return [cliente_sintetico(i, rng) for i in range(desde, desde + n)]
+
+
+def filas_sinteticas(n: int, semilla: int = 42) -> list:
+    """Como las devuelve MySQL: con id y version."""
+    return [
+        {"id": i, **data, "version": 1}
+        for i, data in enumerate(clientes_sinteticos(n, semilla), start=1)
+    ]
+
+
+def prefijo_busqueda(rng: random.Random) -> str:
+    """Lo que escribe alguien en el buscador: 2-5 letras de un nombre o apellido."""
+    palabra = rng.choice(NOMBRES + APELLIDOS)
+    return palabra[:rng.randint(2, min(5, len(palabra)))]
@@ -0,0 +1,79 @@
+# benchmarks/informe.py
+#
+# Estadísticas e informe JSON comunes a todos los benchmarks. Cada informe
+# lleva el commit y la configuración usada para poder comparar ejecuciones.
+
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+
+def percentil(ordenados: list, p: float) -> float:
+    """Percentil `p` (0-100) de una lista ya ordenada, por interpolación."""
+    if not ordenados:
+        return 0.0
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def latencias_ms(segundos: list) -> dict:
+    ordenados = sorted(s * 1000 for s in segundos)
+    if not ordenados:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "media": 0.0, "max": 0.0}
+    return {
+        "p50": round(percentil(ordenados, 50), 3),
+        "p95": round(percentil(ordenados, 95), 3),
+        "p99": round(percentil(ordenados, 99), 3),
+        "media": round(sum(ordenados) / len(ordenados), 3),
+        "max": round(ordenados[-1], 3),
+    }
+
+
+def resumen(latencias: list, errores: int, duracion: float, codigos: dict = None) -> dict:
+    """Resumen de una operación: latencias en segundos de cada llamada."""
+    peticiones = len(latencias)
+    datos = {
+        "peticiones": peticiones,
+        "errores": errores,
+        "tasa_error": round(errores / peticiones, 4) if peticiones else 0.0,
+        "rps": round(peticiones / duracion, 1) if duracion else 0.0,
+        "latencia_ms": latencias_ms(latencias),
+    }
+    if codigos is not None:
+        datos["codigos"] = {str(k): v for k, v in sorted(codigos.items(), key=lambda kv: str(kv[0]))}
+    return datos
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadatos(benchmark: str, parametros: dict) -> dict:
+    return {
+        "benchmark": benchmark,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "parametros": parametros,
+    }
+
+
+def guardar(informe: dict, salida: str = None):
+    """Escribe el informe en `salida` (o stdout si no se indica)."""
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if salida:
+        with open(salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print(f"Informe guardado en {salida}", file=sys.stderr)
+    else:
+        print(texto)
@@ -0,0 +1,117 @@
+# benchmarks/poblar_bd.py
+#
+# Recrea la base de datos con docs/init_db.sql y la llena con clientes
+# sintéticos:
+#
+#   python -m benchmarks.poblar_bd --clientes 1000000
+#
+# Usa la conexión del .env. Como init_db.sql hace DROP DATABASE, solo se
+# ejecuta contra localhost salvo que se pase --forzar.
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import mysql.connector
+
+from app import config, queries
+from benchmarks.datos import clientes_sinteticos
+from benchmarks.informe import guardar, metadatos
+
+INIT_DB = Path(__file__).resolve().parent.parent / "docs" / "init_db.sql"
+
+HOSTS_LOCALES = ("localhost", "127.0.0.1", "::1")
+
+
+def sentencias(script: str) -> list:
+    """Separa un script SQL en sentencias (sin comentarios de línea)."""
+    lineas = [
+        linea for linea in script.splitlines()
+        if linea.strip() and not linea.strip().startswith("--")
+    ]
+    return [s.strip() for s in "\n".join(lineas).split(";") if s.strip()]
+
+
+def recrear_bd():
+    opciones = config.connect_options()
+    opciones.pop("database")
+
+    conn = mysql.connector.connect(**opciones)
+    cursor = conn.cursor()
+    for sentencia in sentencias(INIT_DB.read_text(encoding="utf-8")):
+        cursor.execute(sentencia)
+        if cursor.with_rows:
+            cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def poblar(total: int, lote: int, semilla: int) -> float:
+    """Inserta `total` clientes con INSERT multi-fila; devuelve los segundos."""
+    conn = mysql.connector.connect(**config.connect_options())
+    cursor = conn.cursor()
+    inicio = time.perf_counter()
+
+    # El número de cada email sigue al mayor id existente: no choca con los
+    # datos de ejemplo ni con una carga anterior (--sin-recrear)
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM clientes")
+    (base,) = cursor.fetchone()
+
+    for desde in range(0, total, lote):
+        n = min(lote, total - desde)
+        filas = clientes_sinteticos(n, semilla + desde, desde=base + desde + 1)
+        cursor.execute(*queries.build_bulk_insert(list(enumerate(filas)), upsert=False))
+        conn.commit()
+        print(f"  {desde + n}/{total}", end="\r", file=sys.stderr)
+
+    cursor.execute("ANALYZE TABLE clientes")
+    cursor.fetchall()
+
+    segundos = time.perf_counter() - inicio
+    cursor.close()
+    conn.close()
+    return segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recrea la BD y la llena con clientes sintéticos"
+    )
+    parser.add_argument("--clientes", type=int, default=100_000)
+    parser.add_argument("--lote", type=int, default=2000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument(
+        "--sin-recrear", action="store_true",
+        help="No ejecutar init_db.sql: añadir a la tabla existente"
+    )
+    parser.add_argument(
+        "--forzar", action="store_true",
+        help=f"Permitir un DB_HOST distinto de {', '.join(HOSTS_LOCALES)}"
+    )
+    parser.add_argument("--salida", help="Fichero JSON del informe")
+    args = parser.parse_args()
+
+    if config.DB_HOST not in HOSTS_LOCALES and not args.forzar:
+        sys.exit(
+            f"DB_HOST={config.DB_HOST} no es local; usa --forzar si de verdad "
+            "quieres recrear esa base de datos"
+        )
+
+    if not args.sin_recrear:
+        print(f"Recreando {config.DB_NAME} con {INIT_DB.name}...", file=sys.stderr)
+        recrear_bd()
+
+    print(f"Insertando {args.clientes} clientes...", file=sys.stderr)
+    segundos = poblar(args.clientes, args.lote, args.semilla)
+
+    guardar({
+        "meta": metadatos("poblar_bd", vars(args)),
+        "segundos": round(segundos, 2),
+        "filas_por_segundo": round(args.clientes / segundos) if segundos else None,
+    }, args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,7 +27,18 @@ CREATE TABLE clientes (
   apellido VARCHAR(100) NOT NULL,
   email VARCHAR(150) NOT NULL UNIQUE,
   telefono VARCHAR(50),
-  direccion VARCHAR(255)
+  direccion VARCHAR(255),
+  -- Se incrementa en cada escritura: concurrencia optimista (ETag/If-Match)
+  version INT NOT NULL DEFAULT 1,
+  -- Índices para la paginación keyset de GET /clientes (orden y filtro
+  -- por prefijo). El UNIQUE de email ya actúa como índice (email, id),
+  -- porque InnoDB añade la clave primaria a todo índice secundario.
+  INDEX idx_clientes_nombre_id (nombre, id),
+  INDEX idx_clientes_apellido_id (apellido, id),
+  -- Búsqueda GET /clientes/search: palabras sueltas de cualquier campo
+  -- ("García López", "juan.perez@..."). Los prefijos al inicio del campo
+  -- usan los índices anteriores.
+  FULLTEXT INDEX ft_clientes_busqueda (nombre, apellido, email)
 );
 
 -- =========================================================
@@ -82,3 +93,13 @@ INSERT INTO clientes (nombre, apellido, email, telefono, direccion) VALUES
 -- =========================================================
 -- SELECT * FROM clientes;
 -- SELECT * FROM roles;
+
+-- =========================================================
+-- 🔁 Migración de una base de datos ya existente
+-- =========================================================
+-- ALTER TABLE clientes
+--   ADD COLUMN version INT NOT NULL DEFAULT 1,
+--   ADD INDEX idx_clientes_nombre_id (nombre, id),
+--   ADD INDEX idx_clientes_apellido_id (apellido, id);
+-- ALTER TABLE clientes
+--   ADD FULLTEXT INDEX ft_clientes_busqueda (nombre, apellido, email);
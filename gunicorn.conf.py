@@ -0,0 +1,42 @@
+# gunicorn.conf.py
+#
+# Servidor de producción: gunicorn reparte las conexiones entre varios
+# procesos worker, cada uno con uvicorn dentro.
+#
+#   gunicorn app.main:app -c gunicorn.conf.py
+#
+# - Un worker por núcleo disponible (WEB_CONCURRENCY para fijar otro número).
+# - preload_app: la aplicación se importa una vez en el proceso maestro y
+#   los workers nacen con ella ya cargada (arrancan antes y comparten
+#   memoria). Los pools de conexiones se crean después, en cada worker,
+#   durante el lifespan de FastAPI.
+# - SIGTERM: cada worker deja de aceptar conexiones, termina las peticiones
+#   en curso (hasta graceful_timeout) y cierra sus pools.
+
+import os
+
+
+def _nucleos() -> int:
+    # Respeta los núcleos asignados al proceso (taskset, cpuset de Docker)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or _nucleos()
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Segundos para terminar las peticiones en curso al apagar o reiniciar
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Un worker que no responde en este tiempo se reinicia
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+# Mayor que el keep-alive del balanceador, para que sea él quien cierre
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+
+# Reiniciar cada worker tras N peticiones (0 = nunca) limita fugas de memoria
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
@@ -0,0 +1,20 @@
+# tests/conftest.py
+#
+# Las pruebas que necesitan MySQL usan la base de datos configurada en .env
+# (la de docs/init_db.sql) y se saltan si no está accesible:
+#
+#   python -m pytest
+
+import mysql.connector
+import pytest
+
+from app import config
+
+
+@pytest.fixture(scope="session")
+def mysql_disponible():
+    try:
+        conn = mysql.connector.connect(**config.connect_options(), connection_timeout=2)
+    except mysql.connector.Error as e:
+        pytest.skip(f"MySQL no accesible: {e}")
+    conn.close()
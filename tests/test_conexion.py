@@ -0,0 +1,53 @@
+# tests/test_conexion.py
+#
+# Las opciones de config.connect_options() sirven a los dos conectores:
+# mysql.connector.aio solo acepta client_flags como máscara entera.
+
+import asyncio
+
+import mysql.connector
+import mysql.connector.aio
+from mysql.connector.aio.connection import MySQLConnection
+from mysql.connector.constants import ClientFlag
+
+from app import config
+
+
+def test_client_flags_es_una_mascara():
+    flags = config.connect_options()["client_flags"]
+    assert isinstance(flags, int)
+    assert flags & ClientFlag.FOUND_ROWS
+    # Sin perder los flags por defecto del conector
+    assert flags & ClientFlag.get_default() == ClientFlag.get_default()
+
+
+def test_opciones_aceptadas_por_aio():
+    # El constructor no conecta: basta para ver cómo guarda los flags
+    conn = MySQLConnection(**config.connect_options())
+    assert conn.client_flags & ClientFlag.FOUND_ROWS
+
+
+def test_conexion_aio(mysql_disponible):
+    async def conectar():
+        conn = await mysql.connector.aio.connect(**config.connect_options())
+        try:
+            cursor = await conn.cursor()
+            await cursor.execute("SELECT 1")
+            assert await cursor.fetchall() == [(1,)]
+            await cursor.close()
+            return conn.client_flags
+        finally:
+            await conn.close()
+
+    assert asyncio.run(conectar()) & ClientFlag.FOUND_ROWS
+
+
+def test_conexion_sync(mysql_disponible):
+    conn = mysql.connector.connect(**config.connect_options())
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        assert cursor.fetchall() == [(1,)]
+        cursor.close()
+    finally:
+        conn.close()
@@ -0,0 +1,49 @@
+# tests/test_etag_listado.py
+#
+# El ETag del listado sale del estado de la tabla: dos workers (cada uno con
+# su VersionColeccion) dan el mismo ETag para los mismos datos.
+
+import asyncio
+import uuid
+
+from app import repository
+from app.cache import VersionColeccion
+
+
+def test_etag_igual_en_otro_worker(mysql_disponible, monkeypatch):
+    async def recorrido():
+        cliente_id = None
+        try:
+            monkeypatch.setattr(repository, "version_clientes", VersionColeccion(ventana=60))
+            inicial = await repository.etag_listado("limit=10")
+            assert await repository.etag_listado("limit=20") != inicial
+
+            # Otro worker: sin estado leído todavía
+            monkeypatch.setattr(repository, "version_clientes", VersionColeccion(ventana=60))
+            assert await repository.etag_listado("limit=10") == inicial
+
+            creado = await repository.create_cliente({
+                "nombre": "Prueba",
+                "apellido": "ETag",
+                "email": f"prueba-{uuid.uuid4().hex[:12]}@example.com",
+                "telefono": None,
+                "direccion": None,
+            })
+            cliente_id = creado["id"]
+            tras_alta = await repository.etag_listado("limit=10")
+            assert tras_alta != inicial
+
+            await repository.patch_cliente(cliente_id, {"telefono": "555-0100"}, 1)
+            tras_cambio = await repository.etag_listado("limit=10")
+            assert tras_cambio not in (inicial, tras_alta)
+
+            # De vuelta a los mismos datos que al principio: el mismo ETag
+            await repository.delete_cliente(cliente_id)
+            cliente_id = None
+            assert await repository.etag_listado("limit=10") == inicial
+        finally:
+            if cliente_id is not None:
+                await repository.delete_cliente(cliente_id)
+            await repository.close_pools()
+
+    asyncio.run(recorrido())
@@ -0,0 +1,61 @@
+# tests/test_repository.py
+#
+# Recorrido completo por app/repository.py contra MySQL con cada capa de
+# datos (DB_ASYNC=true y false): alta, lectura, modificación parcial y baja,
+# a través del pool de conexiones de esa capa.
+
+import asyncio
+import uuid
+
+import pytest
+
+from app import config, repository
+from app.queries import ConflictoDeVersion
+
+
+@pytest.fixture(params=[True, False], ids=["async", "sync"])
+def db_async(request, monkeypatch, mysql_disponible):
+    monkeypatch.setattr(config, "DB_ASYNC", request.param)
+    return request.param
+
+
+def test_crud(db_async):
+    async def recorrido():
+        cliente_id = None
+        try:
+            creado = await repository.create_cliente({
+                "nombre": "Prueba",
+                "apellido": "Repositorio",
+                "email": f"prueba-{uuid.uuid4().hex[:12]}@example.com",
+                "telefono": None,
+                "direccion": None,
+            })
+            cliente_id = creado["id"]
+            assert creado["version"] == 1
+
+            leido = await repository.get_cliente_by_id(cliente_id)
+            assert leido["email"] == creado["email"]
+            assert leido["version"] == 1
+
+            modificado = await repository.patch_cliente(cliente_id, {"telefono": "555-0100"}, 1)
+            assert modificado["telefono"] == "555-0100"
+            assert modificado["version"] == 2
+            with pytest.raises(ConflictoDeVersion):
+                await repository.patch_cliente(cliente_id, {"telefono": "555-0101"}, 1)
+
+            leido = await repository.get_cliente_by_id(cliente_id)
+            assert (leido["telefono"], leido["version"]) == ("555-0100", 2)
+
+            assert await repository.delete_cliente(cliente_id)
+            cliente_id = None
+            assert await repository.get_cliente_by_id(creado["id"]) is None
+
+            # Las consultas han pasado por el pool de la capa elegida
+            assert repository.modo() == ("async" if db_async else "sync")
+            assert repository.pool_stats()["prestamos"] > 0
+        finally:
+            if cliente_id is not None:
+                await repository.delete_cliente(cliente_id)
+            await repository.close_pools()
+
+    asyncio.run(recorrido())